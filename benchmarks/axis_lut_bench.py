@@ -0,0 +1,61 @@
+"""
+Axis normalization: `calculate_axis_value` per event vs. the compiled lookup tables.
+
+    python benchmarks/axis_lut_bench.py --events 200000
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from time import perf_counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from calibration import calculate_axis_value, compile_calibration, evaluate_axis
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+
+def main():
+    parser = argparse.ArgumentParser(description="Axis lookup table benchmark")
+    parser.add_argument('--events', type=int, default=200000, help='Synthetic axis events to normalize')
+    parser.add_argument('--config', default=CONFIG_PATH, help='Config with the calibration section to use')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as file:
+        config = json.load(file)
+    # Stick axes apply their deadzone per pair, so compare per-axis tables against the reference.
+    config['calibration']['sticks'] = []
+
+    start = perf_counter()
+    calibration = compile_calibration(config)
+    compile_seconds = perf_counter() - start
+
+    axes = [int(axis) for axis in config['calibration']['axes']]
+    events = [(random.choice(axes), random.randint(-32768, 32767) / 32767.0) for _ in range(args.events)]
+
+    start = perf_counter()
+    for axis, value in events:
+        calculate_axis_value(value, axis, config)
+    direct_seconds = perf_counter() - start
+
+    start = perf_counter()
+    for axis, value in events:
+        evaluate_axis(calibration, axis, value)
+    table_seconds = perf_counter() - start
+
+    max_error = max(abs(calculate_axis_value(value, axis, config) - evaluate_axis(calibration, axis, value))
+                    for axis, value in events[:10000])
+
+    results = {
+        'events': args.events,
+        'compile_ms': round(compile_seconds * 1000, 1),
+        'calculate_axis_value_ns_per_event': round(direct_seconds / args.events * 1e9, 1),
+        'lookup_table_ns_per_event': round(table_seconds / args.events * 1e9, 1),
+        'speedup': round(direct_seconds / table_seconds, 2),
+        'max_abs_error': max_error
+    }
+    print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Smoothing cost: the old deque + sum() moving average vs. the O(1) filters.
+
+    python benchmarks/filter_bench.py --samples 200000 --window 5
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from collections import deque
+from time import perf_counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from filters import ExponentialMovingAverage, MovingAverage, OneEuroFilter
+
+def deque_average(window):
+    samples = deque(maxlen=window)
+    def average(value, now=0.0):
+        samples.append(value)
+        return sum(samples) / len(samples)
+    return average
+
+def time_filter(smooth, samples):
+    start = perf_counter()
+    for now, value in samples:
+        smooth(value, now)
+    return (perf_counter() - start) / len(samples) * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="Input filter benchmark")
+    parser.add_argument('--samples', type=int, default=200000, help='Synthetic axis samples per filter')
+    parser.add_argument('--window', type=int, default=5, help='Moving average window')
+    args = parser.parse_args()
+
+    samples = [(i / 1000.0, random.uniform(-1.0, 1.0)) for i in range(args.samples)]
+    filters = {
+        'deque_sum': deque_average(args.window),
+        'moving_average': MovingAverage(args.window),
+        'ema': ExponentialMovingAverage(0.5),
+        'ema_time_constant': ExponentialMovingAverage(time_constant_s=0.01),
+        'one_euro': OneEuroFilter(1.0, 0.05)
+    }
+    results = {'samples': args.samples, 'window': args.window}
+    for name, smooth in filters.items():
+        results[f'{name}_ns_per_sample'] = round(time_filter(smooth, samples), 1)
+
+    # The deque version's cost grows with the window, the running sum's does not.
+    wide = args.window * 20
+    results[f'deque_sum_window_{wide}_ns_per_sample'] = round(time_filter(deque_average(wide), samples), 1)
+    results[f'moving_average_window_{wide}_ns_per_sample'] = round(time_filter(MovingAverage(wide), samples), 1)
+    print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
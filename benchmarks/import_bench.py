@@ -0,0 +1,96 @@
+"""
+Startup cost guard: imports main (or runs a config-only subcommand) under `-X importtime` in a
+fresh interpreter and checks that none of the heavy or device-bound dependencies are imported.
+
+Fails (exit code 1) when a forbidden module shows up or the median import time exceeds
+`--max-ms`, so it can run in CI as a regression guard.
+
+    python benchmarks/import_bench.py --runs 5
+    python benchmarks/import_bench.py --command list --max-ms 150
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Only the subcommands that actually use them may import these.
+FORBIDDEN = ('pygame', 'pynput', 'pync', 'pyautogui', 'listen', 'send_keys', 'asyncio')
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        list: (module, self us, cumulative us, depth) per imported module, in import order.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line.
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        modules.append((stripped, int(fields[0]), int(fields[1]), depth))
+    return modules
+
+def measure(command):
+    """
+    Runs one fresh interpreter and returns its parsed import times.
+    """
+    if command:
+        argv = [sys.executable, '-X', 'importtime', 'main.py', command]
+    else:
+        argv = [sys.executable, '-X', 'importtime', '-c', 'import main']
+    result = subprocess.run(argv, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv[3:])} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time regression guard")
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to measure')
+    parser.add_argument('--command', help='Run `main.py <command>` instead of `import main`, e.g. list')
+    parser.add_argument('--max-ms', type=float, help='Fail when the median total import time exceeds this')
+    parser.add_argument('--top', type=int, default=10, help='Modules with the most self time to report')
+    args = parser.parse_args()
+
+    totals = []
+    runs = []
+    for _ in range(args.runs):
+        modules = measure(args.command)
+        runs.append(modules)
+        totals.append(sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000.0)
+
+    imported = {name for modules in runs for name, _, _, _ in modules}
+    forbidden = sorted(name for name in imported if name.split('.')[0] in FORBIDDEN)
+    slowest = sorted(runs[-1], key=lambda entry: entry[1], reverse=True)[:args.top]
+    median_ms = round(statistics.median(totals), 1)
+
+    failures = []
+    if forbidden:
+        failures.append(f"imported {', '.join(forbidden)}")
+    if args.max_ms is not None and median_ms > args.max_ms:
+        failures.append(f"median import time {median_ms} ms exceeds {args.max_ms} ms")
+    print(json.dumps({
+        'target': f"main.py {args.command}" if args.command else 'import main',
+        'runs': args.runs,
+        'median_ms': median_ms,
+        'min_ms': round(min(totals), 1),
+        'modules': len(runs[-1]),
+        'slowest_self_ms': {name: round(self_us / 1000.0, 1) for name, self_us, _, _ in slowest},
+        'forbidden_imports': forbidden,
+        'passed': not failures,
+        'failures': failures
+    }, indent=4))
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
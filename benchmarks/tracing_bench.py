@@ -0,0 +1,58 @@
+"""
+Cost of stage tracing: one histogram record, one timed stage (two perf_counter_ns calls
+plus the record) and the `is None` check the loop pays when tracing is off.
+
+    python benchmarks/tracing_bench.py --samples 500000
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from time import perf_counter, perf_counter_ns
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tracing import HANDLE, Histogram, StageTracer
+
+def per_op_ns(start, samples):
+    return round((perf_counter() - start) / samples * 1e9, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage tracing overhead benchmark")
+    parser.add_argument('--samples', type=int, default=500000, help='Operations per measurement')
+    args = parser.parse_args()
+
+    # Roughly log-normal latencies around 10 us, like the handle and dispatch stages.
+    values = [int(random.lognormvariate(9.2, 0.8)) for _ in range(args.samples)]
+    results = {'samples': args.samples}
+
+    histogram = Histogram()
+    start = perf_counter()
+    for value in values:
+        histogram.record(value)
+    results['record_ns'] = per_op_ns(start, args.samples)
+
+    tracer = StageTracer()
+    start = perf_counter()
+    for _ in range(args.samples):
+        begin = perf_counter_ns()
+        tracer.record(HANDLE, perf_counter_ns() - begin)
+    results['timed_stage_ns'] = per_op_ns(start, args.samples)
+
+    tracer = None
+    start = perf_counter()
+    for _ in range(args.samples):
+        if tracer is None:
+            pass
+    results['disabled_check_ns'] = per_op_ns(start, args.samples)
+
+    start = perf_counter()
+    summary = histogram.summary()
+    results['summary_us'] = round((perf_counter() - start) * 1e6, 1)
+    results['p50_us'] = summary['p50']
+    results['p99_us'] = summary['p99']
+    print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
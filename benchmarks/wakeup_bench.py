@@ -0,0 +1,87 @@
+"""
+Idle CPU and first-event latency of the `poll` and `wait` input loop modes.
+
+No controller is needed: synthetic JOYBUTTONDOWN events are posted into the
+SDL queue from a helper thread and timed until the loop picks them up.
+
+    python benchmarks/wakeup_bench.py --idle 3 --samples 50
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import threading
+from statistics import median
+from time import perf_counter, perf_counter_ns, process_time, sleep
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+from event_loop import AdaptiveWait, DEFAULT_LOOP_SETTINGS, poll_events, restrict_event_queue
+
+def measure_idle_cpu(pump, duration):
+    """Runs the pump with an empty queue and returns CPU seconds used per wall second."""
+    start_wall, start_cpu = perf_counter(), process_time()
+    while perf_counter() - start_wall < duration:
+        pump()
+    return (process_time() - start_cpu) / (perf_counter() - start_wall)
+
+def measure_first_event_latency(pump, samples, max_gap):
+    """Posts one event after a random quiet gap and returns the pickup latencies in microseconds."""
+    latencies = []
+    for _ in range(samples):
+        posted = {}
+
+        def post():
+            sleep(random.uniform(max_gap / 2, max_gap))
+            posted['ns'] = perf_counter_ns()
+            pg.event.post(pg.event.Event(pg.JOYBUTTONDOWN, button=0, joy=0, instance_id=0))
+
+        poster = threading.Thread(target=post)
+        poster.start()
+        while True:
+            events = pump()
+            if any(event.type == pg.JOYBUTTONDOWN for event in events):
+                latencies.append((perf_counter_ns() - posted['ns']) / 1000)
+                break
+        poster.join()
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Input loop wake-up benchmark")
+    parser.add_argument('--idle', type=float, default=3.0, help='Seconds of idle time to measure per mode')
+    parser.add_argument('--samples', type=int, default=30, help='First-event latency samples per mode')
+    parser.add_argument('--gap', type=float, default=0.05, help='Max quiet gap before each posted event (s)')
+    args = parser.parse_args()
+
+    pg.init()
+    restrict_event_queue()
+    settings = DEFAULT_LOOP_SETTINGS
+    pumps = {
+        'poll': poll_events,
+        'wait': AdaptiveWait.from_settings(settings),
+        'wait-idle': AdaptiveWait(settings['idle_timeout_ms'], settings['idle_timeout_ms'], 0.0),
+    }
+
+    results = {}
+    for mode, pump in pumps.items():
+        cpu = measure_idle_cpu(pump, args.idle)
+        latencies = measure_first_event_latency(pump, args.samples, args.gap)
+        results[mode] = {
+            'idle_cpu_percent': round(cpu * 100, 2),
+            'first_event_latency_us': {
+                'p50': round(median(latencies), 1),
+                'max': round(max(latencies), 1)
+            }
+        }
+        print(f"{mode:>10}: idle CPU {cpu * 100:6.2f}%  first event p50 {median(latencies):8.1f} us  "
+              f"max {max(latencies):8.1f} us")
+
+    print(json.dumps(results, indent=4))
+    pg.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Axis calibration: normalization helpers, precomputed lookup tables and the analog stick pipeline.
+
+`calculate_axis_value` is the straightforward per-event normalization. For the
+input loop, `compile_calibration` bakes normalization, clamping, deadzone and
+response curve into one table per axis over the quantized SDL range
+(-32768..32767), so evaluating an axis event is a single index.
+
+Stick axes are paired into 2-D vectors. Their tables only normalize, and the
+deadzone and response curve are applied to the (x, y) pair at once by a
+`StickPipeline`, so a diagonal is treated as one movement rather than two.
+"""
+import json
+import logging
+from array import array
+from bisect import bisect_right
+from math import hypot
+
+from input_state import MAX_AXES
+
+DEFAULT_TRIGGER_AXES = (4, 5)
+DEFAULT_STICKS = [{"axes": [0, 1]}, {"axes": [2, 3]}]
+DEADZONE_TYPES = ('axial', 'radial', 'scaled_radial')
+RAW_SCALE = 32767.0
+TABLE_SIZE = 65536
+LAST_INDEX = TABLE_SIZE - 1
+# int() truncates, so adding the offset plus one half rounds to the nearest raw step.
+TABLE_OFFSET = 32768.5
+
+def normalize_joystick_value(value, min_val, max_val):
+    if min_val == max_val:
+        logging.error("Min == Max, cannot normalize.")
+        return 0.0
+    normalized = 2 * (value - min_val) / (max_val - min_val) - 1
+    return restrict_joystic_value(normalized)
+
+def restrict_joystic_value(value):
+    """Restricts the joystick value to the range [-1, 1]."""
+    return max(-1.0, min(1.0, value))
+
+def normalize_trigger_value_to_1(value, min_val, max_val):
+    """
+    Normalize the trigger value to a range of [0, 1].
+    """
+    if min_val == max_val:
+        logging.error("Min == Max, cannot normalize.")
+        return 0.0
+    normalized = (value - min_val) / (max_val - min_val)
+    return restrict_trigger_value_to_1(normalized)
+
+def restrict_trigger_value_to_1(value):
+    """Restricts the trigger value to the range [0, 1]."""
+    return max(0.0, min(1.0, value))
+
+def apply_deadzone(value, deadzone):
+    """
+    Apply deadzone to the normalized axis value.
+    """
+    if abs(value) <= deadzone:
+        return 0.0
+    return value
+
+def calculate_axis_value(raw_value, axis, config):
+    # print(f"Axis {axis} raw value: {raw_value}")
+    #if axis is 4 or 5
+    if config and str(axis) in config['calibration']['axes']:
+
+        if axis in [4, 5]: #triggers
+            min_val = -1.0
+            max_val = 1.0
+            deadzone = 0.0
+            normalized = normalize_trigger_value_to_1(raw_value, min_val, max_val)
+            return apply_deadzone(normalized, deadzone)        
+        else: #joysticks
+            min_val = config['calibration']['axes'][str(axis)]['min']
+            max_val = config['calibration']['axes'][str(axis)]['max']
+            deadzone = config['calibration']['deadzone'].get(str(axis), 0.1)
+            normalized = normalize_joystick_value(raw_value, min_val, max_val)
+            return apply_deadzone(normalized, deadzone)
+    else:
+        logging.error("Failed to find axis for normalization in config.")
+        return raw_value
+
+def make_response_curve(spec):
+    """
+    Builds the response curve applied after the deadzone. The sign of the value is kept.
+
+    Args:
+        spec (dict | None): None or {"type": "linear"} for no curve,
+            {"type": "power", "exponent": 2.0} for |v| ** exponent,
+            {"type": "s_curve", "strength": 1.0} to blend towards smoothstep (slow near the
+            center and near full deflection),
+            {"type": "points", "points": [[0, 0], [0.5, 0.2], [1, 1]]} for a piecewise-linear curve.
+
+    Returns:
+        callable: Maps a normalized value to the curved value.
+
+    Raises:
+        ValueError: If the curve type is unknown.
+    """
+    curve_type = (spec or {}).get('type', 'linear')
+    if curve_type == 'linear':
+        return lambda value: value
+    if curve_type == 'power':
+        exponent = float(spec.get('exponent', 1.0))
+        return lambda value: (abs(value) ** exponent) * (1.0 if value >= 0 else -1.0)
+    if curve_type == 's_curve':
+        strength = float(spec.get('strength', 1.0))
+
+        def s_curve(value):
+            magnitude = min(abs(value), 1.0)
+            curved = (1.0 - strength) * magnitude + strength * magnitude * magnitude * (3.0 - 2.0 * magnitude)
+            return curved if value >= 0 else -curved
+        return s_curve
+    if curve_type == 'points':
+        points = sorted((float(x), float(y)) for x, y in spec.get('points', []))
+        if len(points) < 2:
+            raise ValueError("A points response curve needs at least two points.")
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+
+        def points_curve(value):
+            magnitude = abs(value)
+            index = bisect_right(xs, magnitude)
+            if index == 0:
+                curved = ys[0]
+            elif index == len(xs):
+                curved = ys[-1]
+            else:
+                x0, x1, y0, y1 = xs[index - 1], xs[index], ys[index - 1], ys[index]
+                curved = y0 + (y1 - y0) * (magnitude - x0) / (x1 - x0)
+            return curved if value >= 0 else -curved
+        return points_curve
+    raise ValueError(f"Unknown response curve type '{curve_type}'.")
+
+def compile_axis_table(normalize, min_val, max_val, deadzone, curve):
+    """
+    Evaluates the full normalization chain once for every raw SDL axis value.
+
+    Returns:
+        array: 65536 doubles indexed by raw value + 32768.
+    """
+    table = array('d', [0.0]) * TABLE_SIZE
+    if min_val == max_val:
+        logging.error("Min == Max, cannot normalize.")
+        return table
+    for index in range(TABLE_SIZE):
+        value = (index - 32768) / RAW_SCALE
+        table[index] = curve(apply_deadzone(normalize(value, min_val, max_val), deadzone))
+    return table
+
+class StickPipeline:
+    """
+    Deadzone and response curve for one analog stick, applied to its (x, y) pair at once.
+
+    Deadzone types:
+        axial: `apply_deadzone` on each axis with its own deadzone (the old per-axis behaviour).
+        radial: zero inside the inner circle, unchanged outside it.
+        scaled_radial: zero inside the inner circle, then rescaled so movement starts at 0
+            at the edge of the deadzone instead of jumping to the deadzone value.
+    The outer deadzone treats everything past 1 - outer as full deflection, and the response
+    curve is applied to the resulting magnitude (or per axis for axial).
+    """
+    __slots__ = ('x_axis', 'y_axis', 'mask', 'deadzone_type', 'inner', 'outer', 'x_deadzone', 'y_deadzone', 'curve')
+
+    def __init__(self, x_axis, y_axis, deadzone_type='scaled_radial', inner=0.1, outer=0.0,
+                 x_deadzone=None, y_deadzone=None, curve=None):
+        if deadzone_type not in DEADZONE_TYPES:
+            raise ValueError(f"Unknown stick deadzone type '{deadzone_type}'.")
+        if not 0.0 <= inner < 1.0 - outer:
+            raise ValueError(f"Stick {x_axis}/{y_axis}: deadzone {inner} leaves no travel with outer deadzone {outer}.")
+        self.x_axis = x_axis
+        self.y_axis = y_axis
+        self.mask = (1 << x_axis) | (1 << y_axis)
+        self.deadzone_type = deadzone_type
+        self.inner = inner
+        self.outer = outer
+        self.x_deadzone = inner if x_deadzone is None else x_deadzone
+        self.y_deadzone = inner if y_deadzone is None else y_deadzone
+        self.curve = curve or make_response_curve(None)
+
+    def process(self, x, y):
+        """
+        Returns the (x, y) pair after deadzone and response curve.
+        """
+        curve = self.curve
+        if self.deadzone_type == 'axial':
+            return curve(apply_deadzone(x, self.x_deadzone)), curve(apply_deadzone(y, self.y_deadzone))
+        magnitude = hypot(x, y)
+        if magnitude <= self.inner:
+            return 0.0, 0.0
+        limit = 1.0 - self.outer
+        if self.deadzone_type == 'radial':
+            scaled = min(magnitude, limit) / limit
+        else:
+            scaled = min((magnitude - self.inner) / (limit - self.inner), 1.0)
+        factor = curve(scaled) / magnitude
+        return x * factor, y * factor
+
+def compile_sticks(config):
+    """
+    Builds a StickPipeline for every stick in `calibration['sticks']` (default: axes 0/1 and 2/3).
+
+    Each stick entry may set "axes", "deadzone_type", "deadzone", "outer_deadzone" and
+    "response_curve". Without an explicit "deadzone" the larger of the two per-axis
+    values in `calibration['deadzone']` is used.
+
+    Raises:
+        ValueError: For invalid axes, deadzone types, deadzone sizes or curves.
+    """
+    calibration = config.get('calibration', {}) if config else {}
+    deadzones = calibration.get('deadzone', {})
+    sticks = []
+    for spec in calibration.get('sticks', DEFAULT_STICKS):
+        x_axis, y_axis = (int(axis) for axis in spec['axes'])
+        if max(x_axis, y_axis) >= MAX_AXES or x_axis == y_axis:
+            raise ValueError(f"Invalid stick axes {spec['axes']}.")
+        x_deadzone = deadzones.get(str(x_axis), 0.1)
+        y_deadzone = deadzones.get(str(y_axis), 0.1)
+        sticks.append(StickPipeline(
+            x_axis, y_axis,
+            deadzone_type=spec.get('deadzone_type', 'scaled_radial'),
+            inner=float(spec.get('deadzone', max(x_deadzone, y_deadzone))),
+            outer=float(spec.get('outer_deadzone', 0.0)),
+            x_deadzone=x_deadzone,
+            y_deadzone=y_deadzone,
+            curve=make_response_curve(spec.get('response_curve'))
+        ))
+    return sticks
+
+def get_trigger_axes(config):
+    calibration = config.get('calibration', {}) if config else {}
+    return tuple(int(axis) for axis in calibration.get('triggers', DEFAULT_TRIGGER_AXES))
+
+def compile_axis_tables(config, triggers, stick_axes):
+    """
+    Builds the lookup table of every calibrated axis (see `compile_calibration`).
+
+    Returns:
+        list: One table per axis, None for axes without calibration.
+    """
+    calibration = config.get('calibration', {}) if config else {}
+    deadzones = calibration.get('deadzone', {})
+    curves = calibration.get('response_curves', {})
+    tables = [None] * MAX_AXES
+    for axis_key, limits in calibration.get('axes', {}).items():
+        axis = int(axis_key)
+        if axis >= len(tables):
+            tables.extend([None] * (axis + 1 - len(tables)))
+        curve = make_response_curve(curves.get(axis_key))
+        if axis in triggers:
+            tables[axis] = compile_axis_table(normalize_trigger_value_to_1, -1.0, 1.0, 0.0, curve)
+        elif stick_axes >> axis & 1:
+            tables[axis] = compile_axis_table(normalize_joystick_value, limits['min'], limits['max'],
+                                              0.0, make_response_curve(None))
+        else:
+            tables[axis] = compile_axis_table(normalize_joystick_value, limits['min'], limits['max'],
+                                              deadzones.get(axis_key, 0.1), curve)
+    return tables
+
+def compile_calibration(config, tables=None):
+    """
+    Compiles the `calibration` section of the config into per-axis lookup tables.
+
+    Triggers are normalized to [0, 1] and joysticks to [-1, 1] between their calibrated
+    min/max, exactly like `calculate_axis_value`. Stick axes are only normalized; their
+    deadzone and curve are applied per pair by the compiled sticks. Axes without
+    calibration get no table and pass their raw value through.
+
+    Args:
+        tables (list, optional): Tables compiled earlier for this same calibration, e.g. from
+            `unpack_tables`, to use instead of building them again. Sticks are always rebuilt.
+
+    Returns:
+        dict: {'key': str, 'tables': list, 'triggers': tuple, 'sticks': list, 'stick_axes': int}
+    """
+    triggers = get_trigger_axes(config)
+    sticks = compile_sticks(config)
+    stick_axes = 0
+    for stick in sticks:
+        stick_axes |= stick.mask
+    if tables is None:
+        tables = compile_axis_tables(config, triggers, stick_axes)
+    return {'key': calibration_key(config), 'tables': tables, 'triggers': triggers,
+            'sticks': sticks, 'stick_axes': stick_axes}
+
+def pack_tables(calibration):
+    """
+    Returns:
+        list: The lookup tables of a compiled calibration as bytes, None for axes without one.
+    """
+    return [table.tobytes() if table is not None else None for table in calibration['tables']]
+
+def unpack_tables(packed):
+    """
+    Inverse of `pack_tables`.
+
+    Raises:
+        ValueError: If a table does not have TABLE_SIZE entries.
+    """
+    tables = []
+    for data in packed:
+        if data is None:
+            tables.append(None)
+            continue
+        table = array('d')
+        table.frombytes(data)
+        if len(table) != TABLE_SIZE:
+            raise ValueError(f"Axis table has {len(table)} entries instead of {TABLE_SIZE}.")
+        tables.append(table)
+    return tables
+
+def calibration_key(config):
+    return json.dumps(config.get('calibration', {}) if config else {}, sort_keys=True)
+
+def get_compiled_calibration(config, compiled=None):
+    """
+    Returns `compiled` if it still matches the config's calibration, otherwise rebuilds the tables.
+    """
+    if compiled is not None and compiled['key'] == calibration_key(config):
+        return compiled
+    return compile_calibration(config)
+
+def evaluate_axis(calibration, axis, value):
+    """
+    Looks up the normalized value for a pygame axis value (raw / 32767).
+    """
+    tables = calibration['tables']
+    table = tables[axis] if axis < len(tables) else None
+    if table is None:
+        return value
+    index = int(value * RAW_SCALE + TABLE_OFFSET)
+    if index < 0:
+        index = 0
+    elif index > LAST_INDEX:
+        index = LAST_INDEX
+    return table[index]
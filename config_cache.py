@@ -0,0 +1,174 @@
+"""
+Startup cache for the JSON files and what is compiled from them.
+
+Every command needs the parsed config, layout and mappings, and `run` also needs the axis
+lookup tables compiled from the calibration, which takes far longer than parsing. A snapshot
+next to the config keeps both in a versioned binary file:
+
+    header: MAGIC, SNAPSHOT_VERSION, marshal format version, Python major/minor
+    body: marshal of {'files': {name: {path, size, mtime_ns, sha256, document}}, 'compiled': ...}
+
+A file is current when its size and mtime match; when only the mtime changed, its content
+hash decides. Any edit therefore invalidates the snapshot transparently: changed files are
+parsed again, the compile step is rerun (it gets the previous result, so it can keep what
+did not change) and the snapshot is rewritten. marshal only ever builds plain data, so
+loading a snapshot cannot run code, and a snapshot from another format or Python version is
+ignored and rebuilt.
+
+JSON is parsed with orjson when it is installed and with the standard library otherwise.
+"""
+import hashlib
+import json
+import logging
+import marshal
+import os
+import struct
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAGIC = b'CMSN'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<4sHHBB')
+SNAPSHOT_SUFFIX = '.snapshot'
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+def loads_json(data):
+    """
+    Parses JSON from bytes with the fastest available backend.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def get_snapshot_path(config_path):
+    """
+    Returns the snapshot path for `config_path`, e.g. config.snapshot for config.json.
+    """
+    return os.path.splitext(config_path)[0] + SNAPSHOT_SUFFIX
+
+def read_snapshot(path):
+    """
+    Returns:
+        dict | None: The snapshot, or None if it is missing, corrupt or from another version.
+    """
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, marshal_version, major, minor = HEADER.unpack_from(data)
+    if (magic != MAGIC or version != SNAPSHOT_VERSION or marshal_version != marshal.version
+            or (major, minor) != sys.version_info[:2]):
+        logging.debug("Ignoring snapshot %s from another version", path)
+        return None
+    try:
+        snapshot = marshal.loads(data[HEADER.size:])
+    except (EOFError, ValueError, TypeError) as e:
+        logging.warning(f"Ignoring corrupt snapshot {path}: {e}")
+        return None
+    if not isinstance(snapshot, dict) or not isinstance(snapshot.get('files'), dict):
+        return None
+    return snapshot
+
+def write_snapshot(path, snapshot):
+    """
+    Writes `snapshot` atomically. A failure is logged and otherwise ignored: the snapshot
+    only saves time.
+
+    Returns:
+        bool: Whether it was written.
+    """
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, marshal.version, *sys.version_info[:2]))
+            file.write(marshal.dumps(snapshot))
+        os.replace(temp_path, path)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Failed to write snapshot {path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+def load_document(name, path, cached):
+    """
+    Returns the parsed document at `path`, from `cached` (its snapshot entry) when the file
+    did not change.
+
+    Returns:
+        tuple: (entry for the new snapshot, whether the entry differs from `cached`)
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it is not valid JSON.
+    """
+    stat = os.stat(path)
+    if not isinstance(cached, dict) or cached.get('path') != path or 'document' not in cached:
+        cached = None
+    if cached and cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+        return cached, False
+    with open(path, 'rb') as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if cached and cached.get('sha256') == digest:
+        # Touched but not edited: keep the parsed document, remember the new mtime.
+        return dict(cached, size=stat.st_size, mtime_ns=stat.st_mtime_ns), True
+    logging.debug("Parsing %s for the snapshot (%s)", path, name)
+    return {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest,
+            'document': loads_json(data)}, True
+
+def load_with_snapshot(paths, snapshot_path, compile=None):
+    """
+    Loads the JSON documents in `paths` and the data compiled from them, from the snapshot at
+    `snapshot_path` where it is still current, rebuilding and rewriting it where it is not.
+
+    Args:
+        paths (dict): Name -> JSON file path, e.g. {'config': 'config.json'}.
+        compile (callable, optional): Takes (documents, previous compiled data or None) and
+            returns the compiled data to keep in the snapshot. It must be marshal-able: dicts,
+            lists, tuples, str, bytes, numbers, booleans and None. Only called when a file changed.
+
+    Returns:
+        tuple: (documents dict with False for every file that failed to load, compiled data,
+        whether the snapshot was used as is)
+    """
+    snapshot = read_snapshot(snapshot_path)
+    cached_files = snapshot['files'] if snapshot else {}
+    files = {}
+    documents = {}
+    changed = snapshot is None
+    failed = False
+    for name, path in paths.items():
+        try:
+            entry, entry_changed = load_document(name, path, cached_files.get(name))
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to load {path}: {e}")
+            documents[name] = False
+            failed = True
+            continue
+        files[name] = entry
+        documents[name] = entry['document']
+        changed = changed or entry_changed
+    if set(cached_files) != set(files):
+        changed = True
+
+    previous = snapshot.get('compiled') if snapshot else None
+    if not changed:
+        return documents, previous, True
+    if failed:
+        return documents, None, False
+
+    stale = snapshot is None or any(files[name]['sha256'] != cached_files.get(name, {}).get('sha256')
+                                    for name in files)
+    compiled = compile(documents, previous) if compile and stale else previous
+    write_snapshot(snapshot_path, {'files': files, 'compiled': compiled})
+    return documents, compiled, False
@@ -0,0 +1,204 @@
+"""
+Hot-path diagnostics: a fixed-size in-memory ring of recent events, written to disk only
+when something asks for it.
+
+The input loop must not print or format anything per event. Instead it checks a flag that is
+set once up front and, only when verbose diagnostics are on, records the message template and
+its arguments as they are:
+
+    if DIAGNOSTICS.verbose:
+        DIAGNOSTICS.record("axis %d -> %.3f", axis, value)
+
+Nothing is formatted until the ring is dumped. The ring also keeps the recent log records
+(via DiagnosticsHandler), so a dump shows what led up to a problem. It is dumped:
+
+    - when an error is logged (at most once every `min_dump_interval_s`),
+    - on SIGUSR2,
+    - on request, e.g. from the "DumpDiagnostics" action or `dump()`.
+"""
+import logging
+import os
+import signal
+import threading
+from datetime import datetime
+from time import perf_counter, perf_counter_ns, time
+
+DEFAULT_DIAGNOSTICS = {
+    "verbose": False,
+    "buffer_size": 4096,
+    "dump_path": "mapper_diagnostics.log",
+    "dump_on_error": True,
+    "min_dump_interval_s": 5.0
+}
+
+class RingBuffer:
+    """
+    The last `capacity` entries, oldest first. Appending never allocates beyond the entry itself.
+    """
+    __slots__ = ('entries', 'capacity', 'index', 'total')
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"Diagnostics buffer size must be at least 1, got {capacity}.")
+        self.capacity = int(capacity)
+        self.entries = [None] * self.capacity
+        self.index = 0
+        self.total = 0
+
+    def append(self, entry):
+        index = self.index
+        self.entries[index] = entry
+        index += 1
+        self.index = 0 if index == self.capacity else index
+        self.total += 1
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def snapshot(self):
+        if self.total < self.capacity:
+            return self.entries[:self.index]
+        return self.entries[self.index:] + self.entries[:self.index]
+
+    def clear(self):
+        for i in range(self.capacity):
+            self.entries[i] = None
+        self.index = 0
+        self.total = 0
+
+def format_entry(entry, wall_offset):
+    """
+    Formats one (perf_counter_ns, level, message, args) entry as a log line.
+    """
+    timestamp_ns, level, message, args = entry
+    stamp = datetime.fromtimestamp(timestamp_ns / 1e9 + wall_offset).isoformat(timespec='microseconds')
+    if args:
+        try:
+            message = message % args
+        except (TypeError, ValueError) as e:
+            message = f"{message} {args!r} (format error: {e})"
+    return f"{stamp} {level:<8} {message}"
+
+class Diagnostics:
+    """
+    Attributes:
+        verbose (bool): Whether the hot path records its events. Check it before calling `record`.
+        ring (RingBuffer): Recent (perf_counter_ns, level, message template, args) entries.
+        dumps (int): Dumps written so far.
+    """
+    __slots__ = ('verbose', 'ring', 'dump_path', 'dump_on_error', 'min_dump_interval_s',
+                 'last_dump', 'dumps', 'wall_offset', 'lock')
+
+    def __init__(self, buffer_size=4096, verbose=False, dump_path=DEFAULT_DIAGNOSTICS['dump_path'],
+                 dump_on_error=True, min_dump_interval_s=5.0):
+        self.verbose = verbose
+        self.ring = RingBuffer(buffer_size)
+        self.dump_path = dump_path
+        self.dump_on_error = dump_on_error
+        self.min_dump_interval_s = min_dump_interval_s
+        self.last_dump = None
+        self.dumps = 0
+        # Maps perf_counter_ns timestamps to wall-clock time when the dump is formatted.
+        self.wall_offset = time() - perf_counter()
+        # Reentrant: SIGUSR2 may arrive on the main thread while it is already dumping.
+        self.lock = threading.RLock()
+
+    def configure(self, settings):
+        """
+        Applies a `diagnostics` config section (see DEFAULT_DIAGNOSTICS). Resizing clears the ring.
+        """
+        self.verbose = bool(settings.get('verbose', self.verbose))
+        self.dump_path = settings.get('dump_path', self.dump_path)
+        self.dump_on_error = settings.get('dump_on_error', self.dump_on_error)
+        self.min_dump_interval_s = settings.get('min_dump_interval_s', self.min_dump_interval_s)
+        size = settings.get('buffer_size', self.ring.capacity)
+        if size != self.ring.capacity:
+            self.ring = RingBuffer(size)
+
+    def record(self, message, *args):
+        """
+        Adds a hot-path event. `message` is a %-style template, formatted only on dump.
+        """
+        self.ring.append((perf_counter_ns(), 'TRACE', message, args))
+
+    def add_log_record(self, record):
+        self.ring.append((perf_counter_ns(), record.levelname, record.msg, record.args))
+
+    def dump(self, reason="requested", path=None):
+        """
+        Appends the ring to `path` (default `dump_path`) and empties it.
+
+        Returns:
+            str: The path written, or None if writing failed.
+        """
+        path = path or self.dump_path
+        with self.lock:
+            entries = self.ring.snapshot()
+            self.ring.clear()
+            self.last_dump = perf_counter()
+            try:
+                with open(path, 'a') as file:
+                    file.write(f"=== {datetime.now().isoformat(timespec='seconds')} pid {os.getpid()}: "
+                               f"{reason}, {len(entries)} entries ===\n")
+                    for entry in entries:
+                        file.write(format_entry(entry, self.wall_offset) + "\n")
+            except OSError as e:
+                # Not logged as an error: that would trigger another dump.
+                logging.warning(f"Failed to write diagnostics to {path}: {e}")
+                return None
+            self.dumps += 1
+        return path
+
+    def dump_for_error(self, record):
+        if not self.dump_on_error:
+            return
+        if self.last_dump is not None and perf_counter() - self.last_dump < self.min_dump_interval_s:
+            return
+        self.dump(f"error: {record.getMessage()}")
+
+class DiagnosticsHandler(logging.Handler):
+    """
+    Copies log records into the diagnostics ring unformatted and dumps it when an error is logged.
+    """
+    def __init__(self, diagnostics, level=logging.NOTSET):
+        super().__init__(level)
+        self.diagnostics = diagnostics
+
+    def emit(self, record):
+        self.diagnostics.add_log_record(record)
+        if record.levelno >= logging.ERROR:
+            self.diagnostics.dump_for_error(record)
+
+    def handle(self, record):
+        # Skip the handler lock: appending to the ring is a single slot store.
+        if self.filter(record):
+            self.emit(record)
+        return True
+
+def install_diagnostics(diagnostics, logger=None):
+    """
+    Attaches `diagnostics` to `logger` (default: the root logger) and to SIGUSR2.
+
+    In verbose mode the logger lets DEBUG records through to the ring, while the handlers that
+    were already attached, e.g. the console, stay at INFO.
+
+    Returns:
+        DiagnosticsHandler: The handler that was added.
+    """
+    logger = logger or logging.getLogger()
+    for handler in list(logger.handlers):
+        if isinstance(handler, DiagnosticsHandler):
+            logger.removeHandler(handler)
+    if diagnostics.verbose:
+        for handler in logger.handlers:
+            if handler.level < logging.INFO:
+                handler.setLevel(logging.INFO)
+        logger.setLevel(logging.DEBUG)
+    handler = DiagnosticsHandler(diagnostics)
+    logger.addHandler(handler)
+    if hasattr(signal, 'SIGUSR2'):
+        try:
+            signal.signal(signal.SIGUSR2, lambda signum, frame: diagnostics.dump("SIGUSR2"))
+        except ValueError:
+            pass  # Not the main thread; dumps on error and on request still work.
+    return handler
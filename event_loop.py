@@ -0,0 +1,139 @@
+"""
+Event pumping strategies for the controller loop.
+
+`poll` is the original busy loop: pump and drain the SDL queue as fast as the
+CPU allows. `wait` blocks on `pg.event.wait` so the process sleeps until the
+controller actually sends something, and stretches the wake-up timeout once the
+controller has been idle for a while.
+"""
+import logging
+from time import perf_counter, perf_counter_ns
+
+from lazy_imports import lazy_module
+
+pg = lazy_module('pygame')
+
+DEFAULT_LOOP_SETTINGS = {
+    "mode": "wait",
+    "active_timeout_ms": 10,
+    "idle_after_s": 5.0,
+    "idle_timeout_ms": 250,
+    "tick_rate_hz": 500
+}
+
+def get_loop_settings(config):
+    """
+    Returns the `input_loop` section of the config merged over the defaults.
+    """
+    settings = dict(DEFAULT_LOOP_SETTINGS)
+    if config:
+        settings.update(config.get('input_loop', {}))
+    if settings['mode'] not in ('wait', 'poll'):
+        logging.warning(f"Unknown input loop mode '{settings['mode']}', falling back to 'wait'.")
+        settings['mode'] = 'wait'
+    return settings
+
+def restrict_event_queue():
+    """
+    Only let joystick and device events into the SDL queue so nothing else can wake the loop.
+    """
+    controller_events = [pg.JOYAXISMOTION, pg.JOYBUTTONDOWN, pg.JOYBUTTONUP, pg.JOYHATMOTION]
+    device_events = [pg.JOYDEVICEADDED, pg.JOYDEVICEREMOVED]
+    pg.event.set_blocked(None)
+    pg.event.set_allowed(controller_events + device_events + [pg.QUIT])
+    pg.event.clear()
+
+def poll_events(max_timeout_ms=None):
+    """
+    Busy-poll mode: pump the queue and return whatever is waiting (often nothing).
+    """
+    pg.event.pump()
+    return pg.event.get()
+
+class AdaptiveWait:
+    """
+    Wait-based pump. Blocks until the first event arrives, so there is no added
+    latency, and only uses the timeout to decide how often the loop wakes up when
+    nothing happens: `active_timeout_ms` right after input, `idle_timeout_ms`
+    once the controller has been quiet for `idle_after_s` seconds. `max_timeout_ms` lets the
+    caller wake up earlier, e.g. for the next continuous-action tick; 0 does not block at all.
+    `woke_ns` is the `perf_counter_ns` time the last wait ended with an event.
+    """
+    __slots__ = ('active_timeout_ms', 'idle_timeout_ms', 'idle_after_s', 'last_event_time', 'woke_ns')
+
+    def __init__(self, active_timeout_ms=10, idle_timeout_ms=250, idle_after_s=5.0):
+        self.active_timeout_ms = int(active_timeout_ms)
+        self.idle_timeout_ms = int(idle_timeout_ms)
+        self.idle_after_s = float(idle_after_s)
+        self.last_event_time = perf_counter()
+        self.woke_ns = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings['active_timeout_ms'], settings['idle_timeout_ms'], settings['idle_after_s'])
+
+    def is_idle(self, now):
+        return now - self.last_event_time >= self.idle_after_s
+
+    def timeout_ms(self, now):
+        return self.idle_timeout_ms if self.is_idle(now) else self.active_timeout_ms
+
+    def __call__(self, max_timeout_ms=None):
+        timeout = self.timeout_ms(perf_counter())
+        if max_timeout_ms is not None and max_timeout_ms < timeout:
+            if max_timeout_ms <= 0:
+                # pg.event.wait(0) would block forever.
+                return poll_events()
+            timeout = max_timeout_ms
+        event = pg.event.wait(timeout)
+        if event.type == pg.NOEVENT:
+            return []
+        self.woke_ns = perf_counter_ns()
+        self.last_event_time = perf_counter()
+        events = [event]
+        events.extend(pg.event.get())
+        return events
+
+def coalesce_axis_events(events):
+    """
+    Collapses the axis events of one batch to the last value per (device, axis).
+
+    A moving stick can queue dozens of JOYAXISMOTION events per pump while only the
+    latest one matters. Each surviving axis event stays at the position of the last
+    motion for that axis, and button/hat/device events keep their exact order.
+
+    Returns:
+        tuple: (events, axis_events, coalesced) - the reduced list, the number of axis
+        events in the batch and how many of them were dropped.
+    """
+    if len(events) < 2:
+        return events, sum(1 for event in events if event.type == pg.JOYAXISMOTION), 0
+    seen = set()
+    kept = []
+    axis_events = 0
+    for event in reversed(events):
+        if event.type == pg.JOYAXISMOTION:
+            axis_events += 1
+            key = (event.instance_id, event.axis)
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(event)
+    kept.reverse()
+    return kept, axis_events, axis_events - len(seen)
+
+def create_event_pump(config):
+    """
+    Builds the pump function for the configured loop mode.
+
+    Returns:
+        callable: Takes an optional `max_timeout_ms` and returns the list of pending events.
+    """
+    settings = get_loop_settings(config)
+    if settings['mode'] == 'poll':
+        logging.info("Input loop: busy polling.")
+        return poll_events
+    restrict_event_queue()
+    logging.info(f"Input loop: waiting on events ({settings['active_timeout_ms']} ms active, "
+                 f"{settings['idle_timeout_ms']} ms after {settings['idle_after_s']} s idle).")
+    return AdaptiveWait.from_settings(settings)
@@ -0,0 +1,169 @@
+"""
+Input smoothing filters.
+
+Every filter keeps O(1) state in a slotted object and is called as
+`filter(value, now)` with `now` in seconds (e.g. `perf_counter()`), so the same
+filter works on an axis, on a stick or on mouse output:
+
+    moving_average: mean of the last `window` samples, kept as a running sum over a ring buffer.
+    ema: exponential moving average, per sample (`alpha`) or per time (`time_constant_s`).
+    one_euro: adaptive low-pass (Casiez et al.) - heavy smoothing when the input is slow,
+        little lag when it moves fast.
+"""
+from math import exp, pi
+
+FILTER_TYPES = ('moving_average', 'ema', 'one_euro')
+
+class MovingAverage:
+    __slots__ = ('window', 'samples', 'index', 'count', 'total')
+
+    def __init__(self, window=5):
+        if window < 1:
+            raise ValueError(f"Moving average window must be at least 1, got {window}.")
+        self.window = int(window)
+        self.samples = [0.0] * self.window
+        self.reset()
+
+    def reset(self):
+        for i in range(self.window):
+            self.samples[i] = 0.0
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, value, now=0.0):
+        index = self.index
+        samples = self.samples
+        total = self.total + value - samples[index]
+        samples[index] = value
+        self.total = total
+        index += 1
+        if index == self.window:
+            # Re-add once per lap so rounding in the running sum cannot drift.
+            index = 0
+            total = self.total = sum(samples)
+        self.index = index
+        count = self.count
+        if count < self.window:
+            count = self.count = count + 1
+        return total / count
+
+class ExponentialMovingAverage:
+    """
+    With `time_constant_s` the smoothing factor follows the real time between samples,
+    otherwise `alpha` is applied per sample.
+    """
+    __slots__ = ('alpha', 'time_constant_s', 'value', 'last_time')
+
+    def __init__(self, alpha=0.5, time_constant_s=None):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"EMA alpha must be in (0, 1], got {alpha}.")
+        self.alpha = float(alpha)
+        self.time_constant_s = time_constant_s
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.last_time = None
+
+    def __call__(self, value, now=0.0):
+        if self.value is None:
+            self.value = value
+            self.last_time = now
+            return value
+        alpha = self.alpha
+        if self.time_constant_s:
+            alpha = 1.0 - exp(-(now - self.last_time) / self.time_constant_s)
+        self.last_time = now
+        self.value += alpha * (value - self.value)
+        return self.value
+
+def _smoothing_factor(dt, cutoff):
+    r = 2 * pi * cutoff * dt
+    return r / (r + 1)
+
+class OneEuroFilter:
+    """
+    `min_cutoff` (Hz) sets the smoothing at rest, `beta` how quickly the cutoff rises with speed,
+    `d_cutoff` (Hz) the smoothing of the speed estimate itself.
+    """
+    __slots__ = ('min_cutoff', 'beta', 'd_cutoff', 'value', 'derivative', 'last_time')
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        if min_cutoff <= 0 or d_cutoff <= 0:
+            raise ValueError("One Euro cutoffs must be positive.")
+        self.min_cutoff = float(min_cutoff)
+        self.beta = float(beta)
+        self.d_cutoff = float(d_cutoff)
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = 0.0
+        self.last_time = None
+
+    def __call__(self, value, now=0.0):
+        if self.value is None:
+            self.value = value
+            self.last_time = now
+            return value
+        dt = now - self.last_time
+        if dt <= 0:
+            return self.value
+        self.last_time = now
+        a_d = _smoothing_factor(dt, self.d_cutoff)
+        self.derivative += a_d * ((value - self.value) / dt - self.derivative)
+        cutoff = self.min_cutoff + self.beta * abs(self.derivative)
+        self.value += _smoothing_factor(dt, cutoff) * (value - self.value)
+        return self.value
+
+def make_filter(spec):
+    """
+    Builds a filter from a config entry such as {"type": "one_euro", "min_cutoff": 1.0, "beta": 0.05}.
+
+    Returns:
+        The filter, or None when `spec` is empty or {"type": "none"}.
+
+    Raises:
+        ValueError: If the type or its parameters are invalid.
+    """
+    if not spec:
+        return None
+    params = dict(spec)
+    filter_type = params.pop('type', None)
+    try:
+        if filter_type in (None, 'none'):
+            return None
+        if filter_type == 'moving_average':
+            return MovingAverage(**params)
+        if filter_type == 'ema':
+            return ExponentialMovingAverage(**params)
+        if filter_type == 'one_euro':
+            return OneEuroFilter(**params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for {filter_type} filter: {e}") from e
+    raise ValueError(f"Unknown filter type '{filter_type}'.")
+
+def filter_axis(axis_filter, value, now):
+    """
+    Runs `value` through `axis_filter`. A centred axis returns 0.0 straight away and
+    resets the filter, so releases are never delayed by smoothing.
+    """
+    if not value:
+        axis_filter.reset()
+        return 0.0
+    return axis_filter(value, now)
+
+def compile_filters(spec, size):
+    """
+    Builds a per-axis filter table from a mapping of axis index to filter spec.
+
+    Returns:
+        list: `size` entries, None where an axis is not filtered.
+    """
+    table = [None] * size
+    for index, entry in (spec or {}).items():
+        index = int(index)
+        if 0 <= index < size:
+            table[index] = make_filter(entry)
+    return table
@@ -0,0 +1,247 @@
+"""
+Output injection on a background thread.
+
+OS injection (pynput) can take a millisecond or more per call, so the input loop only
+posts commands here and a dedicated thread performs them. The queue is bounded:
+
+    - Relative mouse moves and scrolls are merged into the newest pending one, so a
+      consumer that falls behind sends one larger move instead of many small ones.
+    - When the queue is full, new moves, scrolls and presses are dropped and counted.
+      Releases, and combinations that contain one, are never dropped.
+    - Releases skip ahead of queued moves and scrolls, but never past a pending press or
+      combination: "hold alt, press a, release alt" must reach the OS in that order.
+
+Until `start` is called every command runs inline on the caller's thread.
+
+Presses and releases from the stand-in controllers are checked against an `OutputState`, so
+only real transitions are queued, and a press is only recorded there once it was queued. Commands are finally performed by an output backend
+(see output_backends.py). A combination is posted as one BATCH command, so it is queued,
+dropped or emitted as a unit.
+"""
+import logging
+import threading
+from collections import deque
+from time import perf_counter_ns
+
+from output_backends import BATCH, KEYBOARD, MOUSE, MOVE, PRESS, RELEASE, SCROLL
+from output_state import OutputState
+from tracing import INJECT
+
+DEFAULT_QUEUE_SIZE = 256
+
+class Injector:
+    """
+    Attributes:
+        backend (OutputBackend): Performs the commands. Only swap it while the thread is stopped.
+        keyboard, mouse: Drop-in stand-ins for the pynput controllers that post to this injector.
+        output (OutputState): Keys and buttons currently held through the stand-ins.
+        pending_presses (int): PRESS and BATCH commands in the queue; releases wait behind them.
+        tracer (StageTracer, optional): Records how long each command takes on the backend.
+        posted (int): Commands posted.
+        merged (int): Moves/scrolls merged into a pending one.
+        dropped (int): Commands dropped because the queue was full.
+        injected (int): Commands performed.
+        max_depth (int): Highest queue depth seen.
+    """
+    __slots__ = ('backend', 'capacity', 'queue', 'releases',
+                 'pending_presses', 'condition', 'thread', 'running', 'busy',
+                 'keyboard', 'mouse', 'output', 'tracer', 'posted', 'merged', 'dropped', 'injected', 'max_depth')
+
+    def __init__(self, backend, capacity=DEFAULT_QUEUE_SIZE):
+        if capacity < 1:
+            raise ValueError(f"Injector queue size must be at least 1, got {capacity}.")
+        self.backend = backend
+        self.capacity = capacity
+        self.queue = deque()
+        self.releases = deque()
+        self.pending_presses = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.busy = False
+        self.keyboard = InjectedKeyboard(self, KEYBOARD)
+        self.mouse = InjectedMouse(self, MOUSE)
+        self.output = OutputState()
+        self.tracer = None
+        self.posted = self.merged = self.dropped = self.injected = self.max_depth = 0
+
+    @property
+    def depth(self):
+        return len(self.queue) + len(self.releases)
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'posted': self.posted,
+            'merged': self.merged,
+            'dropped': self.dropped,
+            'injected': self.injected,
+            'suppressed': self.output.suppressed,
+            'held': len(self.output.held)
+        }
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="injector", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stops the thread after it has performed every command that is still queued.
+        """
+        if not self.running:
+            return
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        self.thread = None
+
+    def wait_idle(self, timeout=1.0):
+        """
+        Blocks until every posted command has been performed, e.g. to timestamp the last output.
+
+        Returns:
+            bool: False if the queue did not drain within `timeout` seconds.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not (self.busy or self.queue or self.releases), timeout)
+
+    def release_all(self):
+        """
+        Releases every key and button still held, e.g. when the mapper exits.
+        """
+        for device, key in self.output.take_held():
+            self.post(RELEASE, device, key)
+
+    def press_combination(self, keys):
+        """
+        Presses `keys` in order and releases them in reverse as one batch.
+
+        Args:
+            keys (list): (device, key) pairs, where device is KEYBOARD or MOUSE.
+        """
+        output = self.output
+        held = dict(output.held)
+        commands = [(PRESS, device, key, None) for device, key in keys if output.press(device, key)]
+        commands.extend((RELEASE, device, key, None) for device, key in reversed(keys) if output.release(device, key))
+        if commands and not self.post(BATCH, None, tuple(commands)):
+            # Only a batch without releases is ever dropped; none of its presses happened.
+            output.held = held
+
+    def post(self, op, device, a=None, b=None):
+        """
+        Performs the command on the thread, or inline while it is not started.
+
+        Returns:
+            bool: False if the command was dropped because the queue was full.
+        """
+        if not self.running:
+            self._perform((op, device, a, b))
+            self.injected += 1
+            return True
+        with self.condition:
+            self.posted += 1
+            queue = self.queue
+            if op == RELEASE:
+                if self.pending_presses:
+                    queue.append((op, device, a, b))
+                else:
+                    self.releases.append((op, device, a, b))
+            elif (op == MOVE or op == SCROLL) and queue and queue[-1][0] == op:
+                _, _, x, y = queue[-1]
+                queue[-1] = (op, device, x + a, y + b)
+                self.merged += 1
+                return True
+            elif len(queue) >= self.capacity and not (op == BATCH and any(command[0] == RELEASE for command in a)):
+                self.dropped += 1
+                return False
+            else:
+                queue.append((op, device, a, b))
+                if op == PRESS or op == BATCH:
+                    self.pending_presses += 1
+            depth = len(queue) + len(self.releases)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self.condition.notify_all()
+        return True
+
+    def _run(self):
+        condition = self.condition
+        while True:
+            with condition:
+                while self.running and not self.releases and not self.queue:
+                    condition.wait()
+                if self.releases:
+                    command = self.releases.popleft()
+                elif self.queue:
+                    command = self.queue.popleft()
+                    if command[0] == PRESS or command[0] == BATCH:
+                        self.pending_presses -= 1
+                else:
+                    return
+                self.busy = True
+            try:
+                self._perform(command)
+            except Exception as e:
+                logging.error(f"Failed to inject {command}: {e}")
+            self.injected += 1
+            with condition:
+                self.busy = False
+                if not self.queue and not self.releases:
+                    condition.notify_all()
+
+    def _perform(self, command):
+        tracer = self.tracer
+        if tracer is None:
+            self._execute(command)
+            return
+        start = perf_counter_ns()
+        try:
+            self._execute(command)
+        finally:
+            tracer.record(INJECT, perf_counter_ns() - start)
+
+    def _execute(self, command):
+        op, device, a, b = command
+        backend = self.backend
+        if op == PRESS:
+            backend.press(device, a)
+        elif op == RELEASE:
+            backend.release(device, a)
+        elif op == MOVE:
+            backend.move(a, b)
+        elif op == SCROLL:
+            backend.scroll(a, b)
+        else:
+            backend.emit(a)
+
+class InjectedKeyboard:
+    __slots__ = ('injector', 'device')
+
+    def __init__(self, injector, device):
+        self.injector = injector
+        self.device = device
+
+    def press(self, key):
+        output = self.injector.output
+        if output.is_held(key):
+            output.suppressed += 1
+        elif self.injector.post(PRESS, self.device, key):
+            output.press(self.device, key)
+
+    def release(self, key):
+        if self.injector.output.release(self.device, key):
+            self.injector.post(RELEASE, self.device, key)
+
+class InjectedMouse(InjectedKeyboard):
+    __slots__ = ()
+
+    def move(self, dx, dy):
+        self.injector.post(MOVE, self.device, dx, dy)
+
+    def scroll(self, dx, dy):
+        self.injector.post(SCROLL, self.device, dx, dy)
@@ -0,0 +1,293 @@
+"""
+Input sources for the controller loop.
+
+A source is called like an event pump, `source(max_timeout_ms)`, and returns a list of
+pygame joystick events. `finished` turns True once a finite source has nothing left.
+Sources that wait for input set `woke_ns` to the `perf_counter_ns` time the wait ended,
+so stage tracing does not count the idle time as pump latency.
+
+    pygame: the real controllers through the SDL queue (see event_loop.create_event_pump).
+    scripted: a synthetic controller that generates button and axis streams at a chosen rate,
+        with sensor noise and 16-bit quantization like real hardware. It needs no device or
+        display, so the whole engine can run headless for tests and benchmarks.
+"""
+import logging
+import random
+from math import pi, sin
+from time import perf_counter, perf_counter_ns, sleep
+
+from event_loop import create_event_pump
+from lazy_imports import lazy_module
+
+pg = lazy_module('pygame')
+
+DEFAULT_SCRIPTED_SOURCE = {
+    "rate_hz": 1000,
+    "buttons": [0, 1, 2, 3],
+    "axes": [0, 1, 2, 3, 4, 5],
+    "trigger_axes": [4, 5],
+    "hats": [0],
+    "hat_rate_hz": 1.0,
+    "hotplug_interval_s": None,
+    "noise": 0.01,
+    "press_rate_hz": 2.0,
+    "hold_s": [0.05, 0.3],
+    "duration_s": None,
+    "max_events": None,
+    "seed": None,
+    "realtime": True
+}
+
+RAW_SCALE = 32767.0
+
+class PygameSource:
+    name = 'pygame'
+
+    def __init__(self, config):
+        self.pump = create_event_pump(config)
+        self.finished = False
+        self.controller = None
+
+    @property
+    def woke_ns(self):
+        return getattr(self.pump, 'woke_ns', 0)
+
+    def __call__(self, max_timeout_ms=None):
+        return self.pump(max_timeout_ms)
+
+class SyntheticController:
+    """
+    Stands in for a `pg.joystick.Joystick` where the loop needs a controller object.
+    """
+    def __init__(self, name="Scripted Controller", instance_id=0, axes=6, buttons=16):
+        self.name = name
+        self.instance_id = instance_id
+        self.axes = axes
+        self.buttons = buttons
+
+    def init(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def get_name(self):
+        return self.name
+
+    def get_instance_id(self):
+        return self.instance_id
+
+    def get_numaxes(self):
+        return self.axes
+
+    def get_numbuttons(self):
+        return self.buttons
+
+class ScriptedSource:
+    """
+    Synthetic controller events at `rate_hz`.
+
+    Sticks sweep slowly and rest at the centre about half of the time, triggers rest fully
+    released, and every reading carries Gaussian `noise` before being quantized to 16 bits.
+    Buttons are pressed about `press_rate_hz` times per second each and held for a random
+    time within `hold_s`, and hats change direction about `hat_rate_hz` times per second. With
+    `hotplug_interval_s` the controller is unplugged and plugged back in at that interval,
+    coming back with a new instance id like a real device. With `realtime` the events arrive
+    on the wall clock; otherwise each call returns the next millisecond of events immediately,
+    as fast as the loop can take them.
+
+    Attributes:
+        generated (int): Events generated so far.
+        t (float): Simulated time of the next event, in seconds.
+    """
+    name = 'scripted'
+
+    def __init__(self, rate_hz=1000, buttons=(0, 1, 2, 3), axes=(0, 1, 2, 3, 4, 5), trigger_axes=(4, 5),
+                 hats=(0,), hat_rate_hz=1.0, hotplug_interval_s=None, noise=0.01, press_rate_hz=2.0,
+                 hold_s=(0.05, 0.3), duration_s=None, max_events=None, seed=None, realtime=True, instance_id=0):
+        if rate_hz <= 0:
+            raise ValueError(f"Scripted source rate must be positive, got {rate_hz}.")
+        self.interval = 1.0 / rate_hz
+        self.batch = max(1, int(rate_hz / 1000))
+        self.buttons = list(buttons)
+        self.axes = list(axes)
+        self.trigger_axes = set(trigger_axes)
+        self.hats = list(hats)
+        self.hat_rate_hz = float(hat_rate_hz)
+        self.hotplug_interval_s = hotplug_interval_s
+        self.noise = float(noise)
+        self.press_rate_hz = float(press_rate_hz)
+        self.hold_s = tuple(hold_s)
+        self.duration_s = duration_s
+        self.max_events = max_events
+        self.realtime = realtime
+        self.instance_id = instance_id
+        self.random = random.Random(seed)
+        self.controller = SyntheticController(instance_id=instance_id, axes=max(self.axes, default=-1) + 1,
+                                              buttons=max(self.buttons, default=-1) + 1)
+        # Per axis: (sweep frequency, rest/active envelope frequency, phase)
+        self.axis_waves = {axis: (self.random.uniform(0.2, 1.0), self.random.uniform(0.1, 0.3),
+                                  self.random.uniform(0, 2 * pi)) for axis in self.axes}
+        self.held = set()
+        self.next_toggle = {button: self._next_press(0.0) for button in self.buttons}
+        self.next_hat = {hat: self._next_change(0.0, self.hat_rate_hz) for hat in self.hats}
+        self.next_hotplug = hotplug_interval_s if hotplug_interval_s else float('inf')
+        self.hotplugs = 0
+        self.next_axis = 0
+        self.generated = 0
+        self.t = 0.0
+        self.start = None
+        self.woke_ns = 0
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """
+        Builds the source from config['input']['scripted'] (see DEFAULT_SCRIPTED_SOURCE),
+        with keyword overrides, e.g. from the command line, taking precedence.
+        """
+        settings = dict(DEFAULT_SCRIPTED_SOURCE)
+        settings.update(config.get('input', {}).get('scripted', {}) if config else {})
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**settings)
+
+    @property
+    def finished(self):
+        if self.max_events is not None and self.generated >= self.max_events:
+            return True
+        return self.duration_s is not None and self.t >= self.duration_s
+
+    def _next_change(self, t, rate_hz):
+        return t + self.random.expovariate(rate_hz) if rate_hz > 0 else float('inf')
+
+    def _next_press(self, t):
+        return self._next_change(t, self.press_rate_hz)
+
+    def axis_value(self, axis, t):
+        sweep_hz, envelope_hz, phase = self.axis_waves[axis]
+        envelope = max(0.0, sin(2 * pi * envelope_hz * t + phase))
+        if axis in self.trigger_axes:
+            value = -1.0 + 2.0 * envelope
+        else:
+            value = envelope * sin(2 * pi * sweep_hz * t + phase)
+        value += self.random.gauss(0.0, self.noise)
+        value = max(-1.0, min(1.0, value))
+        return round(value * RAW_SCALE) / RAW_SCALE
+
+    def next_event(self):
+        """
+        Generates the event at the current simulated time and advances the clock.
+        """
+        t = self.t
+        self.t = t + self.interval
+        self.generated += 1
+        instance_id = self.instance_id
+        if self.next_hotplug <= t:
+            if self.controller.instance_id == instance_id:
+                # Unplug now, plug back in with the next event.
+                self.controller.instance_id = instance_id + 1
+                return pg.event.Event(pg.JOYDEVICEREMOVED, instance_id=instance_id)
+            self.instance_id += 1
+            self.hotplugs += 1
+            self.next_hotplug = t + self.hotplug_interval_s
+            self.held.clear()
+            return pg.event.Event(pg.JOYDEVICEADDED, device_index=0, instance_id=self.instance_id,
+                                  guid=f"scripted-{self.instance_id}")
+        for hat in self.hats:
+            if self.next_hat[hat] <= t:
+                self.next_hat[hat] = self._next_change(t, self.hat_rate_hz)
+                # Back to centre half of the time, otherwise one of the eight directions.
+                value = (0, 0) if self.random.random() < 0.5 else self.random.choice(
+                    [(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if x or y])
+                return pg.event.Event(pg.JOYHATMOTION, instance_id=instance_id, joy=instance_id, hat=hat, value=value)
+        for button in self.buttons:
+            if self.next_toggle[button] <= t:
+                if button in self.held:
+                    self.held.discard(button)
+                    self.next_toggle[button] = self._next_press(t)
+                    return pg.event.Event(pg.JOYBUTTONUP, instance_id=self.instance_id, joy=self.instance_id, button=button)
+                self.held.add(button)
+                self.next_toggle[button] = t + self.random.uniform(*self.hold_s)
+                return pg.event.Event(pg.JOYBUTTONDOWN, instance_id=self.instance_id, joy=self.instance_id, button=button)
+        axis = self.axes[self.next_axis]
+        self.next_axis = (self.next_axis + 1) % len(self.axes)
+        return pg.event.Event(pg.JOYAXISMOTION, instance_id=self.instance_id, joy=self.instance_id,
+                              axis=axis, value=self.axis_value(axis, t))
+
+    def __call__(self, max_timeout_ms=None):
+        if self.finished:
+            return []
+        if not self.realtime:
+            events = []
+            while len(events) < self.batch and not self.finished:
+                events.append(self.next_event())
+            return events
+        now = perf_counter()
+        if self.start is None:
+            self.start = now
+        elapsed = now - self.start
+        if self.t > elapsed:
+            wait = self.t - elapsed
+            if max_timeout_ms is not None:
+                wait = min(wait, max_timeout_ms / 1000.0)
+            if wait > 0:
+                sleep(wait)
+                self.woke_ns = perf_counter_ns()
+            elapsed = perf_counter() - self.start
+        events = []
+        while self.t <= elapsed and not self.finished:
+            events.append(self.next_event())
+        return events
+
+class TimeLimitedSource:
+    """
+    Wraps another source and reports it finished once `duration_s` seconds have passed since
+    the first call, e.g. for unattended profile runs.
+    """
+    def __init__(self, source, duration_s):
+        self.source = source
+        self.duration_s = duration_s
+        self.controller = source.controller
+        self.name = getattr(source, 'name', None)
+        self.deadline = None
+
+    @property
+    def finished(self):
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            return True
+        return self.source.finished
+
+    @property
+    def woke_ns(self):
+        return getattr(self.source, 'woke_ns', 0)
+
+    def __call__(self, max_timeout_ms=None):
+        if self.deadline is None:
+            self.deadline = perf_counter() + self.duration_s
+        return self.source(max_timeout_ms)
+
+INPUT_SOURCES = ('pygame', 'scripted')
+
+def get_source_name(config, name=None):
+    """
+    Returns `name`, or else config['input']['source'], or else "pygame".
+    """
+    return name or (config.get('input', {}).get('source') if config else None) or 'pygame'
+
+def make_input_source(config, name=None, **overrides):
+    """
+    Builds the input source named by `name` or config['input']['source'] (default "pygame").
+
+    Raises:
+        ValueError: If the source is unknown or its settings are invalid.
+    """
+    name = get_source_name(config, name)
+    if name == 'pygame':
+        return PygameSource(config)
+    if name == 'scripted':
+        try:
+            source = ScriptedSource.from_config(config, **overrides)
+        except TypeError as e:
+            raise ValueError(f"Invalid scripted source settings: {e}") from e
+        logging.info(f"Input source: scripted controller at {1.0 / source.interval:.0f} events/s.")
+        return source
+    raise ValueError(f"Unknown input source '{name}'. Choose from {', '.join(INPUT_SOURCES)}.")
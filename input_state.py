@@ -0,0 +1,130 @@
+"""
+Compact controller state for the input loop.
+
+Buttons are kept as integer bitmasks so press/release edges come from a single
+XOR against the state at the last dispatch, and axes live in a fixed-size
+`array('d')`. Every update is O(1) no matter how many buttons the pad has.
+"""
+from array import array
+
+MAX_BUTTONS = 32
+MAX_AXES = 8
+
+def iter_bits(mask):
+    """
+    Yields the index of every set bit in `mask`, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class InputState:
+    """
+    State shared by `handle_controller_events` and `execute_profile_actions`.
+
+    Attributes:
+        events (list): Events fetched by the last pump.
+        connected_controllers (dict): Instance id -> GUID of the controllers that are plugged in.
+        buttons (int): Bitmask of buttons that are currently down.
+        previous_buttons (int): Bitmask of buttons as of the last dispatch.
+        tapped_buttons (int): Buttons pressed and released again before they were dispatched.
+        axes (array): Latest normalized value per axis.
+        raw_axes (array): Stick axis values before the stick deadzone and curve are applied to the pair.
+        previous_axes (array): Axis values as of the last dispatch.
+        dirty_axes (int): Bitmask of axes updated since the last dispatch.
+        latched_axes (int): Bitmask of one-shot axes (triggers) that already fired.
+        suppressed_buttons (int): Buttons held across a profile switch. They belong to the previous
+            profile, so their release is not dispatched to the new one.
+        suppressed_axes (int): Axes deflected across a profile switch; ignored until they are back at zero.
+        axis_events (int): Axis events received since start.
+        coalesced_axis_events (int): Axis events dropped because a newer value for the same axis was in the batch.
+        event_counts (dict): Events received per pygame event type, axis events before coalescing.
+        iterations (int): Input loop iterations.
+    """
+    __slots__ = ('events', 'connected_controllers', 'buttons', 'previous_buttons', 'tapped_buttons',
+                 'axes', 'raw_axes', 'previous_axes', 'dirty_axes', 'latched_axes', 'suppressed_buttons', 'suppressed_axes',
+                 'axis_events', 'coalesced_axis_events', 'event_counts', 'iterations')
+
+    def __init__(self, axis_count=MAX_AXES):
+        self.events = []
+        self.connected_controllers = {}
+        self.buttons = 0
+        self.previous_buttons = 0
+        self.tapped_buttons = 0
+        self.axes = array('d', [0.0]) * axis_count
+        self.raw_axes = array('d', [0.0]) * axis_count
+        self.previous_axes = array('d', [0.0]) * axis_count
+        self.dirty_axes = 0
+        self.latched_axes = 0
+        self.suppressed_buttons = 0
+        self.suppressed_axes = 0
+        self.axis_events = 0
+        self.coalesced_axis_events = 0
+        self.event_counts = {}
+        self.iterations = 0
+
+    def press_button(self, button):
+        self.buttons |= 1 << button
+
+    def release_button(self, button):
+        bit = 1 << button
+        if self.buttons & bit and not self.previous_buttons & bit:
+            # Down and up inside one batch: still dispatch the press and the release.
+            self.tapped_buttons |= bit
+        self.buttons &= ~bit
+
+    def set_axis(self, axis, value):
+        """
+        Stores the latest value for an axis. Returns False for axes outside the fixed range.
+        """
+        if axis >= len(self.axes):
+            return False
+        self.axes[axis] = value
+        self.dirty_axes |= 1 << axis
+        return True
+
+    @property
+    def held_buttons(self):
+        return self.buttons & self.previous_buttons
+
+    def has_changes(self):
+        return bool((self.buttons ^ self.previous_buttons) | self.tapped_buttons | self.dirty_axes)
+
+    def take_button_edges(self):
+        """
+        Returns (pressed, released) bitmasks since the last dispatch and marks them as dispatched.
+        Tapped buttons show up in both masks; dispatch presses before releases. A button tapped and
+        pressed again in the same batch ends it down, so it only shows up as pressed.
+        """
+        changed = self.buttons ^ self.previous_buttons
+        pressed = (changed & self.buttons) | self.tapped_buttons
+        released = (changed & self.previous_buttons) | (self.tapped_buttons & ~self.buttons)
+        self.previous_buttons = self.buttons
+        self.tapped_buttons = 0
+        return pressed, released
+
+    def suppress_held_inputs(self):
+        """
+        Marks every button that is down and every axis that is deflected as held across a profile
+        switch, and takes the pending axis updates, which belong to the previous profile.
+        """
+        self.suppressed_buttons = self.buttons
+        suppressed = 0
+        axes = self.axes
+        previous_axes = self.previous_axes
+        for axis in range(len(axes)):
+            previous_axes[axis] = axes[axis]
+            if axes[axis] != 0.0:
+                suppressed |= 1 << axis
+        self.suppressed_axes = suppressed
+        self.latched_axes = 0
+        self.dirty_axes = 0
+
+    def take_dirty_axes(self):
+        """
+        Returns the bitmask of axes updated since the last dispatch and clears it.
+        """
+        dirty = self.dirty_axes
+        self.dirty_axes = 0
+        return dirty
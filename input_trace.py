@@ -0,0 +1,264 @@
+"""
+Binary controller input traces.
+
+A trace is a small header followed by one fixed-size record per event:
+
+    header: magic b'CMTR', version (u16), flags (u16), start time (perf_counter_ns, u64)
+    record: timestamp (ns since start, u64), device (u16), type (u8), index (u8), value (f32)
+
+Records are packed on the caller's thread into a buffer, and full buffers are written by
+a background thread, optionally gzip-compressed. Readers detect compression by itself, and
+`TraceSource` replays a trace as an input source, in real time or as fast as possible.
+"""
+import gzip
+import logging
+import queue
+import struct
+import threading
+from time import perf_counter, perf_counter_ns, sleep
+
+from lazy_imports import lazy_module
+
+pg = lazy_module('pygame')
+
+MAGIC = b'CMTR'
+VERSION = 1
+FLAG_COMPRESSED = 1
+HEADER = struct.Struct('<4sHHQ')
+RECORD = struct.Struct('<QHBBf')
+BUFFER_SIZE = 64 * 1024
+
+AXIS = 0
+BUTTON_DOWN = 1
+BUTTON_UP = 2
+HAT = 3
+DEVICE_ADDED = 4
+DEVICE_REMOVED = 5
+
+# pygame event type -> trace type, filled in on first use so importing this module does not import pygame.
+EVENT_TYPES = {}
+
+def load_event_types():
+    if not EVENT_TYPES:
+        EVENT_TYPES.update({
+            pg.JOYAXISMOTION: AXIS,
+            pg.JOYBUTTONDOWN: BUTTON_DOWN,
+            pg.JOYBUTTONUP: BUTTON_UP,
+            pg.JOYHATMOTION: HAT,
+            pg.JOYDEVICEADDED: DEVICE_ADDED,
+            pg.JOYDEVICEREMOVED: DEVICE_REMOVED
+        })
+    return EVENT_TYPES
+
+def get_instance_id(event):
+    """
+    Instance id of the controller a JOYDEVICEADDED event announces. SDL only reports the device
+    index there; the instance id is what later events and JOYDEVICEREMOVED refer to.
+    """
+    instance_id = getattr(event, 'instance_id', None)
+    if instance_id is not None:
+        return instance_id
+    try:
+        return pg.joystick.Joystick(event.device_index).get_instance_id()
+    except pg.error:
+        return event.device_index
+
+def encode_event(event):
+    """
+    Returns:
+        tuple | None: (device, type, index, value) for a joystick event, None for anything else.
+    """
+    event_type = (EVENT_TYPES or load_event_types()).get(event.type)
+    if event_type == AXIS:
+        return event.instance_id, AXIS, event.axis, event.value
+    if event_type == BUTTON_DOWN or event_type == BUTTON_UP:
+        return event.instance_id, event_type, event.button, 1.0 if event_type == BUTTON_DOWN else 0.0
+    if event_type == HAT:
+        x, y = event.value
+        return event.instance_id, HAT, event.hat, float((x + 1) * 3 + (y + 1))
+    if event_type == DEVICE_ADDED:
+        # By instance id like every other event, so it pairs with the DEVICE_REMOVED on replay.
+        return get_instance_id(event), DEVICE_ADDED, 0, 0.0
+    if event_type == DEVICE_REMOVED:
+        return event.instance_id, DEVICE_REMOVED, 0, 0.0
+    return None
+
+def decode_event(device, event_type, index, value):
+    if event_type == AXIS:
+        return pg.event.Event(pg.JOYAXISMOTION, instance_id=device, joy=device, axis=index, value=value)
+    if event_type == BUTTON_DOWN:
+        return pg.event.Event(pg.JOYBUTTONDOWN, instance_id=device, joy=device, button=index)
+    if event_type == BUTTON_UP:
+        return pg.event.Event(pg.JOYBUTTONUP, instance_id=device, joy=device, button=index)
+    if event_type == HAT:
+        code = int(value)
+        return pg.event.Event(pg.JOYHATMOTION, instance_id=device, joy=device, hat=index,
+                              value=(code // 3 - 1, code % 3 - 1))
+    if event_type == DEVICE_ADDED:
+        return pg.event.Event(pg.JOYDEVICEADDED, device_index=device, instance_id=device, guid='trace')
+    if event_type == DEVICE_REMOVED:
+        return pg.event.Event(pg.JOYDEVICEREMOVED, instance_id=device)
+    raise ValueError(f"Unknown trace event type {event_type}.")
+
+class TraceWriter:
+    """
+    Writes a trace. Use as a context manager, or call `close` to flush the last buffer.
+
+    Attributes:
+        records (int): Events written so far.
+    """
+    def __init__(self, path, compress=False, start_ns=None, buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.start_ns = perf_counter_ns() if start_ns is None else start_ns
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.records = 0
+        self.file = gzip.open(path, 'wb') if compress else open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, FLAG_COMPRESSED if compress else 0, self.start_ns))
+        self.chunks = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, timestamp_ns, device, event_type, index, value):
+        self.buffer += RECORD.pack(timestamp_ns - self.start_ns, device, event_type, index, value)
+        self.records += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.chunks.put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def write_event(self, timestamp_ns, event):
+        """
+        Records a pygame joystick event; other events are skipped.
+
+        Returns:
+            bool: Whether the event was recorded.
+        """
+        encoded = encode_event(event)
+        if encoded is None:
+            return False
+        self.write(timestamp_ns, *encoded)
+        return True
+
+    def close(self):
+        if self.file is None:
+            return
+        if self.buffer:
+            self.chunks.put(bytes(self.buffer))
+            self.buffer.clear()
+        self.chunks.put(None)
+        self.thread.join()
+        self.file.close()
+        self.file = None
+
+    def _run(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            try:
+                self.file.write(chunk)
+            except OSError as e:
+                logging.error(f"Failed to write trace {self.path}: {e}")
+
+def open_trace(path):
+    """
+    Opens a trace for reading, compressed or not.
+
+    Returns:
+        tuple: (file, start_ns)
+
+    Raises:
+        ValueError: If the file is not a trace or has an unsupported version.
+    """
+    with open(path, 'rb') as file:
+        compressed = file.read(2) == b'\x1f\x8b'
+    file = gzip.open(path, 'rb') if compressed else open(path, 'rb')
+    header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        file.close()
+        raise ValueError(f"{path} is not a controller trace.")
+    magic, version, flags, start_ns = HEADER.unpack(header)
+    if magic != MAGIC:
+        file.close()
+        raise ValueError(f"{path} is not a controller trace.")
+    if version != VERSION:
+        file.close()
+        raise ValueError(f"Unsupported trace version {version} in {path}.")
+    return file, start_ns
+
+def read_trace(path):
+    """
+    Yields (timestamp_ns, device, type, index, value) for every record, timestamps relative to the start.
+    """
+    file, _ = open_trace(path)
+    with file:
+        while True:
+            data = file.read(RECORD.size * 4096)
+            if not data:
+                return
+            usable = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:usable])
+
+class TraceSource:
+    """
+    Replays a trace as an input source (see input_sources.py).
+
+    With `realtime` events come back on the recorded timing, scaled by `speed`; otherwise
+    each call returns the next millisecond of the trace immediately.
+
+    Attributes:
+        replayed (int): Events returned so far.
+    """
+    name = 'replay'
+
+    def __init__(self, path, realtime=True, speed=1.0, batch_ns=1_000_000):
+        if speed <= 0:
+            raise ValueError(f"Replay speed must be positive, got {speed}.")
+        self.records = read_trace(path)
+        self.realtime = realtime
+        self.speed = float(speed)
+        self.batch_ns = batch_ns
+        self.pending = next(self.records, None)
+        self.controller = None
+        self.replayed = 0
+        self.start = None
+        self.woke_ns = 0
+
+    @property
+    def finished(self):
+        return self.pending is None
+
+    def _take_until(self, until_ns):
+        events = []
+        records = self.records
+        record = self.pending
+        while record is not None and record[0] <= until_ns:
+            events.append(decode_event(*record[1:]))
+            record = next(records, None)
+        self.pending = record
+        self.replayed += len(events)
+        return events
+
+    def __call__(self, max_timeout_ms=None):
+        if self.pending is None:
+            return []
+        if not self.realtime:
+            return self._take_until(self.pending[0] + self.batch_ns)
+        now = perf_counter()
+        if self.start is None:
+            self.start = now
+        elapsed_ns = (now - self.start) * self.speed * 1e9
+        wait = (self.pending[0] - elapsed_ns) / self.speed / 1e9
+        if wait > 0:
+            if max_timeout_ms is not None:
+                wait = min(wait, max_timeout_ms / 1000.0)
+            sleep(wait)
+            self.woke_ns = perf_counter_ns()
+            elapsed_ns = (perf_counter() - self.start) * self.speed * 1e9
+        return self._take_until(elapsed_ns)
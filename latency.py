@@ -0,0 +1,30 @@
+"""
+Latency summaries for benchmarks.
+"""
+from math import ceil
+
+def percentile(sorted_samples, q):
+    """
+    Nearest-rank percentile of an already sorted list, `q` in [0, 100].
+    """
+    if not sorted_samples:
+        return 0
+    rank = max(0, min(len(sorted_samples) - 1, ceil(q / 100.0 * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+def summarize_latencies(samples_ns):
+    """
+    Returns:
+        dict: count plus p50/p95/p99/max/mean in microseconds.
+    """
+    samples = sorted(samples_ns)
+    if not samples:
+        return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0, 'mean': 0.0}
+    return {
+        'count': len(samples),
+        'p50': round(percentile(samples, 50) / 1000.0, 2),
+        'p95': round(percentile(samples, 95) / 1000.0, 2),
+        'p99': round(percentile(samples, 99) / 1000.0, 2),
+        'max': round(samples[-1] / 1000.0, 2),
+        'mean': round(sum(samples) / len(samples) / 1000.0, 2)
+    }
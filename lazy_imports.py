@@ -0,0 +1,77 @@
+"""
+Deferred imports for the heavy and optional dependencies.
+
+pygame, pynput and pync together cost a few hundred milliseconds to import and some of
+them talk to the display as they do. Subcommands that only edit the config never need them,
+so they are imported on first use instead:
+
+    pg = lazy_module('pygame')               # imported on the first `pg.<attribute>`
+    Key = lazy_attribute('pynput.keyboard', 'Key')  # imported on the first `Key.<attribute>`
+
+Both fail with the usual ImportError at the point of first use, not at startup.
+"""
+import importlib
+import importlib.util
+import sys
+
+def lazy_module(name):
+    """
+    Returns module `name`, executed only when one of its attributes is first accessed.
+
+    The module is registered in sys.modules right away, so a later `import name` elsewhere
+    gets the same (still lazy) module. An already imported module is returned as is.
+
+    Raises:
+        ImportError: If the module cannot be found.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+def load_module(module):
+    """
+    Executes a lazy module now if it has not run yet, e.g. so its import does not land in a
+    measurement. Any other module is returned unchanged.
+    """
+    getattr(module, '__name__')
+    return module
+
+class LazyAttribute:
+    """
+    Stands in for `module.name` until it is used. Attribute lookups are forwarded to the real
+    object, which is imported on the first one; every attribute is cached on the stand-in
+    after its first lookup, so repeated `Key.ctrl` lookups cost a plain attribute read.
+    """
+    def __init__(self, module, name):
+        self.__dict__['_lazy_target'] = (module, name, None)
+
+    def _resolve(self):
+        module, name, target = self.__dict__['_lazy_target']
+        if target is None:
+            target = getattr(importlib.import_module(module), name)
+            self.__dict__['_lazy_target'] = (module, name, target)
+        return target
+
+    def __getattr__(self, attribute):
+        value = getattr(self._resolve(), attribute)
+        self.__dict__[attribute] = value
+        return value
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        module, name, target = self.__dict__['_lazy_target']
+        return repr(target) if target is not None else f"<lazy {module}.{name}>"
+
+def lazy_attribute(module, name):
+    return LazyAttribute(module, name)
@@ -6,18 +6,40 @@ sys.path.append('/Users/jwink/Documents/GitHub/transcriber')
 
 import json
 import logging
-import select
+import contextlib
+import signal
+import threading
 import argparse
-import pygame as pg
-from time import sleep, time
-from pynput.keyboard import Key, Controller as KeyboardController
-from pynput.mouse import Button, Controller as MouseController
-import pyautogui as mouse
-from pync import Notifier  # For Mac notifications
-import subprocess
-import asyncio
-from listen import collect_audio_once, initialize_audio_stream, initialize_vad
-from send_keys import send_keys, print_text
+from time import perf_counter, perf_counter_ns, sleep, time
+from lazy_imports import lazy_attribute, lazy_module, load_module
+from event_loop import coalesce_axis_events, create_event_pump, get_loop_settings, poll_events
+from input_sources import (INPUT_SOURCES, ScriptedSource, SyntheticController, TimeLimitedSource, get_source_name,
+                           make_input_source)
+from input_trace import TraceSource, TraceWriter, get_instance_id
+from output_backends import BACKENDS, NullBackend, RecordingBackend
+from soak import SoakMonitor
+from profiling import DEFAULT_PROFILE_OUTPUT, ProfileSession
+from latency import summarize_latencies
+from scheduler import TickScheduler
+from motion import MouseMotion, ScrollMotion
+from injector import Injector
+from diagnostics import DEFAULT_DIAGNOSTICS, Diagnostics, install_diagnostics
+from tracing import DISPATCH, HANDLE, PUMP, StageTracer
+from metrics import EXPORTERS, MetricsRegistry, counter, gauge, get_metrics_settings, make_exporter
+from output_backends import make_backend
+from filters import ExponentialMovingAverage, MovingAverage, compile_filters, filter_axis, make_filter
+from input_state import MAX_AXES, MAX_BUTTONS, InputState, iter_bits
+from calibration import (apply_deadzone, calculate_axis_value, calibration_key, compile_calibration, evaluate_axis,
+                         get_compiled_calibration, normalize_joystick_value, normalize_trigger_value_to_1,
+                         pack_tables, restrict_joystic_value, restrict_trigger_value_to_1, unpack_tables)
+from config_cache import get_snapshot_path, load_with_snapshot, loads_json
+from persistence import WriteBehind
+
+# pygame, pynput and pync are imported on first use, so config-only commands never load them.
+pg = lazy_module('pygame')
+Key = lazy_attribute('pynput.keyboard', 'Key')
+Button = lazy_attribute('pynput.mouse', 'Button')
+Notifier = lazy_attribute('pync', 'Notifier')  # For Mac notifications
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,34 +48,51 @@ CONFIG_PATH = 'config.json'
 CURRENT_PROFILE_INDEX = 0
 LAYOUT_PATH = 'layout__ps4.json'
 MAPPINGS_PATH = 'mappings.json'
+TRACE_PATH = 'controller.trace'
 
 #memory
 
-# Initialize controllers
-keyboard = KeyboardController()
-mouse = MouseController()
+# Initialize controllers. Output goes through the injector, which performs it on its own
+# thread while `run` is active and inline otherwise, on the backend set in config['output'].
+# It starts on the null backend: `configure_output` installs the configured one (pynput by
+# default) when monitoring starts, so commands that never send output never import pynput.
+INJECTOR = Injector(NullBackend())
+keyboard = INJECTOR.keyboard
+mouse = INJECTOR.mouse
 controller = None
 is_inputs_paused = False
+TRACER = None
+PROFILE_SWITCHES = 0
+DIAGNOSTICS = Diagnostics()
+# Config, layout and mapping files are written behind, atomically, off the input loop.
+PERSISTENCE = WriteBehind()
 
 def load_json(file_path) -> dict | bool:
     try:
-        with open(file_path, 'r') as file:
-            contents = json.load(file)
-            print(f"Loaded {file_path}")
-            print(contents)
+        with open(file_path, 'rb') as file:
+            contents = loads_json(file.read())
+            logging.debug("Loaded %s", file_path)
             return contents
     except Exception as e:
         logging.error(f"Failed to load {file_path}: {e}")
         return False
 
 def save_json(data, file_path):
-    with open(file_path, 'w') as file:
-        json.dump(data, file, indent=4)
+    """
+    Schedules `data` to be written to `file_path` by the PERSISTENCE writer and returns at once.
+    Call `PERSISTENCE.flush()` where the file must be on disk.
+    """
+    PERSISTENCE.save(file_path, data)
 
 def save_config(config, config_path) -> bool:
+    """
+    Schedules the config to be saved (see `save_json`). Write errors are logged by the writer.
+
+    Returns:
+        bool: Whether the save was scheduled.
+    """
     try:
-        with open(config_path, 'w') as file:
-            json.dump(config, file, indent=4)
+        save_json(config, config_path)
         return True
     except Exception as e:
         logging.error(f"Failed to save config: {e}")
@@ -92,54 +131,49 @@ def create_human_friendly_mappings(config, layout, mappings):
     save_json(human_friendly_mappings, MAPPINGS_PATH)
     print(f"Human-friendly mappings saved to {MAPPINGS_PATH}")
 
-def swap_to_next_profile():
+def notify_in_background(message, title):
     """
-    Does a profile swap, updates the config, and sends a notification.
+    Shows a notification without blocking the caller: pync waits for terminal-notifier to exit.
+    """
+    def notify():
+        try:
+            Notifier.notify(message, title=title)
+        except Exception as e:
+            logging.warning(f"Failed to show notification: {e}")
+    threading.Thread(target=notify, name="notify", daemon=True).start()
+
+def select_profile(config, index):
+    """
+    Makes profile `index` of `config` the current one and saves that behind the caller.
     """
-    config = load_json(CONFIG_PATH)
-    if not config:
-        logging.error("Failed to load configuration.")
-        return
-    
     global CURRENT_PROFILE_INDEX
-    print(CURRENT_PROFILE_INDEX)
+    CURRENT_PROFILE_INDEX = index
+    config['current_profile_index'] = index
+    config['current_profile'] = config['profiles'][index]['name']
+    save_config(config, CONFIG_PATH)
 
-
-    profiles = config['profiles']
-    print('profiles', profiles)
-    current_profile_index = config['current_profile_index']
-    print('current_profile_index', current_profile_index)
-    current_profile = config['current_profile']
-    print('current_profile', current_profile)
-    if not current_profile:
-        logging.error("No current profile set.")
+def swap_to_next_profile():
+    """
+    Switches to the next profile. Only CURRENT_PROFILE_INDEX changes: every profile was compiled
+    up front, so the switch takes effect on the next dispatch, and `execute_profile_actions`
+    hands the held inputs over (see `reconcile_profile_switch`). The in-memory config the
+    profiles were compiled from is updated and saved by the write-behind writer, and the
+    notification is shown from another thread, so nothing here waits on I/O.
+    """
+    global PROFILE_SWITCHES
+    count = len(COMPILED_PROFILES)
+    if not count or not ACTIVE_CONFIG:
+        logging.error("No profiles available to swap.")
+        notify_in_background("No profiles available to swap.", "Profile Switch")
         return
-
-    try:
-        current_index = CURRENT_PROFILE_INDEX
-        next_index = (current_index + 1) % len(profiles)
-        config['current_profile_index'] = next_index
-        config[current_profile] = profiles[next_index]['name']
-        CURRENT_PROFILE_INDEX = next_index
-
-        # print('profiles[next_index][name]', profiles[CURRENT_PROFILE_INDEX]['name'])
-        # print(f"config[] {config['profiles'][CURRENT_PROFILE_INDEX]}")
-        # print(f"CURRENT_PROFILE_KEY", CURRENT_PROFILE_INDEX)
-        if save_config(config, CONFIG_PATH):
-            Notifier.notify(f"Switched to profile: {profiles[CURRENT_PROFILE_INDEX]['name']}", title="Profile Switch")
-            logging.info(f"Switched to profile: {profiles[CURRENT_PROFILE_INDEX]['name']}")
-            
-            # Get button and axis actions for the new profile
-            new_profile = profiles[next_index]
-            # button_actions = new_profile.get('mappings', {}).get('buttons', {})
-            # axis_actions = new_profile.get('mappings', {}).get('axes', {})
-            
-            # Apply the new mappings
-            # apply_new_mappings(config, button_actions, axis_actions)
-        else:
-            logging.error("Failed to save profile change.")
-    except StopIteration:
-        logging.error("Current profile not found.")
+    previous_index = CURRENT_PROFILE_INDEX
+    next_index = (previous_index + 1) % count
+    select_profile(ACTIVE_CONFIG, next_index)
+    PROFILE_SWITCHES += 1
+    name = COMPILED_PROFILES[next_index]['name']
+    logging.debug("Swapped from profile %s to %s", previous_index, next_index)
+    logging.info(f"Switched to profile: {name}")
+    notify_in_background(f"Switched to profile: {name}", "Profile Switch")
 
 def apply_new_mappings(config, button_actions, axis_actions):
     """
@@ -180,39 +214,7 @@ def apply_new_mappings(config, button_actions, axis_actions):
         logging.info(f"Axis action set: {axis_index} -> {action}")
 
     set_profile_mappings(config['profiles'][CURRENT_PROFILE_INDEX], button_actions, axis_actions)
-
-def normalize_joystick_value(value, min_val, max_val):
-    if min_val == max_val:
-        logging.error("Min == Max, cannot normalize.")
-        return 0.0
-    normalized = 2 * (value - min_val) / (max_val - min_val) - 1
-    return restrict_joystic_value(normalized)
-
-def restrict_joystic_value(value):
-    """Restricts the joystick value to the range [-1, 1]."""
-    return max(-1.0, min(1.0, value))
-
-def normalize_trigger_value_to_1(value, min_val, max_val):
-    """
-    Normalize the trigger value to a range of [0, 1].
-    """
-    if min_val == max_val:
-        logging.error("Min == Max, cannot normalize.")
-        return 0.0
-    normalized = (value - min_val) / (max_val - min_val)
-    return restrict_trigger_value_to_1(normalized)
-
-def restrict_trigger_value_to_1(value):
-    """Restricts the trigger value to the range [0, 1]."""
-    return max(0.0, min(1.0, value))
-
-def apply_deadzone(value, deadzone):
-    """
-    Apply deadzone to the normalized axis value.
-    """
-    if abs(value) <= deadzone:
-        return 0.0
-    return value
+    compile_profiles(config)
 
 # def get_current_axis_value(axis, controller, config):
 #     """
@@ -249,27 +251,6 @@ def apply_deadzone(value, deadzone):
 #         logging.error("No active controller found. silly goose")
 #         return 0.0
 
-def calculate_axis_value(raw_value, axis, config):
-    # print(f"Axis {axis} raw value: {raw_value}")
-    #if axis is 4 or 5
-    if config and str(axis) in config['calibration']['axes']:
-
-        if axis in [4, 5]: #triggers
-            min_val = -1.0
-            max_val = 1.0
-            deadzone = 0.0
-            normalized = normalize_trigger_value_to_1(raw_value, min_val, max_val)
-            return apply_deadzone(normalized, deadzone)        
-        else: #joysticks
-            min_val = config['calibration']['axes'][str(axis)]['min']
-            max_val = config['calibration']['axes'][str(axis)]['max']
-            deadzone = config['calibration']['deadzone'].get(str(axis), 0.1)
-            normalized = normalize_joystick_value(raw_value, min_val, max_val)
-            return apply_deadzone(normalized, deadzone)
-    else:
-        logging.error("Failed to find axis for normalization in config.")
-        return raw_value
-
 def calibrate_axes(config, controller):
     """
     Calibrates the axes based on user input and updates the configuration file.
@@ -312,6 +293,7 @@ def calibrate_axes(config, controller):
 
     config['calibration']['axes'] = calibration_data
     config['calibration']['deadzone'] = deadzone_data
+    refresh_calibration(config)
 
     if save_config(config, CONFIG_PATH):
         print("Calibration successful and saved to config.json.")
@@ -354,11 +336,20 @@ def set_deadzone(axis):
     deadzone = input(f"Enter deadzone for axis {axis} (default {default_deadzone}): ").strip()
     return float(deadzone) if deadzone else default_deadzone
 
+def initialize_joystick_subsystem():
+    """
+    Initializes only the SDL subsystems the controller loop needs: the joystick, and video
+    because it owns SDL's event queue (no window is opened). `pg.init()` would also start
+    audio and everything else pygame offers.
+    """
+    pg.display.init()
+    pg.joystick.init()
+
 def initialize_pygame():
     """
     Initializes the Pygame library and detects connected controllers.
 
-    This function initializes the Pygame library and its joystick module. It then checks for connected 
+    This function initializes the Pygame joystick subsystem (see `initialize_joystick_subsystem`). It then checks for connected 
     controllers and initializes each detected controller. If no controllers are detected, a warning 
     message is logged.
 
@@ -366,8 +357,7 @@ def initialize_pygame():
         bool | pg.joystick.Joystick | list[pg.joystick.Joystick]: False if no controllers are detected, 
         a single controller if one controller is detected, or a list of controllers if multiple controllers are detected.
     """
-    pg.init()
-    pg.joystick.init()
+    initialize_joystick_subsystem()
     controller_count = pg.joystick.get_count()
     if controller_count == 0:
         logging.warning("No controllers detected. Please connect a controller.")
@@ -403,108 +393,124 @@ def initialize_controller(controller):
     logging.info(f"Initialize_controller: {controller.get_name()}")
     return controller
 
-def handle_controller_events(data, config):
+def handle_controller_events(state, config):
     """
-    Handle and process controller events based on the provided data.
+    Handle and process controller events based on the provided state.
 
     This function processes various types of controller events such as 
     axis motion, button presses, and connection events. It updates the 
-    state of connected controllers, pressed buttons, released buttons, 
-    and axis values accordingly.
+    connected controllers, the button bitmask and the axis values of the state.
+    Axis events are coalesced first so only the last value per axis in the batch is normalized,
+    and normalization is a lookup in the tables compiled by `refresh_calibration`. Stick axes are
+    collected first and run through their stick's deadzone and curve as (x, y) pairs after the batch.
 
     Args:
-        data (dict): A dictionary containing the following keys:
-            - events (list): List of controller events to process.
-            - accepted_events (list): List of event types that are accepted.
-            - pressed_buttons (list): List of currently pressed buttons.
-            - released_buttons (list): List of buttons that were released.
-            - axis_values (dict): Dictionary of current axis values.
-            - connected_controllers (list): List of connected controller indices.
-            - held_buttons (list): List of buttons that are being held down.
+        state (InputState): The loop state. `state.events` holds the controller events to process.
 
     Returns:
         None
     """
-    events = data['events']
-    accepted_events = data['accepted_events']
-    pressed_buttons = data['pressed_buttons']
-    released_buttons = data['released_buttons']
-    axis_values = data['axis_values']
-    connected_controllers = data['connected_controllers']
-    held_buttons = data['held_buttons']
+    connected_controllers = state.connected_controllers
 
     if not config:
         logging.error("Failed to load config.")
         return
+    calibration = CALIBRATION or refresh_calibration(config)
+    stick_axes = calibration['stick_axes']
+    raw_axes = state.raw_axes
+    dirty_sticks = 0
+
+    events, axis_events, coalesced = coalesce_axis_events(state.events)
+    event_counts = state.event_counts
+    if axis_events:
+        state.axis_events += axis_events
+        state.coalesced_axis_events += coalesced
+        event_counts[pg.JOYAXISMOTION] = event_counts.get(pg.JOYAXISMOTION, 0) + axis_events
 
     for event in events:
-        if event.type not in accepted_events:
-            if event.type == pg.JOYDEVICEADDED:
-                logging.info(f"Controller {event.guid} connected.")
-                connected_controllers.append(f"{len(connected_controllers)}: {event.guid}")
-            elif event.type == pg.JOYDEVICEREMOVED:
-                #check to see what controller no longer exists in pg.joysticks
-                controller_count = pg.joystick.get_count()
-                # for i in range(controller_count):
-                #     print('pg.joystick.Joystick(i)', pg.joystick.Joystick(i))
-                #     temp_controller_list.append(pg.joystick.Joystick(i).get_guid())
-                if len(connected_controllers) != controller_count and controller_count > 0:
-                    logging.info("A controller disconnected.")
-                    #we could then listen for inputs in listener and be able to tell what controllers are still transmitting inputs
-                elif controller_count == 0:
-                    logging.info("All controllers disconnected.")
-                    connected_controllers.clear()
+        event_type = event.type
+        if event_type == pg.JOYAXISMOTION:
+            #there are so many joy events lol
+            axis = event.axis
+            value = evaluate_axis(calibration, axis, event.value)
+            if stick_axes >> axis & 1:
+                raw_axes[axis] = value
+                dirty_sticks |= 1 << axis
+            else:
+                state.set_axis(axis, value)
+            continue
+        event_counts[event_type] = event_counts.get(event_type, 0) + 1
+        if event_type == pg.JOYBUTTONDOWN:
+            state.press_button(event.button)
+        elif event_type == pg.JOYBUTTONUP:
+            state.release_button(event.button)
+        elif event_type == pg.JOYHATMOTION:
+            # Handle hat motion if needed
+            pass
+        elif event_type == pg.JOYDEVICEADDED:
+            logging.info(f"Controller {event.guid} connected.")
+            connected_controllers[get_instance_id(event)] = event.guid
+        elif event_type == pg.JOYDEVICEREMOVED:
+            # Keyed by instance id, so hotplugging the same pad again and again does not pile up entries.
+            connected_controllers.pop(event.instance_id, None)
+            # Headless sources (scripted, replay) run without SDL, so count what they reported instead.
+            remaining = pg.joystick.get_count() if pg.joystick.get_init() else len(connected_controllers)
+            if remaining > 0:
+                logging.info("A controller disconnected.")
+                #we could then listen for inputs in listener and be able to tell what controllers are still transmitting inputs
             else:
-                logging.info(f"Unknown event type: {event.type}")
+                logging.info("All controllers disconnected.")
+                connected_controllers.clear()
         else:
-            #there are so many joy events lol
-            if event.type == pg.JOYAXISMOTION:
-                axis = event.axis
-                evalue = event.value
-                value = calculate_axis_value(evalue, axis, config)
-                # print('event: axis & value & evalue', axis, value, evalue)
-                if axis not in [4,5]:                   
-                    logging.debug("i disabled joysticks, see line 378. there was agross error going on")
-                    continue
-                # print('axis in axis_values', axis in axis_values)
-                min_val = config['calibration']['axes'][str(axis)]['min']                
-                max_val = config['calibration']['axes'][str(axis)]['max']
-                # print('min & max', min_val, max_val)
-                if value > min_val:
-                    axis_values[axis] = value
-                if value == min_val:
-                    print('value is at min value')
-                    if axis in axis_values:
-                        print('axis in axis_values')
-                        del axis_values[axis]
-                else:
-                    #update value
-                    # print('before', axis_values)
-                    axis_values[axis] = value
-            elif event.type == pg.JOYBUTTONDOWN:
-                if event.button not in pressed_buttons and event.button not in held_buttons:
-                    pressed_buttons.append(event.button)
-            elif event.type == pg.JOYBUTTONUP:
-                if event.button in held_buttons:
-                    released_buttons.append(event.button)
-                    held_buttons.remove(event.button)
-            elif event.type == pg.JOYHATMOTION:
-                # Handle hat motion if needed
-                pass
-
-from collections import deque
+            logging.info(f"Unknown event type: {event_type}")
+
+    if dirty_sticks:
+        for stick in calibration['sticks']:
+            if stick.mask & dirty_sticks:
+                x, y = stick.process(raw_axes[stick.x_axis], raw_axes[stick.y_axis])
+                state.set_axis(stick.x_axis, x)
+                state.set_axis(stick.y_axis, y)
 
 # Smoothing parameters
 SMOOTHING_WINDOW_SIZE = 5
-mouse_movements = deque(maxlen=SMOOTHING_WINDOW_SIZE)
+MOUSE_FILTERS = (MovingAverage(SMOOTHING_WINDOW_SIZE), MovingAverage(SMOOTHING_WINDOW_SIZE))
+# Sub-pixel (x, y) left over by smooth_mouse_move, carried into its next move.
+MOUSE_REMAINDER = [0.0, 0.0]
+
+def compile_mouse_filters(spec):
+    """
+    Builds the (x, y) filters for `smooth_mouse_move` from a profile's `filters.mouse` entry.
+    Without one, both axes use a moving average over SMOOTHING_WINDOW_SIZE moves.
+    """
+    if spec is None:
+        return (MovingAverage(SMOOTHING_WINDOW_SIZE), MovingAverage(SMOOTHING_WINDOW_SIZE))
+    return (make_filter(spec), make_filter(spec))
 
 def smooth_mouse_move(dx, dy):
-    mouse_movements.append((dx, dy))
-    avg_dx = sum(m[0] for m in mouse_movements) / len(mouse_movements)
-    avg_dy = sum(m[1] for m in mouse_movements) / len(mouse_movements)
-    mouse.move(avg_dx, avg_dy)
+    """
+    Moves the mouse by a filtered, possibly fractional delta. The backend only moves whole pixels,
+    so the fraction is kept in MOUSE_REMAINDER and added to the next move, like MouseMotion.step does.
+    """
+    if CURRENT_PROFILE_INDEX < len(COMPILED_PROFILES):
+        filter_x, filter_y = COMPILED_PROFILES[CURRENT_PROFILE_INDEX]['mouse_filters']
+    else:
+        filter_x, filter_y = MOUSE_FILTERS
+    now = perf_counter()
+    if filter_x:
+        dx = filter_x(dx, now)
+    if filter_y:
+        dy = filter_y(dy, now)
+    move_x = MOUSE_REMAINDER[0] + dx
+    move_y = MOUSE_REMAINDER[1] + dy
+    dx = int(move_x)
+    dy = int(move_y)
+    MOUSE_REMAINDER[0] = move_x - dx
+    MOUSE_REMAINDER[1] = move_y - dy
+    if dx or dy:
+        mouse.move(dx, dy)
 
 def execute_script_in_venv(script_name, *args):
+    import subprocess
     print(f"Executing script: {script_name} with args: {args}")
     tscribe_path = os.getenv("tscribe")
     print(f"tscribe_path: {tscribe_path}")
@@ -542,6 +548,9 @@ def execute_script_in_venv(script_name, *args):
         }
 
 async def listen_once_locally():
+    # The audio and transcriber modules are only loaded once this action is first used.
+    from listen import collect_audio_once, initialize_audio_stream, initialize_vad
+    from send_keys import send_keys
     p, stream = initialize_audio_stream()
     vad = initialize_vad()
 
@@ -557,166 +566,546 @@ def local_transcribe(audio_bytes):
     # e.g. call a local library or script to transcribe
     return "transcribed text"
 
-def execute_action(action, value, config):
-    """
-    Executes a specified action based on the provided action name and value.
+COMPILED_PROFILES = []
+# The config COMPILED_PROFILES was compiled from; profile switches update and save it.
+ACTIVE_CONFIG = None
+CALIBRATION = None
+MOUSE_MOTION = MouseMotion()
+SCROLL_MOTION = ScrollMotion()
+BUTTON_MOUSE_STEP_PX = 30  # per press at mouse_speed and sensitivity 1.0
+
+def test_log(v):
+    print(f"Test Log: value={v}")
+
+def handle_arrow_keys_horizontal(v):
+    if v > 0.5:
+        keyboard.press(Key.right)
+        keyboard.release(Key.left)
+    elif v < -0.5:
+        keyboard.press(Key.left)
+        keyboard.release(Key.right)
+    else:
+        keyboard.release(Key.left)
+        keyboard.release(Key.right)
+
+def handle_arrow_keys_vertical(v):
+    if v > 0.5:
+        keyboard.press(Key.down)
+        keyboard.release(Key.up)
+    elif v < -0.5:
+        keyboard.press(Key.up)
+        keyboard.release(Key.down)
+    else:
+        keyboard.release(Key.up)
+        keyboard.release(Key.down)
 
-    Parameters:
-    action (str): The name of the action to execute. This can be a mouse action, 
-                  keyboard action, or a custom action defined in the action_map.
-    value (any): The value associated with the action. This can be a boolean, 
-                 float, or any other type depending on the action.
-    config (dict): The configuration dictionary containing settings and mappings.
+def scroll_by_sign(v, dx, dy):
+    if v > 0:
+        mouse.scroll(dx, dy)
+    elif v < 0:
+        mouse.scroll(-dx, -dy)
 
-    Returns:
-    None
-    """
+def build_action_map(config):
     """
-    Executes a specified action based on the provided action name and value.
-    Parameters:
-    action (str): The name of the action to execute. This can be a mouse action, 
-                  keyboard action, or a custom action defined in the action_map.
-    value (any): The value associated with the action. This can be a boolean, 
-                 float, or any other type depending on the action.
+    Builds the named actions that can be mapped in a profile.
+
     Supported Actions:
-    - "MouseScrollUp": Scrolls the mouse up.
-    - "MouseScrollDown": Scrolls the mouse down.
-    - "MouseScrollLeft": Scrolls the mouse left.
-    - "MouseScrollRight": Scrolls the mouse right.
-    - "MouseMove": Moves the mouse to a specified position.
+    - "MouseScrollUp"/"MouseScrollDown"/"MouseScrollLeft"/"MouseScrollRight": Scrolls the mouse one step.
+    - "MouseScrollHorizontal"/"MouseScrollVertical": Scrolls in the direction of the axis value.
+    Mapped to an axis, the scroll actions scroll at a speed proportional to the deflection
+    instead (see `build_continuous_action_map`).
+    - "MouseMoveHorizontal"/"MouseMoveVertical": Moves the mouse along one axis.
+    - "MouseMove": Moves the mouse by an (x, y) value.
+    - "MouseClickLeft"/"MouseClickRight": Presses or releases a mouse button.
     - "SwapProfile": Swaps to the next profile.
-    - "ArrowKeysHorizontal": Handles horizontal arrow key presses based on the value.
-    - "ArrowKeysVertical": Handles vertical arrow key presses based on the value.
+    - "ArrowKeysHorizontal"/"ArrowKeysVertical": Handles arrow key presses based on the value.
     - "TestLog": Logs the provided value for testing purposes.
-    - "Key.<key_name>": Presses or releases a specified keyboard key.
-    - "Button.<button_name>": Presses or releases a specified mouse button.
-    If the action is not recognized, a warning is logged.
+    - "PauseInputs": Pauses or resumes input processing.
+    - "ExecuteScript": Runs the transcriber client once.
+    - "ListenOnceLocally": Records and transcribes audio once.
+    - "DumpDiagnostics": Writes the recent diagnostics (see diagnostics.py) to disk.
+
     Returns:
-    None
+        dict: Action name -> callable taking the input value.
     """
-
-    speed = config.get('calibration', {}).get('mouse_speed', 1.0)  # Get speed from config
-    speed = 30
+    calibration = config.get('calibration', {})
+    speed = BUTTON_MOUSE_STEP_PX * calibration.get('mouse_speed', 1.0) * calibration.get('sensitivity', 1.0)
     action_map = {
         "MouseMoveVertical": lambda v: smooth_mouse_move(0, v * speed) if v else None,
         "MouseMoveHorizontal": lambda v: smooth_mouse_move(v * speed, 0) if v else None,
-        "MouseScrollUp": lambda v: mouse.scroll(1) if v else None,
-        "MouseScrollDown": lambda v: mouse.scroll(-1) if v else None,
-        "MouseScrollLeft": lambda v: mouse.hscroll(-1) if v else None,
-        "MouseScrollRight": lambda v: mouse.hscroll(1) if v else None,
+        "MouseScrollUp": lambda v: mouse.scroll(0, 1) if v else None,
+        "MouseScrollDown": lambda v: mouse.scroll(0, -1) if v else None,
+        "MouseScrollLeft": lambda v: mouse.scroll(-1, 0) if v else None,
+        "MouseScrollRight": lambda v: mouse.scroll(1, 0) if v else None,
+        "MouseScrollHorizontal": lambda v: scroll_by_sign(v, 1, 0),
+        "MouseScrollVertical": lambda v: scroll_by_sign(v, 0, -1),
         "MouseMove": lambda v: smooth_mouse_move(v[0] * speed, v[1] * speed) if v and isinstance(v, (list, tuple)) and len(v) == 2 else None,
+        "MouseClickLeft": lambda v: mouse.press(Button.left) if v else mouse.release(Button.left),
+        "MouseClickRight": lambda v: mouse.press(Button.right) if v else mouse.release(Button.right),
         "SwapProfile": lambda v: swap_to_next_profile() if v else None,
-        "ArrowKeysHorizontal": lambda v: handle_arrow_keys_horizontal(v),
-        "ArrowKeysVertical": lambda v: handle_arrow_keys_vertical(v),
-        "TestLog": lambda v: test_log(v),
+        "ArrowKeysHorizontal": handle_arrow_keys_horizontal,
+        "ArrowKeysVertical": handle_arrow_keys_vertical,
+        "TestLog": test_log,
         "PauseInputs": lambda v: toggle_pause_inputs() if v else None,
         "ExecuteScript": lambda v: execute_script_in_venv("client.py", "--once", "--st", "80") if v else None,
         "ListenOnceLocally": lambda v: listen_once_locally() if v else None,
-        "": lambda v: None
+        "DumpDiagnostics": lambda v: DIAGNOSTICS.dump("DumpDiagnostics action") if v else None,
     }
         # "Macro": lambda v: execute_macro(v) if v else None,
-    print('value', value)
-    print('action', action)
-    def test_log(v):
-        print(f"Test Log: value={v}")
-
-    def parse_and_execute_combination(action):
-        """
-        Parse a combination action string and execute the corresponding key presses/releases.
-        The combination action string should contain key names separated by '+'.
-        Example: "Key.ctrl+Key.alt+Key.delete"
-        """
-        
-        keys = action.split('+')
-        for key in keys:
-            key = key.strip()
-            if key.startswith("Key."):
-                key_name = key.split(".")[1]
-                keyboard.press(getattr(Key, key_name))
-            elif key.startswith("Button."):
-                button_name = key.split(".")[1]
-                mouse.press(getattr(Button, button_name))
-            elif len(key) == 1:
-                keyboard.press(key.lower())
-            else:
-                try:
-                    keyboard.press(getattr(Key, key))
-                except AttributeError:
-                    logging.warning(f"Unknown key/button in combination: {key}")
-
-        # Release keys/buttons after pressing them
-        for key in reversed(keys):
-            key = key.strip()
-            if key.startswith("Key."):
-                key_name = key.split(".")[1]
-                keyboard.release(getattr(Key, key_name))
-            elif key.startswith("Button."):
-                button_name = key.split(".")[1]
-                mouse.release(getattr(Button, button_name))
-            elif len(key) == 1:
-                keyboard.release(key.lower())
-            else:
-                try:
-                    keyboard.release(getattr(Key, key))
-                except AttributeError:
-                    logging.warning(f"Unknown key/button in combination: {key}")
-
-
-        def handle_arrow_keys_horizontal(v):
-            if v > 0.5:
-                keyboard.press(Key.right)
-                keyboard.release(Key.left)
-            elif v < -0.5:
-                keyboard.press(Key.left)
-                keyboard.release(Key.right)
-            else:
-                keyboard.release(Key.left)
-                keyboard.release(Key.right)
-
-        def handle_arrow_keys_vertical(v):
-            if v > 0.5:
-                keyboard.press(Key.down)
-                keyboard.release(Key.up)
-            elif v < -0.5:
-                keyboard.press(Key.up)
-                keyboard.release(Key.down)
-            else:
-                keyboard.release(Key.up)
-                keyboard.release(Key.down)
+    action_map["ScrollHorizontal"] = action_map["MouseScrollHorizontal"]
+    action_map["ScrollVertical"] = action_map["MouseScrollVertical"]
+    return action_map
 
-        def handle_special_key(pynput_key, v):
-            if v:
-                keyboard.press(pynput_key)
-            else:
-                keyboard.release(pynput_key)
-
-        # Check if the action is a Key or Button
-        if action.startswith("Key."):
-            key = getattr(Key, action.split(".")[1])
-            handle_special_key(key, value)
-        elif action.startswith("Button."):
-            button = getattr(Button, action.split(".")[1])
-            if value:
-                mouse.press(button)
-                print('mouse press')
-            else:
-                mouse.release(button)
-                print('mouse release')
+def make_scroll_action(scroll, dx, dy, directional=False):
+    """
+    Analog scroll: pushes the axis deflection into `scroll` on every tick, which turns it into
+    a scroll velocity. Directional actions (e.g. "MouseScrollUp" on a trigger) only use the magnitude.
+    """
+    def scroll_action(v, dt):
+        if directional:
+            v = abs(v)
+        scroll.push(dx * v, dy * v)
+    return scroll_action
+
+def build_continuous_action_map(config, motion, scroll):
+    """
+    Builds the axis actions that run on every scheduler tick while the axis is deflected
+    instead of once per axis event.
+
+    Each entry is a factory, so every mapped axis gets its own callable (and its own state).
+    The callables take (value, dt) where dt is the time in seconds since the previous tick.
+    The mouse move and scroll actions only feed the deflection into `motion` and `scroll`;
+    the cursor is moved and the wheel scrolled at most once per tick by `run_continuous_actions`.
+
+    Returns:
+        dict: Action name -> factory returning a callable taking (value, dt).
+    """
+    continuous_map = {
+        "MouseMoveHorizontal": lambda: motion.set_x,
+        "MouseMoveVertical": lambda: motion.set_y,
+        "MouseScrollHorizontal": lambda: make_scroll_action(scroll, 1, 0),
+        "MouseScrollVertical": lambda: make_scroll_action(scroll, 0, -1),
+        "MouseScrollUp": lambda: make_scroll_action(scroll, 0, 1, directional=True),
+        "MouseScrollDown": lambda: make_scroll_action(scroll, 0, -1, directional=True),
+        "MouseScrollLeft": lambda: make_scroll_action(scroll, -1, 0, directional=True),
+        "MouseScrollRight": lambda: make_scroll_action(scroll, 1, 0, directional=True),
+    }
+    continuous_map["ScrollHorizontal"] = continuous_map["MouseScrollHorizontal"]
+    continuous_map["ScrollVertical"] = continuous_map["MouseScrollVertical"]
+    return continuous_map
+
+def resolve_key(name):
+    """
+    Resolves one key/button token of a mapping string to its pynput object.
+
+    Accepts "Key.<name>", "Button.<name>", single characters and bare key names such as "esc" or "cmd".
+
+    Returns:
+        tuple: (controller, key) where controller is the keyboard or mouse that presses the key.
+
+    Raises:
+        ValueError: If the token does not name a known key or mouse button.
+    """
+    name = name.strip()
+    if name.startswith("Key."):
+        key = Key.__members__.get(name[len("Key."):])
+        if key is None:
+            raise ValueError(f"Unknown key '{name}'.")
+        return keyboard, key
+    if name.startswith("Button."):
+        button = Button.__members__.get(name[len("Button."):])
+        if button is None:
+            raise ValueError(f"Unknown mouse button '{name}'.")
+        return mouse, button
+    if len(name) == 1:
+        return keyboard, name.lower()
+    key = Key.__members__.get(name)
+    if key is None:
+        raise ValueError(f"Unknown key/button '{name}'.")
+    return keyboard, key
+
+def compile_hold(device, key):
+    """
+    Press while the input value is truthy, release when it drops back to zero.
+    """
+    def hold(v):
+        if v:
+            device.press(key)
         else:
-            if '+' in action:
-                try:
-                    parse_and_execute_combination(action)
-                except Exception as e:
-                    logging.error(f"Error executing combination action '{action}': {e}")
-                return
-            else:
-                func = action_map.get(action)
-            # print('func', func)
-                if func:
-                    # print('func', func, value)
-                    func(value)
-                else:
-                    logging.warning(f"No action mapped for '{action}'.")
+            device.release(key)
+    return hold
+
+def compile_combination(action):
+    """
+    Compiles a combination action string into a single callable.
+    The combination action string should contain key names separated by '+'.
+    Example: "Key.ctrl+Key.alt+Key.delete" or "cmd+shift+p"
+    The whole combination is pressed and released in reverse order when the input is pressed,
+    emitted as one batch so nothing else is injected in between.
+    """
+    keys = [(device.device, key) for device, key in (resolve_key(key) for key in action.split('+'))]
+
+    def press_combination(v):
+        if v:
+            INJECTOR.press_combination(keys)
+    return press_combination
+
+def compile_action(action, action_map):
+    """
+    Turns one mapping string into a callable taking the input value.
+
+    A bare name that is neither a named action nor a key is left unmapped with a warning
+    instead of failing the profile: configs use such names as placeholders for actions the
+    mapper does not implement yet, e.g. "ToggleSubProfile" and "Modifier" in the shipped config.
+
+    Returns:
+        callable | None: None when the action is empty or such a placeholder.
+
+    Raises:
+        ValueError: If a "Key."/"Button." token or a part of a combination names no known key or mouse button.
+    """
+    if not action:
+        return None
+    if action in action_map:
+        return action_map[action]
+    if '+' in action:
+        return compile_combination(action)
+    try:
+        return compile_hold(*resolve_key(action))
+    except ValueError:
+        if action.startswith("Key.") or action.startswith("Button."):
+            raise
+        logging.warning(f"No action mapped for '{action}'.")
+        return None
+
+def compile_table(entries, size, action_map):
+    """
+    Compiles a `buttons` or `axes` mapping into a list indexed by button/axis number.
+    Entries may be {"name": ..., "action": ...} dicts or plain action strings.
+    """
+    table = [None] * size
+    for index, entry in entries.items():
+        action = entry.get('action') if isinstance(entry, dict) else entry
+        index = int(index)
+        if index >= len(table):
+            table.extend([None] * (index + 1 - len(table)))
+        try:
+            table[index] = compile_action(action, action_map)
+        except ValueError as e:
+            raise ValueError(f"Input {index} -> '{action}': {e}") from e
+    return table
+
+def compile_names(entries, size):
+    """
+    The action name per input index, parallel to the table `compile_table` builds from `entries`.
+    """
+    names = [None] * size
+    for index, entry in entries.items():
+        index = int(index)
+        if index >= len(names):
+            names.extend([None] * (index + 1 - len(names)))
+        names[index] = entry.get('action') if isinstance(entry, dict) else entry
+    return names
+
+def compile_continuous(entries, axes, continuous_map, axis_filters=None):
+    """
+    Moves axis mappings that name a continuous action out of the event-driven `axes` table.
+
+    The axis filter, if any, moves along with the action so it runs once per tick.
+
+    Returns:
+        tuple: (list of (axis, callable, filter), bitmask of those axes)
+    """
+    continuous = []
+    continuous_axes = 0
+    for index, entry in entries.items():
+        action = entry.get('action') if isinstance(entry, dict) else entry
+        factory = continuous_map.get(action)
+        if factory:
+            index = int(index)
+            axes[index] = None
+            axis_filter = None
+            if axis_filters and index < len(axis_filters):
+                axis_filter = axis_filters[index]
+                axis_filters[index] = None
+            continuous.append((index, factory(), axis_filter))
+            continuous_axes |= 1 << index
+    return continuous, continuous_axes
+
+def compile_profile(profile, action_map, continuous_map=None):
+    """
+    Compiles a profile into dispatch tables so the input loop only indexes a list and calls.
+    Axes mapped to a continuous action are left out of `axes` and listed in `continuous`
+    for the tick scheduler instead.
+
+    The optional `filters` section smooths axis values and mouse moves, e.g.
+    {"axes": {"2": {"type": "one_euro", "min_cutoff": 1.0, "beta": 0.05}}, "mouse": {"type": "ema", "alpha": 0.5}}.
+
+    `button_counts` and `axis_counts` count the dispatches per input for the metrics,
+    `button_names` and `axis_names` hold the action names they are reported under.
+    `continuous_counts` counts the ticks dispatched to each entry of `continuous`, which is
+    reported under the name of its axis.
+
+    Returns:
+        dict: {'name': str, 'buttons': list, 'axes': list, 'axis_filters': list, 'mouse_filters': tuple,
+               'continuous': list, 'continuous_axes': int, 'button_names': list, 'axis_names': list,
+               'button_counts': list, 'axis_counts': list, 'continuous_counts': list}
+
+    Raises:
+        ValueError: If any mapping refers to an unknown key or mouse button, or a filter is invalid.
+    """
+    mappings = profile.get('mappings', {})
+    filters = profile.get('filters', {})
+    try:
+        axes = compile_table(mappings.get('axes', {}), MAX_AXES, action_map)
+        axis_filters = compile_filters(filters.get('axes'), MAX_AXES)
+        continuous, continuous_axes = compile_continuous(mappings.get('axes', {}), axes, continuous_map or {}, axis_filters)
+        buttons = compile_table(mappings.get('buttons', {}), MAX_BUTTONS, action_map)
+        return {
+            'name': profile.get('name'),
+            'buttons': buttons,
+            'axes': axes,
+            'axis_filters': axis_filters,
+            'mouse_filters': compile_mouse_filters(filters.get('mouse')),
+            'continuous': continuous,
+            'continuous_axes': continuous_axes,
+            'button_names': compile_names(mappings.get('buttons', {}), len(buttons)),
+            'axis_names': compile_names(mappings.get('axes', {}), len(axes)),
+            'button_counts': [0] * len(buttons),
+            'axis_counts': [0] * len(axes),
+            'continuous_counts': [0] * len(continuous)
+        }
+    except ValueError as e:
+        raise ValueError(f"Profile '{profile.get('name')}': {e}") from e
+
+def configure_output(config):
+    """
+    Switches INJECTOR to the backend named in config['output']['backend'] ("pynput", "null" or
+    "recording"). Call before the injector thread is started.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    name = config.get('output', {}).get('backend', 'pynput')
+    if INJECTOR.backend.name != name:
+        INJECTOR.backend = make_backend(name)
+    return INJECTOR.backend
+
+def configure_diagnostics(config, verbose=None):
+    """
+    Sets up DIAGNOSTICS from config['diagnostics'] (see diagnostics.DEFAULT_DIAGNOSTICS) and hooks
+    it into logging and SIGUSR2. `verbose` overrides the config's flag.
+    """
+    settings = dict(DEFAULT_DIAGNOSTICS)
+    settings.update(config.get('diagnostics', {}))
+    if verbose is not None:
+        settings['verbose'] = verbose
+    DIAGNOSTICS.configure(settings)
+    install_diagnostics(DIAGNOSTICS)
+    if DIAGNOSTICS.verbose:
+        logging.info(f"Verbose diagnostics on: the last {DIAGNOSTICS.ring.capacity} events are dumped to "
+                     f"{DIAGNOSTICS.dump_path} on error, SIGUSR2 or the DumpDiagnostics action.")
+    return DIAGNOSTICS
+
+def configure_tracing(config, enabled=None):
+    """
+    Turns per-stage latency tracing (see tracing.py) on when `enabled`, or when it is None and
+    config['tracing']['stages'] is set, and hands the tracer to INJECTOR for the inject stage.
+    While tracing is on, SIGUSR1 logs the live histograms (`kill -USR1 <pid>`).
+
+    Returns:
+        StageTracer: The tracer in TRACER, or None when tracing is off.
+    """
+    global TRACER
+    if enabled is None:
+        enabled = config.get('tracing', {}).get('stages', False)
+    TRACER = StageTracer() if enabled else None
+    INJECTOR.tracer = TRACER
+    if TRACER and hasattr(signal, 'SIGUSR1'):
+        try:
+            signal.signal(signal.SIGUSR1, log_stage_stats)
+        except ValueError:
+            # Only the main thread can install handlers; the summary is still logged at exit.
+            pass
+    return TRACER
+
+def log_stage_stats(signum=None, frame=None):
+    if TRACER:
+        logging.info(TRACER.format())
+
+def collect_loop_metrics(state, scheduler):
+    """
+    Builds the collector for a running input loop. It only reads counters the loop keeps anyway,
+    so exporting metrics adds nothing to the loop itself.
+
+    Returns:
+        callable: Returns the list of metrics.Metric at scrape time.
+    """
+    last_scrape = [perf_counter(), state.iterations]
+
+    def collect():
+        now = perf_counter()
+        iterations = state.iterations
+        elapsed = now - last_scrape[0]
+        rate = (iterations - last_scrape[1]) / elapsed if elapsed > 0 else 0.0
+        last_scrape[:] = [now, iterations]
+
+        events = counter('events', "Controller events received, by type.")
+        for event_type, count in sorted(dict(state.event_counts).items()):
+            events.add(count, type=pg.event.event_name(event_type))
+        actions = counter('actions', "Actions dispatched, by profile and action name.")
+        for profile in COMPILED_PROFILES:
+            dispatched = {}
+            axis_names = profile['axis_names']
+            continuous_names = [axis_names[axis] for axis, _, _ in profile['continuous']]
+            for names, counts in ((profile['button_names'], profile['button_counts']),
+                                  (axis_names, profile['axis_counts']),
+                                  (continuous_names, profile['continuous_counts'])):
+                for name, count in zip(names, counts):
+                    if count:
+                        dispatched[name] = dispatched.get(name, 0) + count
+            for name, count in sorted(dispatched.items()):
+                actions.add(count, profile=profile['name'], action=name)
+        injector = INJECTOR.stats()
+        persistence = PERSISTENCE.stats()
+        profile_name = COMPILED_PROFILES[CURRENT_PROFILE_INDEX]['name'] if CURRENT_PROFILE_INDEX < len(COMPILED_PROFILES) else None
+        return [
+            events,
+            counter('coalesced_events', "Axis events dropped because a newer value for the axis was in the same batch.",
+                    state.coalesced_axis_events),
+            actions,
+            counter('output_commands', "Output commands, by what happened to them.")
+                .add(injector['injected'], result='injected')
+                .add(injector['merged'], result='merged')
+                .add(injector['dropped'], result='dropped')
+                .add(injector['suppressed'], result='suppressed'),
+            counter('profile_switches', "Profile switches.", PROFILE_SWITCHES),
+            counter('config_saves', "Config and layout saves, by what happened to them.")
+                .add(persistence['writes'], result='written')
+                .add(persistence['coalesced'], result='coalesced')
+                .add(persistence['retries'], result='retried')
+                .add(persistence['failures'], result='failed'),
+            gauge('config_saves_pending', "Saves waiting for the write-behind thread.", persistence['pending']),
+            counter('loop_iterations', "Input loop iterations.", iterations),
+            counter('ticks', "Continuous-action ticks served.", scheduler.ticks),
+            counter('missed_ticks', "Continuous-action ticks skipped because the loop was late.", scheduler.missed),
+            gauge('loop_iterations_per_second', "Input loop iterations per second since the previous scrape.", round(rate, 1)),
+            gauge('output_queue_depth', "Output commands waiting for the injector thread.", injector['depth']),
+            gauge('output_queue_max_depth', "Highest output queue depth seen.", injector['max_depth']),
+            gauge('held_outputs', "Keys and mouse buttons currently held down.", injector['held']),
+            gauge('current_profile', "Index of the current profile.", CURRENT_PROFILE_INDEX, profile=profile_name),
+            gauge('connected_controllers', "Controllers currently connected.", len(state.connected_controllers))
+        ]
+    return collect
+
+def start_metrics(config, state, scheduler, exporter=None, path=None):
+    """
+    Starts exporting the loop's metrics as configured in config['metrics'] (see metrics.py),
+    or with the given `exporter` ("file" or "socket") and `path`, which also enable it.
+
+    Returns:
+        The running exporter, or None when metrics are off or the exporter failed to start.
+    """
+    settings = get_metrics_settings(config)
+    if exporter:
+        settings.update(enabled=True, exporter=exporter, path=path or settings['path'])
+    if not settings['enabled']:
+        return None
+    registry = MetricsRegistry()
+    registry.register(collect_loop_metrics(state, scheduler))
+    try:
+        running = make_exporter(registry, settings['exporter'], settings['path'], settings['interval_s']).start()
+    except (OSError, ValueError) as e:
+        logging.error(f"Failed to start metrics exporter: {e}")
+        return None
+    logging.info(f"Exporting metrics ({settings['exporter']}) to {settings['path']}.")
+    return running
+
+def compile_profiles(config):
+    """
+    Compiles every profile in the config and caches the result in COMPILED_PROFILES.
+    Call again whenever the profiles or their mappings change.
+    """
+    global COMPILED_PROFILES, ACTIVE_CONFIG, MOUSE_MOTION, SCROLL_MOTION
+    action_map = build_action_map(config)
+    MOUSE_MOTION = MouseMotion.from_config(config)
+    SCROLL_MOTION = ScrollMotion.from_config(config)
+    continuous_map = build_continuous_action_map(config, MOUSE_MOTION, SCROLL_MOTION)
+    COMPILED_PROFILES = [compile_profile(profile, action_map, continuous_map) for profile in config['profiles']]
+    ACTIVE_CONFIG = config
+    logging.info(f"Compiled {len(COMPILED_PROFILES)} profile(s).")
+    return COMPILED_PROFILES
+
+def refresh_calibration(config):
+    """
+    Rebuilds the axis lookup tables in CALIBRATION if the calibration section of the config changed.
+    """
+    global CALIBRATION
+    CALIBRATION = get_compiled_calibration(config, CALIBRATION)
+    return CALIBRATION
+
+def reconcile_profile_switch(state, profile, skipped=0):
+    """
+    Hands the held inputs over after the loop switched away from `profile`. The previous
+    profile gets a release for everything it saw pressed or deflected, so no key or button
+    stays down, and its continuous actions are stopped. Every input still held is then
+    suppressed until it is let go, so the new profile never sees a release without its press.
+
+    Args:
+        state (InputState): The loop state.
+        profile (dict): The compiled profile that was current before the switch.
+        skipped (int): Bitmask of buttons pressed in the same batch but never dispatched.
+    """
+    button_actions = profile['buttons']
+    for button in iter_bits(state.buttons & ~skipped & ~state.suppressed_buttons):
+        mapped_action = get_compiled_action(button_actions, button)
+        if mapped_action:
+            mapped_action(0)
+    axis_actions = profile['axes']
+    previous_axes = state.previous_axes
+    for axis in range(len(previous_axes)):
+        if previous_axes[axis] != 0.0 and not state.suppressed_axes >> axis & 1:
+            mapped_action = get_compiled_action(axis_actions, axis)
+            if mapped_action:
+                mapped_action(0)
+    for _, action, axis_filter in profile['continuous']:
+        action(0.0, 0.0)
+        if axis_filter:
+            axis_filter.reset()
+    MOUSE_MOTION.reset()
+    SCROLL_MOTION.reset()
+    state.suppress_held_inputs()
+
+def get_compiled_action(table, index):
+    return table[index] if index < len(table) else None
+
+def execute_action(action, value, config):
+    """
+    Executes a specified action based on the provided action name and value.
+
+    This compiles the action on every call, so it is meant for one-off use. The input loop
+    goes through the dispatch tables built by `compile_profiles` instead.
+
+    Parameters:
+    action (str): The name of the action to execute. This can be a named action from
+                  `build_action_map`, "Key.<key_name>", "Button.<button_name>" or a
+                  combination such as "Key.ctrl+Key.alt+Key.delete".
+    value (any): The value associated with the action. This can be a boolean, 
+                 float, or any other type depending on the action.
+    config (dict): The configuration dictionary containing settings and mappings.
+
+    Returns:
+    None
+    """
+    if DIAGNOSTICS.verbose:
+        DIAGNOSTICS.record("execute_action %r value=%r", action, value)
+    try:
+        func = compile_action(action, build_action_map(config))
+    except ValueError as e:
+        logging.warning(f"Error executing action '{action}': {e}")
+        return
+    if func:
+        func(value)
 
 def toggle_pause_inputs():
     """
@@ -734,18 +1123,16 @@ def get_button_action(profile, button_index):
 def get_axis_action(profile, axis_index):
     return profile['mappings']['axes'].get(str(axis_index), {}).get("action")
 
-def execute_profile_actions(data, config, controller):
-    """
-    Executes actions based on the current profile and input data.
-    This function processes input data to execute corresponding actions defined in the current profile.
-    It handles button presses, button holds, button releases, and axis movements. The function also
-    includes placeholders for handling combo actions.
-        logging.debug(f'func: {func}')
-        logging.debug(f'value: {value}')
-        logging.debug(f'action: {action}')
-            - 'pressed_buttons' (set): A set of buttons that were pressed.
-            - 'released_buttons' (set): A set of buttons that were released.
-            - 'axis_values' (dict): A dictionary mapping axis identifiers to their current values.
+def execute_profile_actions(state, config, controller):
+    """
+    Executes actions based on the current profile and input state.
+    This function dispatches the button edges and updated axes of the state to the compiled
+    actions of the current profile. Pressed buttons fire with 1 and released buttons with 0.
+    Trigger axes fire once when pulled and again with 0 when let go; other axes fire on every update.
+
+    Args:
+        state (InputState): The loop state filled by `handle_controller_events`.
+
     Returns:
         None
     """
@@ -755,83 +1142,97 @@ def execute_profile_actions(data, config, controller):
         logging.error("Failed to load configuration.")
         return
     global CURRENT_PROFILE_INDEX
-    profile = config['profiles'][CURRENT_PROFILE_INDEX]
-    if not profile:
+    if CURRENT_PROFILE_INDEX >= len(COMPILED_PROFILES):
         logging.error("No current profile set.")
         return
+    profile = COMPILED_PROFILES[CURRENT_PROFILE_INDEX]
+    button_actions = profile['buttons']
+    axis_actions = profile['axes']
 
     if not controller:
         return
-    
-    # Example of reading each axis value
-    # axes_config = config['calibration']['axes']
-    # axis_values = {}
-    # for axis_key in axes_config.keys():
-    #     val = get_current_axis_value(int(axis_key), controller, config)
-    #     axis_values[axis_key] = val
-    #     # Do something with val, e.g. call execute_action if tagged in config:
-    #     mapped_action = config['profiles'][0]['mappings']['axes'].get(axis_key)
-    #     if mapped_action:
-    #         execute_action(mapped_action, val)
 
     # Execute button actions TODO: i need some logic to make sure when i go to combo it doesn't trigger other events. like maybe a delay to see if combo otherwise just send key press. so probably if combo else press idk
-    if data['held_buttons']:
-        for button in data['held_buttons']:
-            action = profile['mappings']['buttons'].get(str(button))
-            # if action:
-            #     logging.info(f"Action held: {action}")
-    
-    if data['pressed_buttons']:
-        for button in data['pressed_buttons']:
-            mapped_action = get_button_action(profile, button)
-            if mapped_action:
-                execute_action(mapped_action, 1, config)
-                data['held_buttons'].add(button)
-                data['pressed_buttons'].remove(button)
+    button_counts = profile['button_counts']
+    verbose = DIAGNOSTICS.verbose
+    profile_index = CURRENT_PROFILE_INDEX
+    pressed, released = state.take_button_edges()
+    if state.suppressed_buttons:
+        # Buttons held across a profile switch were pressed under the previous profile; letting
+        # go of them is not a release for this one.
+        suppressed = state.suppressed_buttons
+        state.suppressed_buttons = suppressed & ~released
+        released &= ~suppressed
+    skipped = 0
+    for button in iter_bits(pressed):
+        mapped_action = get_compiled_action(button_actions, button)
+        if mapped_action:
+            if verbose:
+                DIAGNOSTICS.record("button %d pressed -> %s", button, profile['button_names'][button])
+            button_counts[button] += 1
+            mapped_action(1)
+            if CURRENT_PROFILE_INDEX != profile_index:
+                # The action switched profiles: the presses after it reach neither profile.
+                skipped = pressed >> (button + 1) << (button + 1)
+                released &= ~skipped
+                break
 
-    if data['released_buttons']:
-        for button in data['released_buttons']:
-            mapped_action = get_button_action(profile, button)
+    for button in iter_bits(released):
+        mapped_action = get_compiled_action(button_actions, button)
+        if mapped_action:
+            if verbose:
+                DIAGNOSTICS.record("button %d released -> %s", button, profile['button_names'][button])
+            button_counts[button] += 1
+            mapped_action(0)
+    if CURRENT_PROFILE_INDEX != profile_index:
+        reconcile_profile_switch(state, profile, skipped)
+        return
+
+    triggers = CALIBRATION['triggers'] if CALIBRATION else ()
+    axes = state.axes
+    previous_axes = state.previous_axes
+    axis_filters = profile['axis_filters']
+    axis_counts = profile['axis_counts']
+    now = perf_counter()
+    for axis in iter_bits(state.take_dirty_axes()):
+        value = axes[axis]
+        axis_filter = axis_filters[axis] if axis < len(axis_filters) else None
+        if axis_filter:
+            value = filter_axis(axis_filter, value, now)
+        previous = previous_axes[axis]
+        previous_axes[axis] = value
+        bit = 1 << axis
+        if state.suppressed_axes & bit:
+            # Deflected across a profile switch: ignored until it returns to rest.
+            if value == 0.0:
+                state.suppressed_axes &= ~bit
+            continue
+        mapped_action = get_compiled_action(axis_actions, axis)
+        if value != 0.0:
+            if state.latched_axes & bit:
+                continue
             if mapped_action:
-                execute_action(mapped_action, 0, config)
-                data['released_buttons'].remove(button)
-
-    if data['axis_values']:
-        print
-        print('Debug: Axis values detected:', data['axis_values'])
-        capturedAxisValues = data['axis_values'].copy()
-        for axis, value in capturedAxisValues.items():
-            print(f'Debug: Processing axis {axis} with current value {value} and previous value {data["axis_value_previous"][axis]}')
-            
-            # If the last value is not zero and the current value is not zero, then process the actions below
-            if data['axis_value_previous'][axis] != 0.0 and value != 0.0:
-                print(f'Debug: Axis {axis} has non-zero previous and current values')
-                if data['skip_axes'][axis] != axis and value != 0.0:
-                    mapped_action = get_axis_action(profile, int(axis))
-                    if mapped_action:
-                        print(f'Debug: Executing action for axis {axis} with value {value}')
-                        execute_action(mapped_action, value, config)
-                    if axis in [4, 5]:
-                        print(f'Debug: Marking axis {axis} to be skipped')
-                        data['skip_axes'][axis] = axis
-            elif value == 0.0 and data['axis_value_previous'][axis] != 0.0:
-                action = get_axis_action(profile, int(axis))
-                if action:
-                    print(f'Debug: Executing action for axis {axis} with value 0 (release)')
-                    execute_action(action, 0, config)
-                    data['skip_axes'][axis] = None
-                    print(f'Debug: Axis {axis} reset - {data["skip_axes"]}')
-                    data['axis_values'].pop(axis)  # this is why we are using the captured value, so we can modify on the loop without having to do another loop.
-                    print(f'Debug: Axis {axis} removed - {data["axis_values"]}')
-            elif value == 0.0 and data['axis_value_previous'][axis] == 0.0:
-                data['axis_value_previous'][axis] = None
-                return
-            data['axis_value_previous'][axis] = value
+                if verbose:
+                    DIAGNOSTICS.record("axis %d = %.4f -> %s", axis, value, profile['axis_names'][axis])
+                axis_counts[axis] += 1
+                mapped_action(value)
+                if CURRENT_PROFILE_INDEX != profile_index:
+                    reconcile_profile_switch(state, profile)
+                    return
+            if axis in triggers:
+                state.latched_axes |= bit
+        elif previous != 0.0:
+            state.latched_axes &= ~bit
+            if mapped_action:
+                if verbose:
+                    DIAGNOSTICS.record("axis %d released -> %s", axis, profile['axis_names'][axis])
+                axis_counts[axis] += 1
+                mapped_action(0)
 
 
     #TODO: add in combos
     # Execute combo actions
-    # if data['pressed_buttons'] or data['held_buttons']:
+    # if pressed or state.held_buttons:
     #     for combo in profile['combos']:
     #         if all(button in held_buttons for button in combo['buttons']):
     #             action = combo['action']
@@ -840,7 +1241,7 @@ def execute_profile_actions(data, config, controller):
     #             action = combo['action']
     #             execute_action(action, 0)
 
-def check_controller(config, layout, mappings, controller): #TODO: this has too much responsibility I feel 
+def check_controller(config, layout, mappings, controller, source=None, trace_stages=None, metrics_exporter=None, metrics_path=None): #TODO: this has too much responsibility I feel 
     """
     Initializes the Pygame library and checks for connected controllers. If controllers are detected,
     it initializes each controller and listens for input events. The function processes controller
@@ -853,69 +1254,185 @@ def check_controller(config, layout, mappings, controller): #TODO: this has too
     1. For each detected controller:
         a. Initializes the controller.
         b. Logs the initialization of the controller.
-        c. Sets up a data dictionary to store controller input events and states.
+        c. Sets up an InputState to store controller input events and states.
         d. Continuously listens for controller input events and processes them.
-        e. Executes profile actions based on the input events.
-        f. Handles KeyboardInterrupt to stop monitoring when interrupted by the user.
+        e. Executes profile actions based on the input events, and continuous axis actions
+           on the fixed-rate ticks of a TickScheduler while a mapped axis is deflected.
+        f. Handles KeyboardInterrupt to stop monitoring when interrupted by the user, and releases
+           every key and button still held when monitoring stops for any reason.
 
     Note:
     - The function uses the `logging` module to log information and warnings.
-    - The function uses the `sleep` function to introduce delays between processing input events.
+    - Events are fetched from `source`, by default the one from `input_sources.make_input_source`.
+      The pygame source either busy-polls or blocks on `pg.event.wait` depending on
+      `config['input_loop']['mode']`; the scripted source generates synthetic input and
+      monitoring stops once it is finished.
+    - Key presses and mouse output are performed by the INJECTOR thread while monitoring runs.
+    - With `trace_stages` (or config['tracing']['stages']) every iteration is timed per stage
+      (see `run_traced_iteration`) and the histograms are logged on SIGUSR1 and at the end.
+    - Metrics are exported while monitoring runs when config['metrics'] enables them or
+      `metrics_exporter` is given (see `start_metrics`).
     """
     
     if controller:
         logging.info(f"Initialized Controller {controller}: {controller.get_name()}")
         global CURRENT_PROFILE_INDEX
-        data = {
-            'accepted_events': [pg.JOYAXISMOTION, pg.JOYBUTTONDOWN, pg.JOYBUTTONUP, pg.JOYHATMOTION],
-            'pressed_buttons': [],
-            'released_buttons': [],
-            'axis_values': {},
-            'connected_controllers': [],
-            'events': [],
-            'profile': config.get('current_profile_index'),
-            'skip_axes': {index: None for index in range(6)},
-            'held_buttons': set(),
-            'axis_value_previous': {index: None for index in range(6)}
-        }
-        first = True
-        while True or first:
-            try:
-                listen_for_controller_input(data, config)
-                if data['pressed_buttons'] or data['held_buttons']:
-                    execute_profile_actions(data, config, controller)
-                    # sleep(0.1)
-                if data['released_buttons']:
-                    execute_profile_actions(data, config, controller)
+        try:
+            configure_output(config)
+            tracer = configure_tracing(config, trace_stages)
+            compile_profiles(config)
+            refresh_calibration(config)
+        except ValueError as e:
+            logging.error(f"Failed to compile config: {e}")
+            return
+        state = InputState()
+        try:
+            source = source or make_input_source(config)
+        except ValueError as e:
+            logging.error(f"Failed to create input source: {e}")
+            return
+        scheduler = TickScheduler(get_loop_settings(config)['tick_rate_hz'])
+        ticking = False
+        exporter = start_metrics(config, state, scheduler, metrics_exporter, metrics_path)
+        INJECTOR.start()
+        # Import pygame up front rather than inside the first (possibly traced) iteration.
+        load_module(pg)
+        try:
+            while not source.finished:
+                state.iterations += 1
+                try:
+                    timeout = scheduler.timeout_ms(perf_counter_ns()) if ticking else None
+                    if tracer is None:
+                        listen_for_controller_input(state, config, source, timeout)
+                        if state.has_changes():
+                            execute_profile_actions(state, config, controller)
+                        ticking = run_continuous_actions(state, scheduler, ticking)
+                    else:
+                        ticking = run_traced_iteration(state, config, controller, source, scheduler, ticking, timeout)
+                    state.events.clear()
                     # sleep(0.1)
-                if data['axis_values']: #TODO this is pretty broken right now, im trying to get min and max to read properly otherwise it's just broken. might need to change how we calc value (% of 100%) and then apply deadzone
-                    execute_profile_actions(data, config, controller)
-                data['events'].clear()
-                # sleep(0.1)
-                if first:
-                    first = False
-            except KeyboardInterrupt:
-                logging.info("Controller monitoring stopped by user.")
-                break
+                except KeyboardInterrupt:
+                    logging.info("Controller monitoring stopped by user.")
+                    logging.info(f"Coalesced {state.coalesced_axis_events} of {state.axis_events} axis events.")
+                    break
+        except Exception:
+            # Logged as an error so the diagnostics ring is dumped with what led up to it.
+            logging.exception("Controller loop failed.")
+            raise
+        finally:
+            # Never leave a key or modifier stuck, however the loop ended.
+            INJECTOR.release_all()
+            INJECTOR.stop()
+            if exporter:
+                exporter.stop()
+        logging.info(f"Injector: {INJECTOR.stats()}")
+        if tracer:
+            logging.info(tracer.format())
+
+def run_traced_iteration(state, config, controller, source, scheduler, ticking, max_timeout_ms=None):
+    """
+    One iteration of the input loop with every stage timed into TRACER: pump (from the moment
+    the source stopped waiting for input), handle and dispatch. The inject stage is timed by
+    the injector itself.
+
+    Returns:
+        bool: Whether the loop should keep waking up for ticks.
+    """
+    tracer = TRACER
+    start = perf_counter_ns()
+    state.events = source(max_timeout_ms)
+    ingested = perf_counter_ns()
+    handled = ingested
+    if state.events:
+        tracer.record(PUMP, ingested - max(start, getattr(source, 'woke_ns', 0)))
+        handle_controller_events(state, config)
+        handled = perf_counter_ns()
+        tracer.record(HANDLE, handled - ingested)
+    changed = state.has_changes()
+    if changed:
+        execute_profile_actions(state, config, controller)
+    ticks = scheduler.ticks
+    ticking = run_continuous_actions(state, scheduler, ticking)
+    if changed or scheduler.ticks != ticks:
+        tracer.record(DISPATCH, perf_counter_ns() - handled)
+    return ticking
+
+def run_continuous_actions(state, scheduler, ticking):
+    """
+    Runs the continuous axis actions of the current profile when a scheduler tick is due.
+
+    Ticking starts as soon as a continuous axis is deflected and stops once all of them are
+    back at zero, after one last call with 0 so the actions can reset. Mouse movement from
+    all mapped axes is integrated by MOUSE_MOTION and injected as one whole-pixel move per tick,
+    scrolling likewise by SCROLL_MOTION as one batched scroll of whole steps.
+
+    Returns:
+        bool: Whether the loop should keep waking up for ticks.
+    """
+    if CURRENT_PROFILE_INDEX >= len(COMPILED_PROFILES):
+        return False
+    profile = COMPILED_PROFILES[CURRENT_PROFILE_INDEX]
+    continuous = profile['continuous']
+    if not continuous:
+        return False
+    axes = state.axes
+    suppressed = state.suppressed_axes
+    active = False
+    for axis, _, _ in continuous:
+        if axes[axis] and not suppressed >> axis & 1:
+            active = True
+            break
+    if not active:
+        if ticking:
+            for _, action, axis_filter in continuous:
+                action(0.0, 0.0)
+                if axis_filter:
+                    axis_filter.reset()
+            MOUSE_MOTION.reset()
+            SCROLL_MOTION.reset()
+        return False
 
-def listen_for_controller_input(data, config):
+    now = perf_counter_ns()
+    if not ticking:
+        scheduler.start(now)
+    dt = scheduler.poll(now)
+    if dt:
+        now_s = now / 1e9
+        continuous_counts = profile['continuous_counts']
+        for index, (axis, action, axis_filter) in enumerate(continuous):
+            value = 0.0 if suppressed >> axis & 1 else axes[axis]
+            if axis_filter:
+                value = filter_axis(axis_filter, value, now_s)
+            continuous_counts[index] += 1
+            action(value, dt)
+        dx, dy = MOUSE_MOTION.step(dt)
+        if dx or dy:
+            mouse.move(dx, dy)
+        dx, dy = SCROLL_MOTION.step(dt)
+        if dx or dy:
+            mouse.scroll(dx, dy)
+    return True
+
+def listen_for_controller_input(state, config, pump=poll_events, max_timeout_ms=None):
     """
     Listens for controller input events and processes them.
 
-    This function pumps the event queue to update the internal state of the event system,
-    retrieves all the events from the queue, and stores them in the provided data dictionary.
+    This function asks the pump for pending events and stores them in the provided state.
     If there are any events, it calls the handle_controller_events function to process them.
 
     Args:
-        data (dict): A dictionary to store the events. The events are stored under the key 'events'.
+        state (InputState): The loop state. The events are stored in `state.events`.
+        pump (callable): Returns the pending events. `poll_events` busy-polls the queue,
+            `event_loop.AdaptiveWait` blocks until the controller sends something, and any
+            source from `input_sources` works the same way.
+        max_timeout_ms (int, optional): Latest wake-up for a blocking pump, e.g. the next tick.
 
     Returns:
         None
     """
-    pg.event.pump()
-    data['events'] = pg.event.get()
-    if data['events']:
-        handle_controller_events(data, config)
+    state.events = pump(max_timeout_ms)
+    if state.events:
+        handle_controller_events(state, config)
 
 def normalize_axis_value_0_to_1(value, min_val, max_val):
     if min_val == max_val:
@@ -1083,8 +1600,7 @@ def map_buttons_to_action():
 
     print(f"\nMapping Buttons and Axes for Profile: '{profile}'\n")
 
-    pg.init()
-    pg.joystick.init()
+    initialize_joystick_subsystem()
     controller_count = pg.joystick.get_count()
     if controller_count == 0:
         print("No controllers detected.")
@@ -1206,59 +1722,247 @@ def listen():
 
         print(f"Mapped {input_type.capitalize()} {detected_input} to '{name}'.\n")
 
-    with open(LAYOUT_PATH, 'w') as f:
-        json.dump(layout, f, indent=4)
+    save_layout(layout, LAYOUT_PATH)
 
     print("Controller input mapping completed and saved to layout__ps4.json.")
 
-def log_controller_inputs():
+def log_controller_inputs(config, output_path=TRACE_PATH, compress=False, duration_s=None):
     """
-    Listen for controller inputs and log the button presses based on the mappings in layout__ps4.json.
+    Records every controller event to a binary trace (see input_trace.py) until interrupted
+    or `duration_s` has passed. The trace can be fed back through the mapper with `replay`.
     """
-    layout = load_json(LAYOUT_PATH)
-    if not layout:
-        print("Failed to load layout.")
-        return
-
     if not initialize_pygame():
         return
 
     controller = pg.joystick.Joystick(0)
     initialize_controller(controller)
+    pump = create_event_pump(config)
+
+    print(f"Recording controller inputs to {output_path}... (Ctrl+C to stop)")
+    start = perf_counter()
+    with TraceWriter(output_path, compress=compress) as writer:
+        try:
+            while duration_s is None or perf_counter() - start < duration_s:
+                for event in pump():
+                    # Stamped one by one, so the events of a batch keep their order and spacing on replay.
+                    writer.write_event(perf_counter_ns(), event)
+        except KeyboardInterrupt:
+            pass
+    print(f"Recorded {writer.records} events in {perf_counter() - start:.1f} s to {output_path}.")
+
+def replay_trace(config, trace_path, fast=False, speed=1.0, backend=None):
+    """
+    Feeds a recorded trace through the mapper as if the controller were sending it: events go
+    through `handle_controller_events`, the current profile's actions and the output backend.
 
-    print("Starting to log controller inputs...")
+    Args:
+        fast (bool): Replay as fast as possible instead of on the recorded timing.
+        speed (float): Playback rate for real-time replay.
+        backend (str, optional): Output backend to use instead of config['output']['backend'],
+            e.g. "null" to replay without touching the real keyboard and mouse.
+    """
+    try:
+        source = TraceSource(trace_path, realtime=not fast, speed=speed)
+    except (OSError, ValueError) as e:
+        logging.error(f"Failed to open trace: {e}")
+        return
+    if backend:
+        config = dict(config, output=dict(config.get('output', {}), backend=backend))
+    start = perf_counter()
+    check_controller(config, None, None, SyntheticController(name=f"Replay of {trace_path}"), source)
+    elapsed = perf_counter() - start
+    print(f"Replayed {source.replayed} events in {elapsed:.2f} s ({source.replayed / max(elapsed, 1e-9):.0f} events/s).")
 
-    while True:
-        for event in pg.event.get():
-            if event.type == pg.JOYBUTTONDOWN:
-                button = str(event.button)
-                if button in layout["buttons"]:
-                    logging.info(f"Button {button} pressed: {layout['buttons'][button]}")
-            elif event.type == pg.JOYBUTTONUP:
-                button = str(event.button)
-                if button in layout["buttons"]:
-                    logging.info(f"Button {button} released: {layout['buttons'][button]}")
-            elif event.type == pg.JOYAXISMOTION:
-                axis = str(event.axis)
-                if axis in layout["axes"]:
-                    value = event.value
-                    logging.info(f"Axis {axis} moved to {value}: {layout['axes'][axis]}")
-
-        sleep(0.1)
-
-def run(config, layout, mappings, controller):
+# Actions that change the mapper itself or start other programs are left out of benchmarks.
+BENCH_SKIPPED_ACTIONS = {"SwapProfile", "PauseInputs", "ExecuteScript", "ListenOnceLocally"}
+
+def get_bench_buttons(profile):
+    """
+    Buttons of the profile that synthetic input may press: everything except BENCH_SKIPPED_ACTIONS.
+    """
+    return [int(index) for index, entry in profile.get('mappings', {}).get('buttons', {}).items()
+            if (entry.get('action') if isinstance(entry, dict) else entry) not in BENCH_SKIPPED_ACTIONS]
+
+def benchmark_profile(config, profile_index, events=20000, rate_hz=1000, seed=0, threaded=False):
+    """
+    Drives one profile through the real pipeline with scripted input: `handle_controller_events`,
+    `execute_profile_actions` and the continuous actions, down to a recording output backend.
+
+    Latency runs from the moment a batch of input events is handed to the mapper to the
+    timestamp of each output event it caused. With `threaded` the output goes through the
+    injector thread, so queueing is included.
+
+    Returns:
+        dict: Input/output event counts, events/s and latency percentiles in microseconds.
+    """
+    global CURRENT_PROFILE_INDEX
+    CURRENT_PROFILE_INDEX = profile_index
+    source = ScriptedSource.from_config(config, rate_hz=rate_hz, max_events=events, seed=seed,
+                                        buttons=get_bench_buttons(config['profiles'][profile_index]), realtime=False)
+    backend = RecordingBackend()
+    previous_backend = INJECTOR.backend
+    INJECTOR.backend = backend
+    state = InputState()
+    scheduler = TickScheduler(get_loop_settings(config)['tick_rate_hz'])
+    ticking = False
+    latencies = []
+    recorded = 0
+    if threaded:
+        INJECTOR.start()
+    # Import pygame before timing; the scripted source would otherwise import it in the first profile's run.
+    load_module(pg)
+    start = perf_counter_ns()
+    try:
+        while not source.finished:
+            state.events = source()
+            received = perf_counter_ns()
+            handle_controller_events(state, config)
+            if state.has_changes():
+                execute_profile_actions(state, config, source.controller)
+            ticking = run_continuous_actions(state, scheduler, ticking)
+            if threaded:
+                INJECTOR.wait_idle()
+            output = backend.events
+            for i in range(recorded, len(output)):
+                latencies.append(output[i][0] - received)
+            recorded = len(output)
+    finally:
+        INJECTOR.release_all()
+        if threaded:
+            INJECTOR.stop()
+        INJECTOR.backend = previous_backend
+        MOUSE_MOTION.reset()
+        SCROLL_MOTION.reset()
+    elapsed = (perf_counter_ns() - start) / 1e9
+    return {
+        'input_events': source.generated,
+        'output_events': recorded,
+        'events_per_s': round(source.generated / elapsed, 1),
+        'latency_us': summarize_latencies(latencies)
+    }
+
+def benchmark_profiles(config, events=20000, rate_hz=1000, seed=0, threaded=False):
+    """
+    Runs `benchmark_profile` for every profile in the config.
+
+    Returns:
+        dict: Benchmark settings and a result per profile name, ready to be dumped as JSON.
+    """
+    global CURRENT_PROFILE_INDEX
+    compile_profiles(config)
+    refresh_calibration(config)
+    saved_index = CURRENT_PROFILE_INDEX
+    results = {'events': events, 'rate_hz': rate_hz, 'seed': seed, 'threaded': threaded, 'profiles': {}}
+    # Keep stdout for the JSON results; debug prints from the actions go nowhere.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            for index, profile in enumerate(config['profiles']):
+                results['profiles'][profile.get('name', str(index))] = benchmark_profile(config, index, events, rate_hz, seed, threaded)
+        finally:
+            CURRENT_PROFILE_INDEX = saved_index
+    return results
+
+def soak_test(config, duration_s=60.0, rate_hz=10000, hotplug_interval_s=1.0, seed=0, sample_interval_s=1.0, **limits):
+    """
+    Pushes sustained scripted input (buttons, axes, hats and hotplug churn) through the current
+    profile in real time for `duration_s`, with output going to the null backend through the
+    injector thread, and checks that memory and time per event stay flat (see soak.SoakMonitor).
+
+    Args:
+        limits: max_memory_growth_mb, max_rss_growth_mb, max_time_growth and warmup_fraction
+            for the monitor.
+
+    Returns:
+        dict: The monitor's report plus the run's event and hotplug counts.
+    """
+    compile_profiles(config)
+    refresh_calibration(config)
+    profile_index = CURRENT_PROFILE_INDEX if CURRENT_PROFILE_INDEX < len(config['profiles']) else 0
+    source = ScriptedSource.from_config(config, rate_hz=rate_hz, duration_s=duration_s, seed=seed,
+                                        hotplug_interval_s=hotplug_interval_s,
+                                        buttons=get_bench_buttons(config['profiles'][profile_index]))
+    monitor = SoakMonitor(duration_s, sample_interval_s, **limits)
+    previous_backend = INJECTOR.backend
+    INJECTOR.backend = NullBackend()
+    state = InputState()
+    scheduler = TickScheduler(get_loop_settings(config)['tick_rate_hz'])
+    ticking = False
+    INJECTOR.start()
+    # Import pygame before measuring; the scripted source would otherwise import it mid-run.
+    load_module(pg)
+    monitor.begin(perf_counter())
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            while not source.finished:
+                timeout = scheduler.timeout_ms(perf_counter_ns()) if ticking else 1
+                events = source(timeout)
+                start = perf_counter_ns()
+                state.events = events
+                if events:
+                    handle_controller_events(state, config)
+                if state.has_changes():
+                    execute_profile_actions(state, config, source.controller)
+                ticking = run_continuous_actions(state, scheduler, ticking)
+                monitor.record(len(events), perf_counter_ns() - start, perf_counter())
+    finally:
+        INJECTOR.release_all()
+        INJECTOR.stop()
+        INJECTOR.backend = previous_backend
+    report = monitor.finish()
+    report.update({
+        'duration_s': duration_s,
+        'rate_hz': rate_hz,
+        'events': source.generated,
+        'hotplugs': source.hotplugs,
+        'connected_controllers': len(state.connected_controllers),
+        'injector': INJECTOR.stats()
+    })
+    return report
+
+def run(config, layout, mappings, controller, source_name=None, trace_stages=None, metrics_exporter=None,
+        metrics_path=None, profile=None, verbose=None, **source_options):
     """
     Initializes the pygame library and checks for connected controllers.
     This function first attempts to initialize the pygame library. If the 
     initialization fails, the function returns immediately. If the initialization 
     is successful, it proceeds to check for connected controllers.
+    With the scripted input source no controller is needed: its synthetic controller is used instead.
+
+    Args:
+        profile (dict, optional): Profile the run (see profiling.ProfileSession): 'output' prefix
+            for the artifacts, 'duration_s' to stop by itself, 'snapshot_interval_s' and 'top'.
+        verbose (bool, optional): Record every dispatch in the diagnostics ring (see `configure_diagnostics`).
     """
+    configure_diagnostics(config, verbose)
+    try:
+        source = make_input_source(config, source_name, **source_options)
+    except ValueError as e:
+        logging.error(f"Failed to create input source: {e}")
+        return
+    if source.controller:
+        controller = source.controller
     print(controller, 'controller')
     if not controller:
         print("No controller found")
         return
     
-    check_controller(config, layout, mappings, controller)
+    if profile is None:
+        check_controller(config, layout, mappings, controller, source, trace_stages, metrics_exporter, metrics_path)
+        return
+    if profile.get('duration_s'):
+        source = TimeLimitedSource(source, profile['duration_s'])
+    try:
+        session = ProfileSession(profile.get('output') or DEFAULT_PROFILE_OUTPUT, profile.get('snapshot_interval_s', 10.0),
+                                 profile.get('top', 25))
+    except ValueError as e:
+        logging.error(f"Failed to start profiling: {e}")
+        return
+    session.start()
+    try:
+        check_controller(config, layout, mappings, controller, source, trace_stages, metrics_exporter, metrics_path)
+    finally:
+        prof_path, report_path = session.stop()
+    print(f"Profile: {prof_path} (python -m pstats {prof_path}), allocations: {report_path}")
 
 # def preload():
 #     """
@@ -1280,35 +1984,112 @@ def run(config, layout, mappings, controller):
 #         logging.error("Failed to initialize controller.")
 #     return config, layout, mappings, controller
 
-def preload():
-    config = load_json(CONFIG_PATH)
-    layout = load_json(LAYOUT_PATH)
-    mappings = load_json(MAPPINGS_PATH)
-    global CURRENT_PROFILE_INDEX
-    CURRENT_PROFILE_INDEX = config['current_profile_index']
-    print('CURRENT_PROFILE_INDEX', CURRENT_PROFILE_INDEX)
-    print('config', config)   
-
+def initialize_first_controller():
+    """
+    Initializes the joystick subsystem and returns the first controller, or None without one.
+    """
     pg_controller = initialize_pygame()
     if isinstance(pg_controller, list) and pg_controller:
         # Take the first controller if multiple
-        controller_obj = initialize_controller(pg_controller[0])
-    elif pg_controller:
+        return initialize_controller(pg_controller[0])
+    if pg_controller:
         # Single controller returned
-        controller_obj = initialize_controller(pg_controller)
+        return initialize_controller(pg_controller)
+    return None
+
+def compile_snapshot(documents, previous=None):
+    """
+    Compiles what the config snapshot keeps besides the parsed files: the axis lookup tables.
+    The profiles' dispatch tables hold live callables, so they are compiled at startup instead.
+    Tables from the `previous` snapshot are kept when the calibration did not change.
+    """
+    config = documents['config']
+    key = calibration_key(config)
+    if previous and previous.get('calibration_key') == key:
+        return previous
+    return {'calibration_key': key, 'tables': pack_tables(compile_calibration(config))}
+
+def restore_calibration(config, compiled):
+    """
+    Returns the compiled calibration from the snapshot's tables, or None if they do not fit the config.
+    """
+    if not compiled or compiled.get('calibration_key') != calibration_key(config):
+        return None
+    try:
+        return compile_calibration(config, unpack_tables(compiled['tables']))
+    except (KeyError, TypeError, ValueError) as e:
+        logging.warning(f"Ignoring the snapshot's axis tables: {e}")
+        return None
+
+def preload(with_controller=True, use_snapshot=True):
+    """
+    Loads the config, layout and mappings and, with `with_controller`, the first controller.
+    Without it SDL is not touched at all.
+
+    With `use_snapshot` the files and the compiled axis tables come from the snapshot next to
+    the config while none of the files changed (see config_cache.py), and CALIBRATION is set
+    from it, so a warm start neither parses the JSON nor rebuilds the tables.
+
+    Returns:
+        tuple: (config, layout, mappings, controller or None)
+    """
+    global CURRENT_PROFILE_INDEX, CALIBRATION
+    if use_snapshot:
+        paths = {'config': CONFIG_PATH, 'layout': LAYOUT_PATH, 'mappings': MAPPINGS_PATH}
+        documents, compiled, warm = load_with_snapshot(paths, get_snapshot_path(CONFIG_PATH), compile_snapshot)
+        config, layout, mappings = documents['config'], documents['layout'], documents['mappings']
+        logging.debug("Config snapshot %s", "used as is" if warm else "rebuilt")
+        if config:
+            CALIBRATION = restore_calibration(config, compiled)
     else:
-        controller_obj = None
+        config = load_json(CONFIG_PATH)
+        layout = load_json(LAYOUT_PATH)
+        mappings = load_json(MAPPINGS_PATH)
+    CURRENT_PROFILE_INDEX = config['current_profile_index']
+    logging.debug("Current profile index %s", CURRENT_PROFILE_INDEX)
 
+    controller_obj = initialize_first_controller() if with_controller else None
     return config, layout, mappings, controller_obj
 
-def run_parser():
+def write_report(report, output_path=None):
+    """
+    Writes a benchmark report as JSON to `output_path`, or to stdout without one.
+    """
+    text = json.dumps(report, indent=4)
+    if output_path:
+        with open(output_path, 'w') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
 
-    config, layout, mappings, controller = preload()
-    
+def run_parser():
+    """
+    Parses the command line and runs the subcommand. Arguments are parsed before anything is
+    loaded, and each subcommand then loads only what it uses: the config-only commands (list,
+    add, remove, switch, human) never initialize SDL, and `run` only does for the pygame source.
+    """
     parser = argparse.ArgumentParser(description="Controller Mapper")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help='Parse the JSON files and compile the axis tables without the startup snapshot')
     subparsers = parser.add_subparsers(dest='command', required=True)
 
-    subparsers.add_parser('run', help='Start the controller mapper')
+    run_command = subparsers.add_parser('run', help='Start the controller mapper')
+    run_command.add_argument('--source', choices=INPUT_SOURCES, help='Input source (default: config input.source or pygame)')
+    run_command.add_argument('--rate', type=float, help='Scripted source: events per second')
+    run_command.add_argument('--duration', type=float, help='Scripted source: seconds of input to generate')
+    run_command.add_argument('--seed', type=int, help='Scripted source: random seed')
+    run_command.add_argument('--trace-stages', action='store_true', default=None,
+                             help='Time the pump/handle/dispatch/inject stages; SIGUSR1 logs the histograms')
+    run_command.add_argument('--metrics', choices=EXPORTERS, help='Export Prometheus metrics to a text file or a Unix socket')
+    run_command.add_argument('--metrics-path', help='Metrics file or socket path (default: config metrics.path)')
+    run_command.add_argument('--verbose', action='store_true', default=None,
+                             help='Record every dispatch in the diagnostics ring; dumped on error or SIGUSR2')
+    run_command.add_argument('--profile', action='store_true', help='Profile the run with cProfile and tracemalloc (slower)')
+    run_command.add_argument('--profile-output', default=DEFAULT_PROFILE_OUTPUT,
+                             help='Prefix for the .prof file and the .txt report')
+    run_command.add_argument('--profile-duration', type=float, help='Stop the profiled run after this many seconds')
+    run_command.add_argument('--profile-interval', type=float, default=10.0, help='Seconds between allocation snapshots')
+    run_command.add_argument('--profile-top', type=int, default=25, help='Entries per section of the report')
     subparsers.add_parser('list', help='List all current mappings')
     add_parser = subparsers.add_parser('add', help='Add a new mapping')
     add_parser.add_argument('-b', '--buttons', nargs='+', help='Buttons to map')
@@ -1321,13 +2102,50 @@ def run_parser():
     switch_parser.add_argument('profile_name', help='Name of the profile to switch to')
     subparsers.add_parser('calibrate', help='Calibrate controller axes')
     subparsers.add_parser('listen', help='Listen for controller inputs and map them')
-    subparsers.add_parser('log', help='Log controller inputs based on layout__ps4.json')
+    log_command = subparsers.add_parser('log', help='Record controller inputs to a binary trace')
+    log_command.add_argument('-o', '--output', default=TRACE_PATH, help='Trace file to write')
+    log_command.add_argument('--compress', action='store_true', help='Gzip-compress the trace')
+    log_command.add_argument('--duration', type=float, help='Stop recording after this many seconds')
+    replay_command = subparsers.add_parser('replay', help='Replay a recorded trace through the mapper')
+    replay_command.add_argument('trace', help='Trace file written by the log command')
+    replay_command.add_argument('--fast', action='store_true', help='Replay as fast as possible instead of in real time')
+    replay_command.add_argument('--speed', type=float, default=1.0, help='Real-time playback rate')
+    replay_command.add_argument('--backend', choices=list(BACKENDS), help='Output backend for the replay')
     subparsers.add_parser('human', help='Create human-friendly mappings')
+    bench_command = subparsers.add_parser('bench', help='Measure input-to-output latency for every profile')
+    bench_command.add_argument('--events', type=int, default=20000, help='Synthetic input events per profile')
+    bench_command.add_argument('--rate', type=float, default=1000, help='Synthetic input rate in events per second')
+    bench_command.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic input')
+    bench_command.add_argument('--threaded', action='store_true', help='Send output through the injector thread')
+    bench_command.add_argument('-o', '--output', help='Write the JSON results to this file instead of stdout')
+    soak_command = subparsers.add_parser('soak', help='Run sustained synthetic input and check memory and time stay flat')
+    soak_command.add_argument('--duration', type=float, default=60.0, help='Seconds to run')
+    soak_command.add_argument('--rate', type=float, default=10000, help='Synthetic input events per second')
+    soak_command.add_argument('--hotplug', type=float, default=1.0, help='Seconds between simulated unplug/replug (0 to disable)')
+    soak_command.add_argument('--sample-interval', type=float, default=1.0, help='Seconds between memory/time samples')
+    soak_command.add_argument('--max-memory-growth-mb', type=float, default=1.0, help='Allowed growth of traced memory after warm-up')
+    soak_command.add_argument('--max-time-growth', type=float, default=0.5, help='Allowed relative growth of time per event')
+    soak_command.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic input')
+    soak_command.add_argument('-o', '--output', help='Write the JSON report to this file instead of stdout')
 
     args = parser.parse_args()
 
+    if args.command in ('list', 'add', 'remove', 'map', 'listen', 'check'):
+        # These load what they need themselves.
+        config = layout = mappings = controller = None
+    else:
+        config, layout, mappings, controller = preload(with_controller=args.command == 'calibrate',
+                                                       use_snapshot=not args.no_snapshot)
+
     if args.command == 'run':
-        run(config, layout, mappings, controller)
+        if get_source_name(config, args.source) == 'pygame':
+            controller = initialize_first_controller()
+        profile = None
+        if args.profile:
+            profile = {'output': args.profile_output, 'duration_s': args.profile_duration,
+                       'snapshot_interval_s': args.profile_interval, 'top': args.profile_top}
+        run(config, layout, mappings, controller, args.source, args.trace_stages, args.metrics, args.metrics_path,
+            profile, args.verbose, rate_hz=args.rate, duration_s=args.duration, seed=args.seed)
     elif args.command == 'list':
         list_mappings() #TODO: convert to main_data
     elif args.command == 'add':
@@ -1343,19 +2161,41 @@ def run_parser():
     elif args.command == 'map':
         map_buttons_to_action()
     elif args.command == 'check':
-        check_controller()
+        controller = initialize_first_controller()
+        if controller:
+            print(f"Controller connected: {controller.get_name()}")
     elif args.command == 'switch':
-        swap_to_next_profile()
+        names = [profile['name'] for profile in config['profiles']]
+        if args.profile_name in names:
+            select_profile(config, names.index(args.profile_name))
+            print(f"Switched to profile: {args.profile_name}")
+        else:
+            print(f"No profile named {args.profile_name}. Available profiles: {', '.join(names)}")
     elif args.command == 'calibrate':
         calibrate_axes(config, controller)
     elif args.command == 'listen':
         listen()
     elif args.command == 'log':
-        log_controller_inputs()
+        log_controller_inputs(config, args.output, args.compress, args.duration)
+    elif args.command == 'replay':
+        replay_trace(config, args.trace, args.fast, args.speed, args.backend)
     elif args.command == 'human':
-        create_human_friendly_mappings()
+        create_human_friendly_mappings(config, layout, mappings)
+    elif args.command == 'bench':
+        write_report(benchmark_profiles(config, args.events, args.rate, args.seed, args.threaded), args.output)
+    elif args.command == 'soak':
+        report = soak_test(config, args.duration, args.rate, args.hotplug or None, args.seed, args.sample_interval,
+                           max_memory_growth_mb=args.max_memory_growth_mb, max_time_growth=args.max_time_growth)
+        write_report(report, args.output)
+        if not report['passed']:
+            logging.error(f"Soak test failed: {'; '.join(report['failures'])}")
+            sys.exit(1)
     else:
         print("Unknown command.")
 
 if __name__ == "__main__":
-    run_parser()
\ No newline at end of file
+    try:
+        run_parser()
+    finally:
+        # Saves are written behind; get them onto the disk before the process exits.
+        PERSISTENCE.close()
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Metrics for the running mapper in the Prometheus text exposition format.
+
+The input loop only bumps plain integer counters it already owns (on InputState, the
+injector, the compiled profiles); nothing here runs on the hot path. A collector reads those
+counters when the metrics are scraped and only then are they formatted:
+
+    file: rewrites a text file every `interval_s` seconds, atomically, e.g. for the
+        node_exporter textfile collector.
+    socket: answers every connection on a Unix socket with the current metrics as a
+        minimal HTTP response, so `curl --unix-socket <path> http://localhost/metrics` works.
+"""
+import logging
+import os
+import socket
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRIC_PREFIX = 'controller_mapper_'
+EXPORTERS = ('file', 'socket')
+
+DEFAULT_METRICS = {
+    "enabled": False,
+    "exporter": "file",
+    "path": "controller_mapper.prom",
+    "interval_s": 5.0
+}
+
+class Metric:
+    """
+    One metric family as collected at scrape time.
+
+    Attributes:
+        samples (list): (labels dict, value) pairs.
+    """
+    __slots__ = ('name', 'kind', 'help', 'samples')
+
+    def __init__(self, name, kind, help_text, samples=None):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.samples = samples if samples is not None else []
+
+    def add(self, value, **labels):
+        self.samples.append((labels, value))
+        return self
+
+def counter(name, help_text, value=None, **labels):
+    metric = Metric(name, 'counter', help_text)
+    return metric if value is None else metric.add(value, **labels)
+
+def gauge(name, help_text, value=None, **labels):
+    metric = Metric(name, 'gauge', help_text)
+    return metric if value is None else metric.add(value, **labels)
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        if value != value:
+            return 'NaN'
+        if value in (float('inf'), float('-inf')):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+def render(metrics, prefix=METRIC_PREFIX):
+    """
+    Formats metric families as Prometheus text. Counter names get their `_total` suffix here.
+
+    Returns:
+        str: The exposition text, ending with a newline.
+    """
+    lines = []
+    for metric in metrics:
+        name = prefix + metric.name
+        if metric.kind == 'counter' and not name.endswith('_total'):
+            name += '_total'
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for labels, value in metric.samples:
+            if labels:
+                label_text = ','.join(f'{key}="{escape_label_value(label)}"' for key, label in sorted(labels.items()))
+                lines.append(f"{name}{{{label_text}}} {format_value(value)}")
+            else:
+                lines.append(f"{name} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+class MetricsRegistry:
+    """
+    Holds the collectors. A collector is a callable that returns a list of Metric; it is
+    only called when the metrics are scraped.
+    """
+    def __init__(self):
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def collect(self):
+        metrics = []
+        for collector in self.collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logging.error(f"Metrics collector {collector} failed: {e}")
+        return metrics
+
+    def render(self):
+        # Scrapes from the file writer and the socket never interleave, so rate collectors
+        # see one consistent interval between calls.
+        with self.lock:
+            return render(self.collect())
+
+class MetricsFileWriter:
+    """
+    Rewrites `path` with the current metrics every `interval_s` seconds, and once more on stop.
+    The file is replaced atomically, so a reader never sees a half-written scrape.
+    """
+    def __init__(self, registry, path, interval_s=5.0):
+        if interval_s <= 0:
+            raise ValueError(f"Metrics interval must be positive, got {interval_s}.")
+        self.registry = registry
+        self.path = path
+        self.interval_s = float(interval_s)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def write(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as file:
+            file.write(self.registry.render())
+        os.replace(temp_path, self.path)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval_s):
+            try:
+                self.write()
+            except OSError as e:
+                logging.error(f"Failed to write metrics to {self.path}: {e}")
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        try:
+            self.write()
+        except OSError as e:
+            logging.error(f"Failed to write metrics to {self.path}: {e}")
+
+class MetricsSocketServer:
+    """
+    Serves the current metrics on a Unix socket at `path`, one scrape per connection.
+    """
+    def __init__(self, registry, path):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix sockets are not available on this platform; use the file exporter.")
+        self.registry = registry
+        self.path = path
+        self.server = None
+        self.thread = None
+        self.closing = False
+
+    def start(self):
+        if os.path.exists(self.path):
+            # A socket left behind by a previous run that did not shut down cleanly.
+            os.unlink(self.path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen(4)
+        self.thread = threading.Thread(target=self._run, name="metrics-socket", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            with connection:
+                if self.closing:
+                    return
+                try:
+                    self._serve(connection)
+                except OSError as e:
+                    logging.debug(f"Metrics scrape failed: {e}")
+
+    def _serve(self, connection):
+        # Read the request if the client sends one (curl does, nc may not), then answer.
+        connection.settimeout(0.2)
+        try:
+            connection.recv(4096)
+        except socket.timeout:
+            pass
+        body = self.registry.render().encode('utf-8')
+        header = (f"HTTP/1.0 200 OK\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode('ascii')
+        connection.sendall(header + body)
+
+    def stop(self):
+        if self.server is None:
+            return
+        # Closing the socket does not interrupt a blocked accept() everywhere, so wake it with
+        # one last connection instead.
+        self.closing = True
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wake:
+                wake.connect(self.path)
+        except OSError:
+            pass
+        self.thread.join(1.0)
+        self.server.close()
+        self.server = None
+        self.thread = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+def get_metrics_settings(config):
+    """
+    Returns the `metrics` section of the config merged over DEFAULT_METRICS.
+    """
+    settings = dict(DEFAULT_METRICS)
+    if config:
+        settings.update(config.get('metrics', {}))
+    return settings
+
+def make_exporter(registry, exporter, path, interval_s=5.0):
+    """
+    Raises:
+        ValueError: If the exporter is unknown or unavailable.
+    """
+    if exporter == 'file':
+        return MetricsFileWriter(registry, path, interval_s)
+    if exporter == 'socket':
+        return MetricsSocketServer(registry, path)
+    raise ValueError(f"Unknown metrics exporter '{exporter}'. Choose from {', '.join(EXPORTERS)}.")
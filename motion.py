@@ -0,0 +1,178 @@
+"""
+Stick-to-mouse motion and analog scrolling.
+
+Deflection is turned into a cursor velocity in pixels per second (or a scroll
+velocity in steps per second), integrated over the real time between scheduler
+ticks. Fractional pixels and steps are carried over to the next tick, so slow
+movements still add up and only whole-pixel moves and whole scroll steps are injected.
+"""
+from math import hypot
+
+from calibration import make_response_curve
+
+DEFAULT_MOUSE_MOTION = {
+    "max_speed_px_s": 1200,
+    "response_curve": {"type": "linear"},
+    "acceleration": 0.0,
+    "acceleration_time_s": 0.5
+}
+
+DEFAULT_SCROLL_MOTION = {
+    "max_steps_per_s": 20,
+    "response_curve": {"type": "linear"}
+}
+
+class MouseMotion:
+    """
+    Velocity model for the cursor.
+
+    speed = max_speed_px_s * mouse_speed * sensitivity * curve(|deflection|), multiplied by
+    1 + acceleration * min(held_time / acceleration_time_s, 1) while the stick stays deflected.
+
+    Attributes:
+        x, y (float): Latest deflection per axis, set by the continuous actions.
+        remainder_x, remainder_y (float): Sub-pixel movement not emitted yet.
+        held_s (float): Seconds the stick has been deflected, for acceleration.
+        moves (int): Moves emitted since start.
+    """
+    __slots__ = ('speed_px_s', 'curve', 'invert_y', 'acceleration', 'acceleration_time_s',
+                 'x', 'y', 'remainder_x', 'remainder_y', 'held_s', 'moves')
+
+    def __init__(self, speed_px_s=1200.0, curve=None, invert_y=False, acceleration=0.0, acceleration_time_s=0.5):
+        if acceleration_time_s <= 0:
+            raise ValueError("acceleration_time_s must be positive.")
+        self.speed_px_s = float(speed_px_s)
+        self.curve = curve or make_response_curve(None)
+        self.invert_y = bool(invert_y)
+        self.acceleration = float(acceleration)
+        self.acceleration_time_s = float(acceleration_time_s)
+        self.x = self.y = 0.0
+        self.remainder_x = self.remainder_y = 0.0
+        self.held_s = 0.0
+        self.moves = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Builds the model from `calibration`: mouse_speed, sensitivity, invert and the
+        optional `mouse_motion` section (see DEFAULT_MOUSE_MOTION).
+        """
+        calibration = config.get('calibration', {}) if config else {}
+        settings = dict(DEFAULT_MOUSE_MOTION)
+        settings.update(calibration.get('mouse_motion', {}))
+        speed = settings['max_speed_px_s'] * calibration.get('mouse_speed', 1.0) * calibration.get('sensitivity', 1.0)
+        return cls(speed, make_response_curve(settings['response_curve']), calibration.get('invert', False),
+                   settings['acceleration'], settings['acceleration_time_s'])
+
+    def set_x(self, value, dt=0.0):
+        self.x = value
+
+    def set_y(self, value, dt=0.0):
+        self.y = value
+
+    def reset(self):
+        self.x = self.y = 0.0
+        self.remainder_x = self.remainder_y = 0.0
+        self.held_s = 0.0
+
+    def step(self, dt):
+        """
+        Advances the model by `dt` seconds.
+
+        Returns:
+            tuple: (dx, dy) whole pixels to move now, (0, 0) if nothing crossed a pixel.
+        """
+        x, y = self.x, self.y
+        if not x and not y:
+            self.remainder_x = self.remainder_y = 0.0
+            self.held_s = 0.0
+            return 0, 0
+        magnitude = hypot(x, y)
+        if magnitude > 1.0:
+            x /= magnitude
+            y /= magnitude
+            magnitude = 1.0
+        self.held_s += dt
+        gain = self.speed_px_s * dt * self.curve(magnitude) / magnitude
+        if self.acceleration:
+            gain *= 1.0 + self.acceleration * min(self.held_s / self.acceleration_time_s, 1.0)
+        if self.invert_y:
+            y = -y
+        move_x = self.remainder_x + x * gain
+        move_y = self.remainder_y + y * gain
+        dx = int(move_x)
+        dy = int(move_y)
+        self.remainder_x = move_x - dx
+        self.remainder_y = move_y - dy
+        if dx or dy:
+            self.moves += 1
+        return dx, dy
+
+class ScrollMotion:
+    """
+    Velocity model for the scroll wheel.
+
+    Every continuous scroll action pushes its deflection on each tick; pushes within a tick add
+    up, so e.g. one trigger scrolling up and another scrolling down cancel out.
+    speed = max_steps_per_s * scroll_speed * curve(deflection) per direction.
+
+    Attributes:
+        x, y (float): Deflection pushed since the last step.
+        remainder_x, remainder_y (float): Fractional steps not scrolled yet.
+        scrolls (int): Scroll calls emitted since start.
+    """
+    __slots__ = ('speed_steps_s', 'curve', 'x', 'y', 'remainder_x', 'remainder_y', 'scrolls')
+
+    def __init__(self, speed_steps_s=20.0, curve=None):
+        self.speed_steps_s = float(speed_steps_s)
+        self.curve = curve or make_response_curve(None)
+        self.x = self.y = 0.0
+        self.remainder_x = self.remainder_y = 0.0
+        self.scrolls = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Builds the model from `calibration`: scroll_speed and the optional `scroll_motion`
+        section (see DEFAULT_SCROLL_MOTION).
+        """
+        calibration = config.get('calibration', {}) if config else {}
+        settings = dict(DEFAULT_SCROLL_MOTION)
+        settings.update(calibration.get('scroll_motion', {}))
+        speed = settings['max_steps_per_s'] * calibration.get('scroll_speed', 1.0)
+        return cls(speed, make_response_curve(settings['response_curve']))
+
+    def push(self, x, y):
+        self.x += x
+        self.y += y
+
+    def reset(self):
+        self.x = self.y = 0.0
+        self.remainder_x = self.remainder_y = 0.0
+
+    def step(self, dt):
+        """
+        Advances the model by `dt` seconds and clears the pushed deflection.
+
+        Returns:
+            tuple: (dx, dy) whole scroll steps to send now, (0, 0) if nothing crossed a step.
+        """
+        x, y = self.x, self.y
+        self.x = self.y = 0.0
+        if x:
+            move_x = self.remainder_x + self.speed_steps_s * dt * self.curve(max(-1.0, min(1.0, x)))
+            dx = int(move_x)
+            self.remainder_x = move_x - dx
+        else:
+            dx = 0
+            self.remainder_x = 0.0
+        if y:
+            move_y = self.remainder_y + self.speed_steps_s * dt * self.curve(max(-1.0, min(1.0, y)))
+            dy = int(move_y)
+            self.remainder_y = move_y - dy
+        else:
+            dy = 0
+            self.remainder_y = 0.0
+        if dx or dy:
+            self.scrolls += 1
+        return dx, dy
@@ -0,0 +1,155 @@
+"""
+Output backends: where injected key presses, clicks, moves and scrolls end up.
+
+    pynput: the real OS injection (default).
+    null: discards everything, to measure the mapper without the cost of the OS.
+    recording: keeps every event in memory with a `perf_counter_ns` timestamp, for tests
+        and benchmarks that run headless.
+
+Every backend takes the same commands, (op, device, a, b) tuples where device is
+KEYBOARD or MOUSE, and `emit` performs a list of them as one unit.
+"""
+import abc
+from time import perf_counter_ns
+
+PRESS = 0
+RELEASE = 1
+MOVE = 2
+SCROLL = 3
+BATCH = 4
+
+KEYBOARD = 'keyboard'
+MOUSE = 'mouse'
+
+class OutputBackend(abc.ABC):
+    """
+    Base class. Subclasses implement press, release, move and scroll; `emit` runs a batch
+    through them in order. A subclass missing one of them cannot be instantiated, so an
+    incomplete backend fails in `make_backend` rather than on its first event.
+    """
+    name = None
+
+    @abc.abstractmethod
+    def press(self, device, key):
+        pass
+
+    @abc.abstractmethod
+    def release(self, device, key):
+        pass
+
+    @abc.abstractmethod
+    def move(self, dx, dy):
+        pass
+
+    @abc.abstractmethod
+    def scroll(self, dx, dy):
+        pass
+
+    def emit(self, commands):
+        for op, device, a, b in commands:
+            if op == PRESS:
+                self.press(device, a)
+            elif op == RELEASE:
+                self.release(device, a)
+            elif op == MOVE:
+                self.move(a, b)
+            elif op == SCROLL:
+                self.scroll(a, b)
+
+class PynputBackend(OutputBackend):
+    name = 'pynput'
+
+    def __init__(self):
+        # Imported here so the other backends work without a display.
+        from pynput.keyboard import Controller as KeyboardController
+        from pynput.mouse import Controller as MouseController
+        self.keyboard = KeyboardController()
+        self.mouse = MouseController()
+
+    def press(self, device, key):
+        (self.keyboard if device == KEYBOARD else self.mouse).press(key)
+
+    def release(self, device, key):
+        (self.keyboard if device == KEYBOARD else self.mouse).release(key)
+
+    def move(self, dx, dy):
+        self.mouse.move(dx, dy)
+
+    def scroll(self, dx, dy):
+        self.mouse.scroll(dx, dy)
+
+class NullBackend(OutputBackend):
+    name = 'null'
+
+    def __init__(self):
+        self.events = 0
+
+    def press(self, device, key):
+        self.events += 1
+
+    def release(self, device, key):
+        self.events += 1
+
+    def move(self, dx, dy):
+        self.events += 1
+
+    def scroll(self, dx, dy):
+        self.events += 1
+
+class RecordingBackend(OutputBackend):
+    """
+    Attributes:
+        events (list): (timestamp_ns, op name, device, a, b) for every event, in emit order.
+            Moves and scrolls are recorded with device MOUSE and (dx, dy) as (a, b).
+        batches (int): Batches emitted.
+    """
+    name = 'recording'
+
+    def __init__(self, clock=perf_counter_ns):
+        self.clock = clock
+        self.events = []
+        self.batches = 0
+
+    def press(self, device, key):
+        self.events.append((self.clock(), 'press', device, key, None))
+
+    def release(self, device, key):
+        self.events.append((self.clock(), 'release', device, key, None))
+
+    def move(self, dx, dy):
+        self.events.append((self.clock(), 'move', MOUSE, dx, dy))
+
+    def scroll(self, dx, dy):
+        self.events.append((self.clock(), 'scroll', MOUSE, dx, dy))
+
+    def emit(self, commands):
+        self.batches += 1
+        super().emit(commands)
+
+    def actions(self):
+        """
+        Returns:
+            list: The recorded events without timestamps, e.g. for assertions in tests.
+        """
+        return [event[1:] for event in self.events]
+
+    def clear(self):
+        self.events.clear()
+        self.batches = 0
+
+BACKENDS = {
+    'pynput': PynputBackend,
+    'null': NullBackend,
+    'recording': RecordingBackend
+}
+
+def make_backend(name='pynput'):
+    """
+    Raises:
+        ValueError: If `name` is not a known backend.
+        TypeError: If the backend does not implement every OutputBackend method.
+    """
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown output backend '{name}'. Choose from {', '.join(BACKENDS)}.")
+    return backend()
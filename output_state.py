@@ -0,0 +1,55 @@
+"""
+Tracks which keys and mouse buttons the mapper is currently holding down.
+
+Handlers such as the arrow-key actions press or release on every axis event. Only real
+transitions reach the OS: pressing a held key or releasing a key that is up is suppressed.
+Knowing what is held also lets the mapper release everything on shutdown, so a modifier
+like cmd or alt is never left stuck.
+"""
+
+class OutputState:
+    """
+    Attributes:
+        held (dict): key -> device that pressed it, in press order.
+        suppressed (int): Redundant presses/releases that were not emitted.
+    """
+    __slots__ = ('held', 'suppressed')
+
+    def __init__(self):
+        self.held = {}
+        self.suppressed = 0
+
+    def press(self, device, key):
+        """
+        Returns:
+            bool: Whether the press is a real transition and should be emitted.
+        """
+        if key in self.held:
+            self.suppressed += 1
+            return False
+        self.held[key] = device
+        return True
+
+    def release(self, device, key):
+        """
+        Returns:
+            bool: Whether the release is a real transition and should be emitted.
+        """
+        if self.held.pop(key, None) is None:
+            self.suppressed += 1
+            return False
+        return True
+
+    def is_held(self, key):
+        return key in self.held
+
+    def take_held(self):
+        """
+        Forgets every held key.
+
+        Returns:
+            list: (device, key) pairs, most recently pressed first, ready to be released.
+        """
+        held = [(device, key) for key, device in reversed(self.held.items())]
+        self.held.clear()
+        return held
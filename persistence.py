@@ -0,0 +1,207 @@
+"""
+Write-behind persistence for the JSON files.
+
+Saving the config used to rewrite config.json synchronously, on whatever thread asked, which
+for a profile swap is the input loop. `WriteBehind.save` only records the document and
+returns; a background thread writes it:
+
+    - Saves are coalesced per path: the thread waits `delay_s` after the first pending save
+      and then writes only the newest document of every path once.
+    - Every write is atomic: the JSON goes to a temporary file in the same directory, which
+      is fsynced and renamed over the target, so a crash leaves either the old or the new
+      file, never a torn one. The directory is fsynced too, so the rename itself survives.
+    - `flush` is the barrier: it returns once everything saved before the call is on disk.
+
+The document is serialized on the writer thread, from the object passed to `save`, so the
+caller never pays for it. Callers may keep changing it (the write picks up the newest
+values); if a key is added or removed while it is being serialized, the save is queued again
+and retried with the next batch instead of being lost.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from time import perf_counter
+
+DEFAULT_DELAY_S = 0.25
+NEW_FILE_MODE = 0o644  # mkstemp creates 0600; new files get the usual permissions instead.
+
+def write_atomic(path, text):
+    """
+    Replaces `path` with `text` atomically and durably, keeping the file's permissions.
+
+    Raises:
+        OSError: If the file cannot be written; the original is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+def dump_json(document):
+    return json.dumps(document, indent=4)
+
+class WriteBehind:
+    """
+    Attributes:
+        saves (int): Calls to `save`.
+        writes (int): Files written.
+        coalesced (int): Saves replaced by a newer one of the same path before being written.
+        failures (int): Writes that failed; each is logged as an error.
+        retries (int): Saves queued again because the document changed while being serialized.
+    """
+    def __init__(self, delay_s=DEFAULT_DELAY_S, serialize=dump_json):
+        if delay_s < 0:
+            raise ValueError(f"Write-behind delay must not be negative, got {delay_s}.")
+        self.delay_s = float(delay_s)
+        self.serialize = serialize
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.urgent = False
+        self.submitted = 0
+        self.completed = 0
+        self.saves = self.writes = self.coalesced = self.failures = self.retries = 0
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return self
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self.thread.start()
+        return self
+
+    def save(self, path, document):
+        """
+        Schedules `document` to be written to `path` as JSON. Never blocks on I/O; the writer
+        thread is started on first use.
+        """
+        with self.condition:
+            if path in self.pending:
+                self.coalesced += 1
+            self.submitted += 1
+            self.saves += 1
+            self.pending[path] = (document, self.submitted)
+            self.condition.notify_all()
+        if not self.running:
+            self.start()
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every save made before the call has been written (or has failed).
+
+        Returns:
+            bool: False if that did not happen within `timeout` seconds.
+        """
+        with self.condition:
+            target = self.submitted
+            if self.completed >= target:
+                return True
+            self.urgent = True
+            self.condition.notify_all()
+            return self.condition.wait_for(lambda: self.completed >= target, timeout)
+
+    def close(self, timeout=5.0):
+        """
+        Writes everything still pending and stops the thread.
+
+        Returns:
+            bool: False if the pending saves were not written within `timeout` seconds.
+        """
+        flushed = self.flush(timeout)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        return flushed
+
+    def stats(self):
+        with self.condition:
+            return {'pending': len(self.pending), 'saves': self.saves, 'writes': self.writes,
+                    'coalesced': self.coalesced, 'failures': self.failures, 'retries': self.retries}
+
+    def _take_batch(self):
+        """
+        Waits for pending saves, then up to `delay_s` for more, and takes them all.
+        Returns None once the writer is stopped with nothing left to write.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending or not self.running)
+            if not self.pending:
+                return None
+            deadline = perf_counter() + self.delay_s
+            while self.running and not self.urgent:
+                remaining = deadline - perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            self.urgent = False
+            batch = self.pending
+            self.pending = {}
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            done = 0
+            retry = {}
+            for path, (document, sequence) in batch.items():
+                try:
+                    text = self.serialize(document)
+                except RuntimeError as e:
+                    # "dictionary changed size during iteration": the caller edited the document
+                    # meanwhile. The next attempt sees the edited document.
+                    logging.debug("Retrying save of %s: %s", path, e)
+                    retry[path] = (document, sequence)
+                    continue
+                except (TypeError, ValueError) as e:
+                    self.failures += 1
+                    logging.error(f"Failed to save {path}: {e}")
+                else:
+                    try:
+                        write_atomic(path, text)
+                        self.writes += 1
+                    except OSError as e:
+                        self.failures += 1
+                        logging.error(f"Failed to save {path}: {e}")
+                done = max(done, sequence)
+            with self.condition:
+                if retry:
+                    self.retries += len(retry)
+                    for path, entry in retry.items():
+                        # A newer save of the path supersedes the retry.
+                        self.pending.setdefault(path, entry)
+                    done = min(done, min(sequence for _, sequence in retry.values()) - 1)
+                # A batch takes every pending save, so each save up to its newest one has now been
+                # written, superseded by a newer save in the batch, or completed earlier; only the
+                # ones queued again are not done yet.
+                self.completed = max(self.completed, done)
+                self.condition.notify_all()
@@ -0,0 +1,62 @@
+"""
+Fixed-rate tick scheduling for continuous analog actions.
+
+Held sticks should move the cursor at a steady rate whether the controller sends
+one axis event or a hundred. The scheduler hands out ticks on absolute deadlines
+from `perf_counter_ns`, so the rate does not drift with loop jitter, and skips
+ticks it could not serve in time instead of bursting to catch up.
+"""
+from time import perf_counter_ns
+
+DEFAULT_TICK_RATE_HZ = 500
+
+class TickScheduler:
+    """
+    Attributes:
+        interval_ns (int): Nanoseconds between ticks.
+        next_deadline (int): `perf_counter_ns` time of the next tick.
+        last_tick (int): Time of the last tick that was served.
+        ticks (int): Ticks served since start.
+        missed (int): Ticks skipped because the loop was late by more than one interval.
+    """
+    __slots__ = ('interval_ns', 'next_deadline', 'last_tick', 'ticks', 'missed')
+
+    def __init__(self, rate_hz=DEFAULT_TICK_RATE_HZ):
+        if rate_hz <= 0:
+            raise ValueError(f"Tick rate must be positive, got {rate_hz}.")
+        self.interval_ns = int(1e9 / rate_hz)
+        self.next_deadline = self.last_tick = perf_counter_ns()
+        self.ticks = 0
+        self.missed = 0
+
+    def start(self, now_ns=None):
+        """
+        Makes the next tick due immediately, e.g. when a stick leaves its deadzone.
+        """
+        now_ns = perf_counter_ns() if now_ns is None else now_ns
+        self.next_deadline = now_ns
+        self.last_tick = now_ns - self.interval_ns
+
+    def timeout_ms(self, now_ns):
+        """
+        Milliseconds until the next tick is due, 0 if it already is.
+        """
+        remaining = self.next_deadline - now_ns
+        return 0 if remaining <= 0 else -(-remaining // 1_000_000)
+
+    def poll(self, now_ns):
+        """
+        Returns the seconds since the last served tick if a tick is due, otherwise 0.0.
+
+        The next deadline advances by whole intervals from the previous one, so ticks stay
+        on the configured grid even when the loop wakes up a little late.
+        """
+        if now_ns < self.next_deadline:
+            return 0.0
+        behind = (now_ns - self.next_deadline) // self.interval_ns
+        self.missed += behind
+        self.next_deadline += (behind + 1) * self.interval_ns
+        dt = (now_ns - self.last_tick) / 1e9
+        self.last_tick = now_ns
+        self.ticks += 1
+        return dt
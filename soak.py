@@ -0,0 +1,132 @@
+"""
+Memory and time stability checks for long soak runs.
+
+`SoakMonitor` samples resident memory, `tracemalloc` traced memory and the time the engine
+spends per event at a fixed interval. After a warm-up period it fits a line through the
+samples and fails the run when retained memory or per-event time keeps trending upward.
+"""
+import os
+import sys
+import tracemalloc
+
+def current_rss_bytes():
+    """
+    Resident set size of this process. Uses /proc on Linux and falls back to the peak RSS
+    from `resource` elsewhere.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def linear_slope(xs, ys):
+    """
+    Least-squares slope of ys over xs, 0.0 for fewer than two points.
+    """
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if not variance:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+class SoakMonitor:
+    """
+    Attributes:
+        samples (list): One dict per interval: t, events, rss_bytes, traced_bytes, ns_per_event.
+    """
+    def __init__(self, duration_s, sample_interval_s=1.0, warmup_fraction=0.2, max_memory_growth_mb=1.0,
+                 max_rss_growth_mb=8.0, max_time_growth=0.5, top=10):
+        self.duration_s = duration_s
+        self.sample_interval_s = sample_interval_s
+        self.warmup_fraction = warmup_fraction
+        self.max_memory_growth_bytes = max_memory_growth_mb * 1024 * 1024
+        self.max_rss_growth_bytes = max_rss_growth_mb * 1024 * 1024
+        self.max_time_growth = max_time_growth
+        self.top = top
+        self.samples = []
+        self.baseline = None
+        self.started_tracing = False
+        self.start = None
+        self.next_sample = None
+        self.events = 0
+        self.busy_ns = 0
+
+    def begin(self, now):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.start = now
+        self.next_sample = now + self.sample_interval_s
+
+    def record(self, events, busy_ns, now):
+        """
+        Adds the events processed since the last call and the nanoseconds the engine spent on
+        them, taking a sample whenever an interval has passed.
+        """
+        self.events += events
+        self.busy_ns += busy_ns
+        if now < self.next_sample:
+            return
+        self.samples.append({
+            't': round(now - self.start, 3),
+            'events': self.events,
+            'rss_bytes': current_rss_bytes(),
+            'traced_bytes': tracemalloc.get_traced_memory()[0],
+            'ns_per_event': round(self.busy_ns / self.events, 1) if self.events else 0.0
+        })
+        if self.baseline is None and now - self.start >= self.duration_s * self.warmup_fraction:
+            self.baseline = tracemalloc.take_snapshot()
+        self.events = 0
+        self.busy_ns = 0
+        self.next_sample += self.sample_interval_s
+
+    def finish(self):
+        """
+        Returns:
+            dict: The verdict ('passed'), the projected growth over the measured part of the run,
+            the largest allocation growths since the end of warm-up and every sample.
+        """
+        measured = self.samples[int(len(self.samples) * self.warmup_fraction):]
+        times = [sample['t'] for sample in measured]
+        span = times[-1] - times[0] if len(times) > 1 else 0.0
+        traced_growth = linear_slope(times, [sample['traced_bytes'] for sample in measured]) * span
+        rss_growth = linear_slope(times, [sample['rss_bytes'] for sample in measured]) * span
+        timed = [(sample['t'], sample['ns_per_event']) for sample in measured if sample['events']]
+        mean_time = sum(ns for _, ns in timed) / len(timed) if timed else 0.0
+        time_growth = 0.0
+        if mean_time:
+            time_growth = linear_slope([t for t, _ in timed], [ns for _, ns in timed]) * span / mean_time
+
+        failures = []
+        if traced_growth > self.max_memory_growth_bytes:
+            failures.append(f"traced memory grew by {traced_growth / 1024:.0f} KiB")
+        if rss_growth > self.max_rss_growth_bytes:
+            failures.append(f"RSS grew by {rss_growth / 1024:.0f} KiB")
+        if time_growth > self.max_time_growth:
+            failures.append(f"time per event grew by {time_growth:.0%}")
+
+        top_growth = []
+        if self.baseline is not None:
+            final = tracemalloc.take_snapshot()
+            for stat in final.compare_to(self.baseline, 'lineno')[:self.top]:
+                top_growth.append({'location': str(stat.traceback), 'size_diff_bytes': stat.size_diff,
+                                   'count_diff': stat.count_diff})
+        if self.started_tracing:
+            tracemalloc.stop()
+        return {
+            'passed': not failures,
+            'failures': failures,
+            'traced_growth_bytes': round(traced_growth),
+            'rss_growth_bytes': round(rss_growth),
+            'time_per_event_growth': round(time_growth, 3),
+            'top_allocation_growth': top_growth,
+            'samples': self.samples
+        }
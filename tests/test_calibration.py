@@ -0,0 +1,118 @@
+# test_calibration.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import calibration
+
+CONFIG = {
+    'calibration': {
+        'deadzone': {'0': 0.2, '4': 0.05},
+        'axes': {
+            '0': {'min': -0.99, 'max': 0.93},
+            '4': {'min': -3.0, 'max': 1.0}
+        },
+        'sticks': []
+    }
+}
+
+class TestCalibration(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.compiled = calibration.compile_calibration(CONFIG)
+
+    def test_tables_match_calculate_axis_value(self):
+        for raw in range(-32768, 32768, 97):
+            value = raw / 32767.0
+            for axis in (0, 4):
+                self.assertEqual(calibration.evaluate_axis(self.compiled, axis, value),
+                                 calibration.calculate_axis_value(value, axis, CONFIG))
+
+    def test_uncalibrated_axis_passes_raw_value(self):
+        self.assertEqual(calibration.evaluate_axis(self.compiled, 2, 0.5), 0.5)
+        self.assertEqual(calibration.evaluate_axis(self.compiled, 40, 0.5), 0.5)
+
+    def test_out_of_range_values_are_clamped(self):
+        self.assertEqual(calibration.evaluate_axis(self.compiled, 0, 5.0), 1.0)
+        self.assertEqual(calibration.evaluate_axis(self.compiled, 0, -5.0), -1.0)
+
+    def test_power_curve(self):
+        curve = calibration.make_response_curve({'type': 'power', 'exponent': 2.0})
+        self.assertAlmostEqual(curve(0.5), 0.25)
+        self.assertAlmostEqual(curve(-0.5), -0.25)
+        with self.assertRaises(ValueError):
+            calibration.make_response_curve({'type': 'wobbly'})
+
+    def test_tables_rebuild_only_when_calibration_changes(self):
+        same = calibration.get_compiled_calibration(CONFIG, self.compiled)
+        self.assertIs(same, self.compiled)
+        changed = {'calibration': dict(CONFIG['calibration'], deadzone={'0': 0.5})}
+        rebuilt = calibration.get_compiled_calibration(changed, self.compiled)
+        self.assertIsNot(rebuilt, self.compiled)
+        self.assertEqual(calibration.evaluate_axis(rebuilt, 0, 0.4), 0.0)
+
+    def test_packed_tables_round_trip(self):
+        packed = calibration.pack_tables(self.compiled)
+        self.assertIsNone(packed[2])
+        restored = calibration.compile_calibration(CONFIG, calibration.unpack_tables(packed))
+        self.assertEqual(restored['key'], self.compiled['key'])
+        self.assertEqual(restored['tables'][0], self.compiled['tables'][0])
+        self.assertEqual(calibration.evaluate_axis(restored, 4, 0.3), calibration.evaluate_axis(self.compiled, 4, 0.3))
+        with self.assertRaises(ValueError):
+            calibration.unpack_tables([packed[0][:-8]])
+
+    def test_s_curve_and_points_curve(self):
+        s_curve = calibration.make_response_curve({'type': 's_curve', 'strength': 1.0})
+        self.assertAlmostEqual(s_curve(0.5), 0.5)
+        self.assertLess(s_curve(0.2), 0.2)
+        self.assertAlmostEqual(s_curve(-1.0), -1.0)
+        points = calibration.make_response_curve({'type': 'points', 'points': [[0, 0], [0.5, 0.2], [1, 1]]})
+        self.assertAlmostEqual(points(0.25), 0.1)
+        self.assertAlmostEqual(points(-0.75), -0.6)
+
+class TestStickPipeline(unittest.TestCase):
+
+    def test_scaled_radial_deadzone(self):
+        stick = calibration.StickPipeline(0, 1, 'scaled_radial', inner=0.2, outer=0.2)
+        self.assertEqual(stick.process(0.1, 0.1), (0.0, 0.0))
+        x, y = stick.process(0.5, 0.0)
+        self.assertAlmostEqual(x, 0.5)
+        self.assertEqual(y, 0.0)
+        x, y = stick.process(0.9, 0.9)
+        self.assertAlmostEqual(x, y)
+        self.assertAlmostEqual((x * x + y * y) ** 0.5, 1.0)
+
+    def test_radial_keeps_direction_and_magnitude(self):
+        stick = calibration.StickPipeline(0, 1, 'radial', inner=0.3)
+        self.assertEqual(stick.process(0.2, -0.2), (0.0, 0.0))
+        x, y = stick.process(0.3, -0.4)
+        self.assertAlmostEqual(x, 0.3)
+        self.assertAlmostEqual(y, -0.4)
+
+    def test_axial_uses_per_axis_deadzone(self):
+        stick = calibration.StickPipeline(2, 3, 'axial', inner=0.3, x_deadzone=0.1, y_deadzone=0.3)
+        self.assertEqual(stick.process(0.2, 0.2), (0.2, 0.0))
+
+    def test_compile_sticks_from_config(self):
+        config = {'calibration': {'deadzone': {'0': 0.3, '1': 0.2}, 'axes': {}}}
+        sticks = calibration.compile_sticks(config)
+        self.assertEqual([(s.x_axis, s.y_axis) for s in sticks], [(0, 1), (2, 3)])
+        self.assertEqual(sticks[0].inner, 0.3)
+        with self.assertRaises(ValueError):
+            calibration.compile_sticks({'calibration': {'sticks': [{'axes': [0, 1], 'deadzone_type': 'square'}]}})
+        with self.assertRaises(ValueError):
+            calibration.compile_sticks({'calibration': {'sticks': [{'axes': [0, 1], 'deadzone': 0.9, 'outer_deadzone': 0.2}]}})
+
+    def test_stick_tables_only_normalize(self):
+        config = {'calibration': {'deadzone': {'0': 0.3}, 'axes': {'0': {'min': -1.0, 'max': 1.0}}}}
+        compiled = calibration.compile_calibration(config)
+        self.assertEqual(compiled['stick_axes'], 0b1111)
+        self.assertAlmostEqual(calibration.evaluate_axis(compiled, 0, 0.2), 0.2, places=4)
+
+if __name__ == '__main__':
+    unittest.main()
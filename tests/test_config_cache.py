@@ -0,0 +1,106 @@
+# test_config_cache.py
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config_cache
+from config_cache import get_snapshot_path, load_with_snapshot, read_snapshot
+
+class CountingCompiler:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, documents, previous):
+        self.calls.append(previous)
+        return {'profiles': len(documents['config']['profiles']), 'tables': [b'\x00' * 8, None]}
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.directory.name, 'config.json')
+        self.layout_path = os.path.join(self.directory.name, 'layout.json')
+        self.write(self.config_path, {'profiles': [{'name': 'Default'}]})
+        self.write(self.layout_path, {'buttons': {'0': 'A'}})
+        self.paths = {'config': self.config_path, 'layout': self.layout_path}
+        self.snapshot_path = get_snapshot_path(self.config_path)
+        self.compile = CountingCompiler()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, path, document, mtime_ns=None):
+        with open(path, 'w') as file:
+            json.dump(document, file)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def load(self):
+        return load_with_snapshot(self.paths, self.snapshot_path, self.compile)
+
+    def test_snapshot_path_is_next_to_the_config(self):
+        self.assertEqual(self.snapshot_path, os.path.join(self.directory.name, 'config.snapshot'))
+
+    def test_warm_start_uses_snapshot(self):
+        documents, compiled, warm = self.load()
+        self.assertFalse(warm)
+        self.assertEqual(documents['layout'], {'buttons': {'0': 'A'}})
+        self.assertEqual(compiled, {'profiles': 1, 'tables': [b'\x00' * 8, None]})
+        documents, compiled, warm = self.load()
+        self.assertTrue(warm)
+        self.assertEqual(documents['config'], {'profiles': [{'name': 'Default'}]})
+        self.assertEqual(compiled['profiles'], 1)
+        self.assertEqual(self.compile.calls, [None])
+
+    def test_edit_invalidates_snapshot(self):
+        self.load()
+        self.write(self.config_path, {'profiles': [{'name': 'Default'}, {'name': 'Game'}]})
+        documents, compiled, warm = self.load()
+        self.assertFalse(warm)
+        self.assertEqual(len(documents['config']['profiles']), 2)
+        self.assertEqual(compiled['profiles'], 2)
+        self.assertEqual(self.compile.calls[-1]['profiles'], 1)
+        self.assertTrue(self.load()[2])
+
+    def test_touch_without_edit_keeps_compiled_data(self):
+        self.load()
+        os.utime(self.layout_path, ns=(1, 1))
+        documents, compiled, warm = self.load()
+        self.assertFalse(warm)
+        self.assertEqual(len(self.compile.calls), 1)
+        self.assertEqual(read_snapshot(self.snapshot_path)['files']['layout']['mtime_ns'], 1)
+        self.assertTrue(self.load()[2])
+
+    def test_corrupt_or_foreign_snapshot_is_rebuilt(self):
+        self.load()
+        with open(self.snapshot_path, 'r+b') as file:
+            file.write(b'XXXX')
+        self.assertIsNone(read_snapshot(self.snapshot_path))
+        self.assertFalse(self.load()[2])
+        with open(self.snapshot_path, 'r+b') as file:
+            file.seek(config_cache.HEADER.size)
+            file.write(b'\xff\xff')
+        self.assertFalse(self.load()[2])
+        self.assertEqual(len(self.compile.calls), 3)
+
+    def test_missing_or_invalid_file(self):
+        os.remove(self.layout_path)
+        documents, compiled, warm = self.load()
+        self.assertIs(documents['layout'], False)
+        self.assertIsNone(compiled)
+        self.assertFalse(os.path.exists(self.snapshot_path))
+        with open(self.layout_path, 'w') as file:
+            file.write('{not json')
+        self.assertIs(self.load()[0]['layout'], False)
+
+    def test_loads_json_accepts_bytes(self):
+        self.assertEqual(config_cache.loads_json(b'{"a": [1, 2.5, null]}'), {'a': [1, 2.5, None]})
+
+if __name__ == '__main__':
+    unittest.main()
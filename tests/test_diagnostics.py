@@ -0,0 +1,103 @@
+# test_diagnostics.py
+
+import sys
+import os
+import logging
+import tempfile
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from diagnostics import Diagnostics, DiagnosticsHandler, RingBuffer, install_diagnostics
+
+class CountingRepr:
+    def __init__(self):
+        self.calls = 0
+
+    def __repr__(self):
+        self.calls += 1
+        return 'counted'
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_keeps_the_last_entries_in_order(self):
+        ring = RingBuffer(3)
+        for i in range(2):
+            ring.append(i)
+        self.assertEqual(ring.snapshot(), [0, 1])
+        for i in range(2, 7):
+            ring.append(i)
+        self.assertEqual(ring.snapshot(), [4, 5, 6])
+        self.assertEqual(len(ring), 3)
+        ring.clear()
+        self.assertEqual(ring.snapshot(), [])
+
+    def test_rejects_empty_ring(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+class TestDiagnostics(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'diagnostics.log')
+        self.diagnostics = Diagnostics(buffer_size=4, verbose=True, dump_path=self.path)
+        self.logger = logging.getLogger(f"test_diagnostics.{self.id()}")
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.handlers.clear()
+        self.directory.cleanup()
+
+    def read_dump(self):
+        with open(self.path) as file:
+            return file.read().splitlines()
+
+    def test_formats_only_when_dumped(self):
+        value = CountingRepr()
+        self.diagnostics.record("axis %d = %r", 2, value)
+        self.assertEqual(value.calls, 0)
+        self.assertEqual(self.diagnostics.dump("test"), self.path)
+        self.assertEqual(value.calls, 1)
+        lines = self.read_dump()
+        self.assertIn('test, 1 entries', lines[0])
+        self.assertTrue(lines[1].endswith('TRACE    axis 2 = counted'))
+        self.assertEqual(len(self.diagnostics.ring), 0)
+
+    def test_bad_template_is_still_dumped(self):
+        self.diagnostics.record("axis %d", "not a number")
+        self.diagnostics.dump()
+        self.assertIn('format error', self.read_dump()[1])
+
+    def test_error_log_dumps_recent_records_once_per_interval(self):
+        self.logger.addHandler(DiagnosticsHandler(self.diagnostics))
+        self.logger.setLevel(logging.INFO)
+        self.logger.info("loaded %s", "config.json")
+        self.diagnostics.record("button %d pressed", 3)
+        self.logger.error("injection failed")
+        self.logger.error("injection failed again")
+        lines = self.read_dump()
+        self.assertEqual(self.diagnostics.dumps, 1)
+        self.assertIn('error: injection failed, 3 entries', lines[0])
+        self.assertTrue(lines[1].endswith('INFO     loaded config.json'))
+        self.assertTrue(lines[3].endswith('ERROR    injection failed'))
+        self.assertEqual(len(self.diagnostics.ring), 1)
+
+    def test_verbose_install_keeps_existing_handlers_at_info(self):
+        console = logging.StreamHandler()
+        self.logger.addHandler(console)
+        handler = install_diagnostics(self.diagnostics, self.logger)
+        install_diagnostics(self.diagnostics, self.logger)
+        self.assertEqual(self.logger.level, logging.DEBUG)
+        self.assertEqual(console.level, logging.INFO)
+        self.assertEqual(sum(isinstance(h, DiagnosticsHandler) for h in self.logger.handlers), 1)
+        self.assertNotIn(handler, self.logger.handlers)
+
+    def test_configure_resizes_ring(self):
+        self.diagnostics.configure({'buffer_size': 16, 'verbose': False})
+        self.assertEqual(self.diagnostics.ring.capacity, 16)
+        self.assertFalse(self.diagnostics.verbose)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# test_event_loop.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+import event_loop
+
+class TestEventLoop(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        event_loop.restrict_event_queue()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.event.set_allowed(None)
+        pg.quit()
+
+    def test_loop_settings_defaults(self):
+        settings = event_loop.get_loop_settings({})
+        self.assertEqual(settings, event_loop.DEFAULT_LOOP_SETTINGS)
+
+    def test_loop_settings_override_and_invalid_mode(self):
+        settings = event_loop.get_loop_settings({'input_loop': {'mode': 'spin', 'idle_timeout_ms': 100}})
+        self.assertEqual(settings['mode'], 'wait')
+        self.assertEqual(settings['idle_timeout_ms'], 100)
+
+    def test_adaptive_wait_timeout_grows_when_idle(self):
+        waiter = event_loop.AdaptiveWait(active_timeout_ms=5, idle_timeout_ms=200, idle_after_s=1.0)
+        now = waiter.last_event_time
+        self.assertEqual(waiter.timeout_ms(now + 0.5), 5)
+        self.assertEqual(waiter.timeout_ms(now + 1.5), 200)
+
+    def test_adaptive_wait_returns_all_pending_events(self):
+        waiter = event_loop.AdaptiveWait(active_timeout_ms=5, idle_timeout_ms=5, idle_after_s=0.0)
+        self.assertEqual(waiter(), [])
+        pg.event.post(pg.event.Event(pg.JOYBUTTONDOWN, button=1, joy=0, instance_id=0))
+        pg.event.post(pg.event.Event(pg.JOYBUTTONUP, button=1, joy=0, instance_id=0))
+        events = waiter()
+        self.assertEqual([e.type for e in events], [pg.JOYBUTTONDOWN, pg.JOYBUTTONUP])
+
+    def test_restricted_queue_drops_other_events(self):
+        pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_a))
+        self.assertEqual(event_loop.poll_events(), [])
+
+    def test_coalesce_axis_events_keeps_last_value_and_button_order(self):
+        def axis(instance_id, axis, value):
+            return pg.event.Event(pg.JOYAXISMOTION, instance_id=instance_id, joy=instance_id, axis=axis, value=value)
+
+        down = pg.event.Event(pg.JOYBUTTONDOWN, instance_id=0, joy=0, button=2)
+        up = pg.event.Event(pg.JOYBUTTONUP, instance_id=0, joy=0, button=2)
+        events = [axis(0, 0, 0.1), down, axis(0, 0, 0.2), axis(1, 0, 0.5), axis(0, 1, -0.3), up, axis(0, 0, 0.4)]
+        kept, axis_events, coalesced = event_loop.coalesce_axis_events(events)
+        self.assertEqual(axis_events, 5)
+        self.assertEqual(coalesced, 2)
+        self.assertEqual(kept, [down, events[3], events[4], up, events[6]])
+
+    def test_coalesce_axis_events_single_event(self):
+        event = pg.event.Event(pg.JOYAXISMOTION, instance_id=0, joy=0, axis=4, value=1.0)
+        self.assertEqual(event_loop.coalesce_axis_events([event]), ([event], 1, 0))
+
+if __name__ == '__main__':
+    unittest.main()
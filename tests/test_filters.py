@@ -0,0 +1,72 @@
+# test_filters.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import filters
+
+def step_response(smooth, samples=50, rate_hz=500):
+    """Feeds a 0 -> 1 step and returns the filter output for each sample after the step."""
+    dt = 1.0 / rate_hz
+    smooth(0.0, 0.0)
+    return [smooth(1.0, (i + 1) * dt) for i in range(samples)]
+
+class TestFilters(unittest.TestCase):
+
+    def test_moving_average_step_lag(self):
+        outputs = step_response(filters.MovingAverage(5), samples=8)
+        # One zero sample is still in the window until the fifth step sample.
+        self.assertAlmostEqual(outputs[0], 0.5)
+        self.assertLess(outputs[3], 1.0)
+        self.assertEqual(outputs[4:], [1.0] * 4)
+
+    def test_moving_average_matches_window_mean(self):
+        average = filters.MovingAverage(3)
+        values = [0.3, -0.7, 0.1, 0.9, 0.25, -0.4, 0.6]
+        for i, value in enumerate(values):
+            window = values[max(0, i - 2):i + 1]
+            self.assertAlmostEqual(average(value), sum(window) / len(window))
+
+    def test_ema_step_lag(self):
+        alpha = 0.25
+        outputs = step_response(filters.ExponentialMovingAverage(alpha), samples=10)
+        for n, output in enumerate(outputs, start=1):
+            self.assertAlmostEqual(output, 1.0 - (1.0 - alpha) ** n)
+
+    def test_ema_time_constant(self):
+        ema = filters.ExponentialMovingAverage(time_constant_s=0.01)
+        ema(0.0, 0.0)
+        # After one time constant the output covers 1 - 1/e of the step, whatever the sample rate.
+        self.assertAlmostEqual(ema(1.0, 0.01), 0.6321, places=4)
+
+    def test_one_euro_beta_reduces_lag(self):
+        still = step_response(filters.OneEuroFilter(min_cutoff=1.0, beta=0.0))
+        adaptive = step_response(filters.OneEuroFilter(min_cutoff=1.0, beta=1.0))
+        self.assertGreater(adaptive[4], still[4])
+        self.assertLess(still[-1], 0.5)
+        self.assertGreater(adaptive[-1], 0.9)
+
+    def test_filter_axis_releases_immediately(self):
+        average = filters.MovingAverage(5)
+        for _ in range(5):
+            filters.filter_axis(average, 1.0, 0.0)
+        self.assertEqual(filters.filter_axis(average, 0.0, 0.0), 0.0)
+        self.assertAlmostEqual(filters.filter_axis(average, 1.0, 0.0), 1.0)
+
+    def test_make_filter(self):
+        self.assertIsInstance(filters.make_filter({'type': 'one_euro', 'beta': 0.05}), filters.OneEuroFilter)
+        self.assertIsNone(filters.make_filter({'type': 'none'}))
+        self.assertIsNone(filters.make_filter(None))
+        with self.assertRaises(ValueError):
+            filters.make_filter({'type': 'kalman'})
+        with self.assertRaises(ValueError):
+            filters.make_filter({'type': 'ema', 'window': 3})
+        with self.assertRaises(ValueError):
+            filters.make_filter({'type': 'moving_average', 'window': 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+# test_injector.py
+
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from injector import Injector
+from output_backends import KEYBOARD, MOUSE, RELEASE, RecordingBackend
+from tracing import INJECT, StageTracer
+
+class GatedBackend(RecordingBackend):
+    """Holds the injector thread on every event until the gate opens."""
+    def __init__(self, gate):
+        super().__init__()
+        self.gate = gate
+
+    def press(self, device, key):
+        self.gate.wait()
+        super().press(device, key)
+
+    def release(self, device, key):
+        self.gate.wait()
+        super().release(device, key)
+
+    def move(self, dx, dy):
+        self.gate.wait()
+        super().move(dx, dy)
+
+    def scroll(self, dx, dy):
+        self.gate.wait()
+        super().scroll(dx, dy)
+
+class TestInjector(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = threading.Event()
+        self.backend = GatedBackend(self.gate)
+        self.injector = Injector(self.backend, capacity=4)
+
+    def tearDown(self):
+        self.gate.set()
+        self.injector.stop()
+
+    def keys(self, op):
+        return [key for name, _, key, _ in self.backend.actions() if name == op]
+
+    def test_runs_inline_until_started(self):
+        self.gate.set()
+        self.injector.mouse.move(1, 2)
+        self.assertEqual(self.backend.actions(), [('move', MOUSE, 1, 2)])
+        self.assertEqual(self.injector.depth, 0)
+
+    def test_moves_merge_while_consumer_is_behind(self):
+        self.injector.start()
+        self.injector.keyboard.press('a')
+        for _ in range(10):
+            self.injector.mouse.move(1, -1)
+        self.injector.mouse.scroll(0, 1)
+        self.injector.mouse.scroll(0, 2)
+        self.assertEqual(self.injector.merged, 10)
+        self.gate.set()
+        self.injector.stop()
+        self.assertEqual(self.keys('press'), ['a'])
+        moves = [action for action in self.backend.actions() if action[0] == 'move']
+        self.assertEqual(sum(dx for _, _, dx, _ in moves), 10)
+        self.assertEqual(sum(dy for _, _, _, dy in moves), -10)
+        self.assertEqual(self.backend.actions()[-1], ('scroll', MOUSE, 0, 3))
+
+    def test_full_queue_drops_presses_but_never_releases(self):
+        self.injector.start()
+        for key in 'abcdefg':
+            self.injector.keyboard.press(key)
+        self.assertGreater(self.injector.dropped, 0)
+        self.assertLessEqual(len(self.injector.queue), 4)
+        # A dropped press is not recorded as held, so it gets no release either.
+        self.assertFalse(self.injector.output.is_held('g'))
+        for key in 'abcdefg':
+            self.injector.keyboard.release(key)
+        self.gate.set()
+        self.injector.stop()
+        self.assertEqual(self.keys('release'), self.keys('press'))
+        self.assertEqual(self.injector.stats()['held'], 0)
+
+    def test_full_queue_never_drops_a_combination_with_releases(self):
+        self.injector.start()
+        self.injector.keyboard.press('ctrl')
+        for key in 'abcdefg':
+            self.injector.keyboard.press(key)
+        self.injector.press_combination([(KEYBOARD, 'ctrl'), (KEYBOARD, 'c')])
+        self.assertFalse(self.injector.output.is_held('ctrl'))
+        self.gate.set()
+        self.injector.stop()
+        self.assertEqual(self.backend.batches, 1)
+        self.assertIn('ctrl', self.keys('release'))
+
+    def test_release_skips_moves_but_not_presses(self):
+        self.injector.start()
+        self.injector.mouse.move(5, 0)
+        self.injector.mouse.scroll(0, 1)
+        self.injector.post(RELEASE, KEYBOARD, 'z')
+        self.injector.keyboard.press('y')
+        self.injector.post(RELEASE, KEYBOARD, 'w')
+        self.gate.set()
+        self.injector.stop()
+        actions = [(name, key) for name, _, key, _ in self.backend.actions()]
+        # Nothing was pressed ahead of 'z', so its release overtakes the queued scroll; 'w' waits for 'y'.
+        self.assertLess(actions.index(('release', 'z')), actions.index(('scroll', 0)))
+        self.assertLess(actions.index(('press', 'y')), actions.index(('release', 'w')))
+        self.assertEqual(self.injector.depth, 0)
+
+    def test_modifier_release_stays_behind_queued_press(self):
+        self.gate.set()
+        self.injector.keyboard.press('alt')
+        self.gate.clear()
+        self.injector.start()
+        self.injector.mouse.move(1, 0)
+        self.injector.keyboard.press('a')
+        self.injector.keyboard.release('alt')
+        self.injector.keyboard.release('a')
+        self.gate.set()
+        self.injector.stop()
+        actions = [(name, key) for name, _, key, _ in self.backend.actions() if name != 'move']
+        self.assertEqual(actions, [('press', 'alt'), ('press', 'a'), ('release', 'alt'), ('release', 'a')])
+        self.assertEqual(self.injector.depth, 0)
+
+    def test_redundant_presses_are_suppressed_and_release_all(self):
+        self.gate.set()
+        for _ in range(100):
+            self.injector.keyboard.press('right')
+            self.injector.keyboard.release('left')
+        self.injector.keyboard.press('cmd')
+        self.assertEqual(self.keys('press'), ['right', 'cmd'])
+        self.injector.release_all()
+        self.assertEqual(self.keys('release'), ['cmd', 'right'])
+        self.assertEqual(self.injector.stats()['held'], 0)
+
+    def test_combination_is_emitted_as_one_batch(self):
+        self.injector.start()
+        self.injector.keyboard.press('shift')
+        self.injector.press_combination([(KEYBOARD, 'ctrl'), (KEYBOARD, 'c'), (MOUSE, 'left')])
+        self.gate.set()
+        self.injector.stop()
+        self.assertEqual(self.backend.batches, 1)
+        self.assertEqual(self.keys('press'), ['shift', 'ctrl', 'c', 'left'])
+        self.assertEqual(self.keys('release'), ['left', 'c', 'ctrl'])
+        self.assertTrue(self.injector.output.is_held('shift'))
+
+    def test_wait_idle_returns_once_drained(self):
+        self.injector.start()
+        for key in 'abc':
+            self.injector.keyboard.press(key)
+        self.assertFalse(self.injector.wait_idle(0.01))
+        self.gate.set()
+        self.assertTrue(self.injector.wait_idle(1.0))
+        self.assertEqual(self.keys('press'), ['a', 'b', 'c'])
+
+    def test_tracer_times_every_command(self):
+        self.gate.set()
+        tracer = StageTracer()
+        self.injector.tracer = tracer
+        self.injector.keyboard.press('a')
+        self.injector.start()
+        self.injector.keyboard.release('a')
+        self.assertTrue(self.injector.wait_idle(1.0))
+        self.assertEqual(tracer.summary()[INJECT]['count'], 2)
+
+class TestOutputBackends(unittest.TestCase):
+
+    def test_recording_backend_timestamps_events(self):
+        ticks = iter(range(100, 1000, 100))
+        backend = RecordingBackend(clock=lambda: next(ticks))
+        injector = Injector(backend)
+        injector.keyboard.press('a')
+        injector.mouse.move(3, 4)
+        self.assertEqual(backend.events, [(100, 'press', KEYBOARD, 'a', None), (200, 'move', MOUSE, 3, 4)])
+
+    def test_make_backend(self):
+        from output_backends import NullBackend, make_backend
+        self.assertIsInstance(make_backend('null'), NullBackend)
+        with self.assertRaises(ValueError):
+            make_backend('uinput')
+
+    def test_incomplete_backend_fails_on_construction(self):
+        from output_backends import BACKENDS, OutputBackend, make_backend
+
+        class KeyboardOnlyBackend(OutputBackend):
+            def press(self, device, key):
+                pass
+
+            def release(self, device, key):
+                pass
+
+        with patch.dict(BACKENDS, keyboard_only=KeyboardOnlyBackend):
+            with self.assertRaises(TypeError):
+                make_backend('keyboard_only')
+
+if __name__ == '__main__':
+    unittest.main()
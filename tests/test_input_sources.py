@@ -0,0 +1,106 @@
+# test_input_sources.py
+
+import sys
+import os
+import unittest
+from time import perf_counter
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pygame as pg
+
+from input_sources import PygameSource, ScriptedSource, TimeLimitedSource, make_input_source
+
+class TestScriptedSource(unittest.TestCase):
+
+    def drain(self, source):
+        events = []
+        while not source.finished:
+            events.extend(source())
+        return events
+
+    def test_generates_requested_number_of_events(self):
+        source = ScriptedSource(rate_hz=2000, max_events=500, seed=1, realtime=False)
+        events = self.drain(source)
+        self.assertEqual(len(events), 500)
+        self.assertTrue(source.finished)
+        self.assertEqual(source(), [])
+
+    def test_same_seed_same_stream(self):
+        first = self.drain(ScriptedSource(duration_s=0.5, seed=7, realtime=False))
+        second = self.drain(ScriptedSource(duration_s=0.5, seed=7, realtime=False))
+        self.assertEqual([(e.type, e.dict) for e in first], [(e.type, e.dict) for e in second])
+
+    def test_axis_values_are_noisy_quantized_and_in_range(self):
+        source = ScriptedSource(buttons=(), duration_s=1.0, seed=3, realtime=False)
+        values = [event.value for event in self.drain(source) if event.type == pg.JOYAXISMOTION]
+        self.assertTrue(all(-1.0 <= value <= 1.0 for value in values))
+        self.assertTrue(all(round(value * 32767) == value * 32767 for value in values[:100]))
+        self.assertGreater(len(set(values)), len(values) // 2)
+
+    def test_buttons_are_pressed_and_released_in_pairs(self):
+        source = ScriptedSource(buttons=(0, 1), press_rate_hz=5.0, duration_s=5.0, seed=5, realtime=False)
+        held = set()
+        presses = 0
+        for event in self.drain(source):
+            if event.type == pg.JOYBUTTONDOWN:
+                self.assertNotIn(event.button, held)
+                held.add(event.button)
+                presses += 1
+            elif event.type == pg.JOYBUTTONUP:
+                self.assertIn(event.button, held)
+                held.discard(event.button)
+        self.assertGreater(presses, 20)
+
+    def test_hotplug_reconnects_with_new_instance_id(self):
+        source = ScriptedSource(hats=(), hotplug_interval_s=0.1, duration_s=0.35, seed=2, realtime=False)
+        events = self.drain(source)
+        removed = [event.instance_id for event in events if event.type == pg.JOYDEVICEREMOVED]
+        added = [event.instance_id for event in events if event.type == pg.JOYDEVICEADDED]
+        self.assertEqual(removed, [0, 1, 2])
+        self.assertEqual(added, [1, 2, 3])
+        self.assertEqual(source.hotplugs, 3)
+        last_added = max(i for i, event in enumerate(events) if event.type == pg.JOYDEVICEADDED)
+        self.assertTrue(all(event.instance_id == 3 for event in events[last_added:]))
+
+    def test_hats_move_and_return_to_centre(self):
+        source = ScriptedSource(buttons=(), hat_rate_hz=20.0, duration_s=2.0, seed=5, realtime=False)
+        values = [event.value for event in self.drain(source) if event.type == pg.JOYHATMOTION]
+        self.assertGreater(len(values), 10)
+        self.assertIn((0, 0), values)
+        self.assertTrue(any(value != (0, 0) for value in values))
+
+    def test_realtime_paces_events(self):
+        source = ScriptedSource(rate_hz=1000, duration_s=0.05, seed=2)
+        start = perf_counter()
+        events = []
+        while not source.finished:
+            events.extend(source(5))
+        self.assertGreaterEqual(perf_counter() - start, 0.04)
+        self.assertEqual(len(events), 50)
+
+    def test_time_limit(self):
+        source = TimeLimitedSource(ScriptedSource(rate_hz=1000, seed=1), 0.05)
+        self.assertIs(source.controller, source.source.controller)
+        start = perf_counter()
+        events = []
+        while not source.finished:
+            events.extend(source(5))
+        self.assertLess(perf_counter() - start, 0.5)
+        self.assertGreater(len(events), 10)
+
+    def test_make_input_source(self):
+        config = {'input': {'source': 'scripted', 'scripted': {'rate_hz': 250, 'seed': 1}}}
+        source = make_input_source(config, duration_s=1.0)
+        self.assertIsInstance(source, ScriptedSource)
+        self.assertEqual(source.duration_s, 1.0)
+        self.assertEqual(source.controller.get_numaxes(), 6)
+        self.assertIsInstance(make_input_source({'input_loop': {'mode': 'poll'}}), PygameSource)
+        with self.assertRaises(ValueError):
+            make_input_source(config, 'hid')
+        with self.assertRaises(ValueError):
+            make_input_source({'input': {'source': 'scripted', 'scripted': {'jitter': 1}}})
+
+if __name__ == '__main__':
+    unittest.main()
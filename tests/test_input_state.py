@@ -0,0 +1,79 @@
+# test_input_state.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from input_state import InputState, iter_bits
+
+class TestInputState(unittest.TestCase):
+
+    def test_iter_bits(self):
+        self.assertEqual(list(iter_bits(0)), [])
+        self.assertEqual(list(iter_bits(0b100101)), [0, 2, 5])
+        self.assertEqual(list(iter_bits(1 << 31)), [31])
+
+    def test_press_hold_release_edges(self):
+        state = InputState()
+        state.press_button(3)
+        self.assertTrue(state.has_changes())
+        self.assertEqual(state.take_button_edges(), (1 << 3, 0))
+        self.assertEqual(state.held_buttons, 1 << 3)
+        self.assertFalse(state.has_changes())
+
+        state.press_button(3)
+        self.assertFalse(state.has_changes())
+
+        state.release_button(3)
+        self.assertEqual(state.take_button_edges(), (0, 1 << 3))
+        self.assertEqual(state.held_buttons, 0)
+
+    def test_tap_inside_one_batch_is_not_lost(self):
+        state = InputState()
+        state.press_button(1)
+        state.release_button(1)
+        self.assertTrue(state.has_changes())
+        self.assertEqual(state.take_button_edges(), (1 << 1, 1 << 1))
+        self.assertEqual(state.take_button_edges(), (0, 0))
+
+    def test_press_release_press_inside_one_batch_stays_held(self):
+        state = InputState()
+        state.press_button(4)
+        state.release_button(4)
+        state.press_button(4)
+        self.assertEqual(state.take_button_edges(), (1 << 4, 0))
+        self.assertEqual(state.held_buttons, 1 << 4)
+        state.release_button(4)
+        self.assertEqual(state.take_button_edges(), (0, 1 << 4))
+
+    def test_release_without_press_is_ignored(self):
+        state = InputState()
+        state.release_button(7)
+        self.assertEqual(state.take_button_edges(), (0, 0))
+
+    def test_axes(self):
+        state = InputState(axis_count=6)
+        self.assertTrue(state.set_axis(5, 0.75))
+        self.assertFalse(state.set_axis(6, 1.0))
+        self.assertEqual(state.axes[5], 0.75)
+        self.assertEqual(state.take_dirty_axes(), 1 << 5)
+        self.assertEqual(state.take_dirty_axes(), 0)
+
+    def test_suppress_held_inputs(self):
+        state = InputState(axis_count=4)
+        state.press_button(2)
+        state.take_button_edges()
+        state.set_axis(1, -0.5)
+        state.set_axis(3, 0.0)
+        state.latched_axes = 1 << 1
+        state.suppress_held_inputs()
+        self.assertEqual(state.suppressed_buttons, 1 << 2)
+        self.assertEqual(state.suppressed_axes, 1 << 1)
+        self.assertEqual(state.previous_axes[1], -0.5)
+        self.assertEqual((state.dirty_axes, state.latched_axes), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
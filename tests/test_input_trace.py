@@ -0,0 +1,98 @@
+# test_input_trace.py
+
+import sys
+import os
+import tempfile
+import unittest
+from time import perf_counter
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pygame as pg
+
+import input_trace
+from input_sources import ScriptedSource
+
+EVENTS = [
+    pg.event.Event(pg.JOYDEVICEADDED, device_index=0, guid='abc'),
+    pg.event.Event(pg.JOYAXISMOTION, instance_id=0, joy=0, axis=2, value=-0.25),
+    pg.event.Event(pg.JOYBUTTONDOWN, instance_id=0, joy=0, button=7),
+    pg.event.Event(pg.JOYHATMOTION, instance_id=0, joy=0, hat=0, value=(-1, 1)),
+    pg.event.Event(pg.JOYBUTTONUP, instance_id=0, joy=0, button=7),
+    pg.event.Event(pg.JOYDEVICEREMOVED, instance_id=0),
+]
+
+class TestInputTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.trace')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, events, compress=False, step_ns=1_000_000):
+        with input_trace.TraceWriter(self.path, compress=compress, start_ns=0, buffer_size=64) as writer:
+            for i, event in enumerate(events):
+                writer.write_event(i * step_ns, event)
+            writer.write_event(0, pg.event.Event(pg.QUIT))
+        return writer
+
+    def test_round_trip_every_event_type(self):
+        writer = self.write(EVENTS)
+        self.assertEqual(writer.records, len(EVENTS))
+        self.assertEqual(os.path.getsize(self.path), input_trace.HEADER.size + len(EVENTS) * input_trace.RECORD.size)
+        records = list(input_trace.read_trace(self.path))
+        self.assertEqual([record[0] for record in records], [i * 1_000_000 for i in range(len(EVENTS))])
+        decoded = [input_trace.decode_event(*record[1:]) for record in records]
+        self.assertEqual([event.type for event in decoded], [event.type for event in EVENTS])
+        self.assertEqual(decoded[1].value, -0.25)
+        self.assertEqual(decoded[2].button, 7)
+        self.assertEqual(decoded[3].value, (-1, 1))
+
+    def test_hotplug_pair_is_keyed_by_instance_id(self):
+        self.write([pg.event.Event(pg.JOYDEVICEADDED, device_index=0, instance_id=3, guid='abc'),
+                    pg.event.Event(pg.JOYDEVICEREMOVED, instance_id=3)])
+        added, removed = [input_trace.decode_event(*record[1:]) for record in input_trace.read_trace(self.path)]
+        self.assertEqual(input_trace.get_instance_id(added), 3)
+        self.assertEqual(removed.instance_id, 3)
+
+    def test_compressed_trace_is_smaller_and_reads_back(self):
+        source = ScriptedSource(buttons=(), axes=(0,), noise=0.0, max_events=5000, seed=1, realtime=False)
+        events = []
+        while not source.finished:
+            events.extend(source())
+        self.write(events)
+        plain = list(input_trace.read_trace(self.path))
+        plain_size = os.path.getsize(self.path)
+        self.write(events, compress=True)
+        self.assertLess(os.path.getsize(self.path), plain_size)
+        self.assertEqual(list(input_trace.read_trace(self.path)), plain)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'{"profiles": []}')
+        with self.assertRaises(ValueError):
+            list(input_trace.read_trace(self.path))
+
+    def test_fast_replay_batches_by_millisecond(self):
+        self.write(EVENTS, step_ns=400_000)
+        source = input_trace.TraceSource(self.path, realtime=False)
+        batches = []
+        while not source.finished:
+            batches.append(source())
+        self.assertEqual([len(batch) for batch in batches], [3, 3])
+        self.assertEqual(source.replayed, len(EVENTS))
+
+    def test_realtime_replay_follows_recorded_timing(self):
+        self.write(EVENTS, step_ns=10_000_000)
+        source = input_trace.TraceSource(self.path, speed=2.0)
+        start = perf_counter()
+        while not source.finished:
+            source(100)
+        self.assertGreaterEqual(perf_counter() - start, 0.02)
+        self.assertEqual(source.replayed, len(EVENTS))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# test_latency.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from latency import percentile, summarize_latencies
+
+class TestLatency(unittest.TestCase):
+
+    def test_nearest_rank_percentiles(self):
+        samples = list(range(1, 101))
+        self.assertEqual([percentile(samples, q) for q in (0, 50, 95, 99, 100)], [1, 50, 95, 99, 100])
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_summary_in_microseconds(self):
+        summary = summarize_latencies([3000, 1000, 2000])
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['p50'], 2.0)
+        self.assertEqual(summary['max'], 3.0)
+        self.assertEqual(summarize_latencies([])['count'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
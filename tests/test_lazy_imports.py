@@ -0,0 +1,77 @@
+# test_lazy_imports.py
+
+import sys
+import os
+import tempfile
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lazy_imports import LazyAttribute, lazy_attribute, lazy_module, load_module
+
+MODULE_SOURCE = """
+import builtins
+builtins.lazy_probe_executions = getattr(builtins, 'lazy_probe_executions', 0) + 1
+
+class Keys:
+    ctrl = 'ctrl'
+    members = {'ctrl': ctrl}
+
+def make(value):
+    return value * 2
+"""
+
+class TestLazyImports(unittest.TestCase):
+
+    def setUp(self):
+        import builtins
+        self.builtins = builtins
+        builtins.lazy_probe_executions = 0
+        self.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.directory.name, 'lazy_probe.py'), 'w') as file:
+            file.write(MODULE_SOURCE)
+        sys.path.insert(0, self.directory.name)
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        sys.modules.pop('lazy_probe', None)
+        del self.builtins.lazy_probe_executions
+        self.directory.cleanup()
+
+    def test_module_runs_on_first_attribute_access(self):
+        module = lazy_module('lazy_probe')
+        self.assertEqual(self.builtins.lazy_probe_executions, 0)
+        self.assertIs(sys.modules['lazy_probe'], module)
+        self.assertEqual(module.make(2), 4)
+        self.assertEqual(self.builtins.lazy_probe_executions, 1)
+        self.assertIs(lazy_module('lazy_probe'), module)
+        import lazy_probe
+        self.assertIs(lazy_probe, module)
+        self.assertEqual(self.builtins.lazy_probe_executions, 1)
+
+    def test_load_module_runs_it_now(self):
+        module = load_module(lazy_module('lazy_probe'))
+        self.assertEqual(self.builtins.lazy_probe_executions, 1)
+        self.assertIs(load_module(module), module)
+        self.assertEqual(self.builtins.lazy_probe_executions, 1)
+
+    def test_missing_module_fails_up_front(self):
+        with self.assertRaises(ImportError):
+            lazy_module('no_such_module_for_lazy_tests')
+
+    def test_attribute_forwards_and_caches(self):
+        keys = lazy_attribute('lazy_probe', 'Keys')
+        self.assertIsInstance(keys, LazyAttribute)
+        self.assertEqual(self.builtins.lazy_probe_executions, 0)
+        self.assertEqual(keys.ctrl, 'ctrl')
+        self.assertEqual(keys.members.get('ctrl'), 'ctrl')
+        self.assertEqual(self.builtins.lazy_probe_executions, 1)
+        self.assertIn('ctrl', vars(keys))
+
+    def test_callable_attribute(self):
+        make = lazy_attribute('lazy_probe', 'make')
+        self.assertEqual(make(3), 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,28 +11,47 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import main
 
 import main
+from output_backends import KEYBOARD, MOUSE, RecordingBackend
 
 class TestMain(unittest.TestCase):
 
+    def setUp(self):
+        self.backend = RecordingBackend()
+        self.previous_backend = main.INJECTOR.backend
+        main.INJECTOR.backend = self.backend
+
+    def tearDown(self):
+        main.INJECTOR.release_all()
+        main.INJECTOR.backend = self.previous_backend
+
     @patch('main.load_json')
     def test_load_json(self, mock_load_json):
         mock_load_json.return_value = {'key': 'value'}
         result = main.load_json('config.json')
         self.assertEqual(result, {'key': 'value'})
 
-    @patch('main.KeyboardController')
-    def test_execute_action_keyboard(self, mock_keyboard):
-        main.execute_action('Key.ctrl', True)
-        mock_keyboard().press.assert_called_with(main.Key.ctrl)
-        main.execute_action('Key.ctrl', False)
-        mock_keyboard().release.assert_called_with(main.Key.ctrl)
+    def test_execute_action_keyboard(self):
+        main.execute_action('Key.ctrl', True, {})
+        main.execute_action('Key.ctrl', False, {})
+        self.assertEqual(self.backend.actions(), [('press', KEYBOARD, main.Key.ctrl, None),
+                                                  ('release', KEYBOARD, main.Key.ctrl, None)])
 
-    @patch('main.MouseController')
-    def test_execute_action_mouse(self, mock_mouse):
-        main.execute_action('Button.left', True)
-        mock_mouse().press.assert_called_with(main.Button.left)
-        main.execute_action('Button.left', False)
-        mock_mouse().release.assert_called_with(main.Button.left)
+    def test_execute_action_mouse(self):
+        main.execute_action('Button.left', True, {})
+        main.execute_action('Button.left', False, {})
+        self.assertEqual(self.backend.actions(), [('press', MOUSE, main.Button.left, None),
+                                                  ('release', MOUSE, main.Button.left, None)])
+
+    @patch('main.MOUSE_REMAINDER', [0.0, 0.0])
+    @patch('main.MOUSE_FILTERS', (None, None))
+    @patch('main.COMPILED_PROFILES', [])
+    def test_smooth_mouse_move_carries_sub_pixel_motion(self):
+        for _ in range(5):
+            main.smooth_mouse_move(0.4, -0.3)
+        moves = [(dx, dy) for name, _, dx, dy in self.backend.actions() if name == 'move']
+        self.assertTrue(all(isinstance(dx, int) and isinstance(dy, int) for dx, dy in moves))
+        self.assertEqual((sum(dx for dx, _ in moves), sum(dy for _, dy in moves)), (2, -1))
+        self.assertAlmostEqual(main.MOUSE_REMAINDER[1], -0.5)
 
     @patch('main.swap_to_next_profile')
     def test_swap_to_next_profile(self, mock_swap):
@@ -129,11 +148,102 @@ class TestMain(unittest.TestCase):
         mock_logging_warning.assert_called_with("No controllers detected.")
         self.assertFalse(result)
     
-    @patch('main.load_json', return_value={'current_profile': 'Default', 'profiles': []})
-    @patch('main.Notifier.notify')
-    def test_swap_to_next_profile_no_profiles(self, mock_notify, mock_load_json):
+    @patch('main.COMPILED_PROFILES', [])
+    @patch('main.notify_in_background')
+    def test_swap_to_next_profile_no_profiles(self, mock_notify):
         main.swap_to_next_profile()
-        mock_notify.assert_called_with("No profiles available to swap.")
+        mock_notify.assert_called_with("No profiles available to swap.", "Profile Switch")
+
+    def test_compile_combination(self):
+        action = main.compile_action('Key.ctrl+Key.alt+Key.delete', {})
+        action(1)
+        action(0)
+        keys = [key for _, _, key, _ in self.backend.actions()]
+        self.assertEqual(keys, [main.Key.ctrl, main.Key.alt, main.Key.delete,
+                                main.Key.delete, main.Key.alt, main.Key.ctrl])
+        self.assertEqual(self.backend.batches, 1)
+
+    def test_compile_unknown_key_fails(self):
+        with self.assertRaises(ValueError):
+            main.compile_action('Key.not_a_key', {})
+        with self.assertRaises(ValueError):
+            main.compile_action('cmd+not_a_key', {})
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(main.compile_action('NotImplementedYet', {}))
+
+    def test_compile_profile_tables(self):
+        profile = {
+            'name': 'Test',
+            'mappings': {
+                'buttons': {'0': {'name': 'X', 'action': 'Key.space'}, '3': 'TestLog', '4': {'action': ''}},
+                'axes': {'5': {'name': 'Right trigger', 'action': 'Button.right'}}
+            }
+        }
+        compiled = main.compile_profile(profile, main.build_action_map({}))
+        self.assertEqual(len(compiled['buttons']), main.MAX_BUTTONS)
+        self.assertIsNotNone(compiled['buttons'][0])
+        self.assertIs(compiled['buttons'][3], main.test_log)
+        self.assertIsNone(compiled['buttons'][4])
+        self.assertIsNotNone(compiled['axes'][5])
+
+    def test_compile_profile_continuous_axes(self):
+        profile = {
+            'name': 'Test',
+            'mappings': {
+                'buttons': {},
+                'axes': {'2': {'action': 'MouseMoveHorizontal'}, '4': {'action': 'Button.left'}}
+            }
+        }
+        compiled = main.compile_profile(profile, main.build_action_map({}), main.build_continuous_action_map({}, main.MouseMotion(), main.ScrollMotion()))
+        self.assertIsNone(compiled['axes'][2])
+        self.assertIsNotNone(compiled['axes'][4])
+        self.assertEqual([axis for axis, _, _ in compiled['continuous']], [2])
+        self.assertEqual(compiled['continuous_axes'], 1 << 2)
+        self.assertEqual(compiled['continuous_counts'], [0])
+
+    def test_compile_profile_filters(self):
+        profile = {
+            'name': 'Test',
+            'mappings': {'buttons': {}, 'axes': {'2': {'action': 'MouseMoveHorizontal'}, '4': {'action': 'Button.left'}}},
+            'filters': {'axes': {'2': {'type': 'ema', 'alpha': 0.5}, '4': {'type': 'moving_average', 'window': 3}},
+                        'mouse': {'type': 'none'}}
+        }
+        compiled = main.compile_profile(profile, main.build_action_map({}), main.build_continuous_action_map({}, main.MouseMotion(), main.ScrollMotion()))
+        self.assertIsNone(compiled['axis_filters'][2])
+        self.assertIsInstance(compiled['continuous'][0][2], main.ExponentialMovingAverage)
+        self.assertIsInstance(compiled['axis_filters'][4], main.MovingAverage)
+        self.assertEqual(compiled['mouse_filters'], (None, None))
+
+    def test_benchmark_profile_reports_latency(self):
+        config = main.load_json('config.json')
+        main.compile_profiles(config)
+        main.refresh_calibration(config)
+        result = main.benchmark_profile(config, 0, events=500, seed=1)
+        self.assertEqual(result['input_events'], 500)
+        self.assertEqual(result['latency_us']['count'], result['output_events'])
+        self.assertIs(main.INJECTOR.backend, self.backend)
+
+    @patch('main.notify_in_background')
+    @patch('main.save_config')
+    def test_swap_hands_held_inputs_over(self, mock_save_config, mock_notify):
+        config = {'current_profile_index': 0, 'current_profile': 'Game', 'profiles': [
+            {'name': 'Game', 'mappings': {'buttons': {'0': 'SwapProfile', '1': 'Key.space'}, 'axes': {}}},
+            {'name': 'Menu', 'mappings': {'buttons': {'1': 'Key.enter'}, 'axes': {}}}]}
+        previous = main.COMPILED_PROFILES, main.ACTIVE_CONFIG, main.CURRENT_PROFILE_INDEX
+        self.addCleanup(setattr, main, 'CURRENT_PROFILE_INDEX', previous[2])
+        self.addCleanup(setattr, main, 'ACTIVE_CONFIG', previous[1])
+        self.addCleanup(setattr, main, 'COMPILED_PROFILES', previous[0])
+        main.compile_profiles(config)
+        main.CURRENT_PROFILE_INDEX = 0
+        state = main.InputState()
+        for button, pressed in ((1, True), (0, True), (1, False), (0, False), (1, True)):
+            (state.press_button if pressed else state.release_button)(button)
+            main.execute_profile_actions(state, config, controller=True)
+        self.assertEqual(main.CURRENT_PROFILE_INDEX, 1)
+        self.assertEqual((config['current_profile_index'], config['current_profile']), (1, 'Menu'))
+        mock_save_config.assert_called_once_with(config, main.CONFIG_PATH)
+        self.assertEqual([(kind, key) for kind, _, key, _ in self.backend.actions()],
+                         [('press', main.Key.space), ('release', main.Key.space), ('press', main.Key.enter)])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
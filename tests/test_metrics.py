@@ -0,0 +1,104 @@
+# test_metrics.py
+
+import sys
+import os
+import socket
+import tempfile
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import (MetricsFileWriter, MetricsRegistry, MetricsSocketServer, counter, gauge,
+                     get_metrics_settings, make_exporter, render)
+
+class TestRender(unittest.TestCase):
+
+    def test_exposition_format(self):
+        text = render([
+            counter('events', "Events received.").add(3, type="JoyButtonDown").add(5, type="JoyAxisMotion"),
+            gauge('queue_depth', "Queue depth.", 2),
+            gauge('rate', "Rate.", 0.5)
+        ], prefix='test_')
+        self.assertEqual(text.splitlines(), [
+            '# HELP test_events_total Events received.',
+            '# TYPE test_events_total counter',
+            'test_events_total{type="JoyButtonDown"} 3',
+            'test_events_total{type="JoyAxisMotion"} 5',
+            '# HELP test_queue_depth Queue depth.',
+            '# TYPE test_queue_depth gauge',
+            'test_queue_depth 2',
+            '# HELP test_rate Rate.',
+            '# TYPE test_rate gauge',
+            'test_rate 0.5'
+        ])
+
+    def test_label_values_are_escaped(self):
+        text = render([counter('actions', "Actions.", 1, action='say "hi"\\\n')], prefix='')
+        self.assertIn('actions_total{action="say \\"hi\\"\\\\\\n"} 1', text)
+
+    def test_special_floats(self):
+        text = render([gauge('a', "A.", float('nan')), gauge('b', "B.", float('inf'))], prefix='')
+        self.assertIn('a NaN', text)
+        self.assertIn('b +Inf', text)
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.scrapes = 0
+        self.registry = MetricsRegistry()
+        self.registry.register(self.collect)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def collect(self):
+        self.scrapes += 1
+        return [counter('scrapes', "Scrapes.", self.scrapes)]
+
+    def test_collectors_run_only_when_scraped(self):
+        self.assertEqual(self.scrapes, 0)
+        self.assertIn('controller_mapper_scrapes_total 1', self.registry.render())
+
+    def test_failing_collector_does_not_break_the_scrape(self):
+        self.registry.register(lambda: 1 / 0)
+        with self.assertLogs(level='ERROR'):
+            self.assertIn('scrapes_total 1', self.registry.render())
+
+    def test_file_writer_writes_on_stop(self):
+        path = os.path.join(self.directory.name, 'mapper.prom')
+        writer = MetricsFileWriter(self.registry, path, interval_s=60).start()
+        writer.stop()
+        with open(path) as file:
+            self.assertIn('scrapes_total 1', file.read())
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets only")
+    def test_socket_server_answers_each_connection(self):
+        path = os.path.join(self.directory.name, 'mapper.sock')
+        server = MetricsSocketServer(self.registry, path).start()
+        try:
+            for expected in (1, 2):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(path)
+                    client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+                    response = b''
+                    while chunk := client.recv(4096):
+                        response += chunk
+                header, body = response.decode().split('\r\n\r\n', 1)
+                self.assertTrue(header.startswith('HTTP/1.0 200 OK'))
+                self.assertIn(f'scrapes_total {expected}', body)
+        finally:
+            server.stop()
+        self.assertFalse(os.path.exists(path))
+
+    def test_settings_and_unknown_exporter(self):
+        settings = get_metrics_settings({'metrics': {'enabled': True}})
+        self.assertTrue(settings['enabled'])
+        self.assertEqual(settings['exporter'], 'file')
+        with self.assertRaises(ValueError):
+            make_exporter(self.registry, 'http', 'x')
+
+if __name__ == '__main__':
+    unittest.main()
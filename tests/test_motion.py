@@ -0,0 +1,95 @@
+# test_motion.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from motion import MouseMotion, ScrollMotion
+
+class TestMouseMotion(unittest.TestCase):
+
+    def test_sub_pixel_motion_accumulates(self):
+        motion = MouseMotion(speed_px_s=100)
+        motion.set_x(0.1)
+        # 100 px/s * 0.1 deflection = 10 px/s -> one pixel every 0.1 s at 1 ms ticks
+        moved = [motion.step(0.001) for _ in range(1000)]
+        self.assertEqual(sum(dx for dx, _ in moved), 10)
+        self.assertEqual(sum(1 for dx, dy in moved if dx or dy), 10)
+        self.assertEqual(motion.moves, 10)
+
+    def test_frame_rate_independent(self):
+        slow, fast = MouseMotion(speed_px_s=500), MouseMotion(speed_px_s=500)
+        slow.set_x(0.7)
+        slow.set_y(-0.3)
+        fast.set_x(0.7)
+        fast.set_y(-0.3)
+        slow_total = [0, 0]
+        fast_total = [0, 0]
+        for _ in range(250):
+            dx, dy = slow.step(0.004)
+            slow_total[0] += dx
+            slow_total[1] += dy
+        for _ in range(1000):
+            dx, dy = fast.step(0.001)
+            fast_total[0] += dx
+            fast_total[1] += dy
+        self.assertLessEqual(abs(slow_total[0] - fast_total[0]), 1)
+        self.assertLessEqual(abs(slow_total[1] - fast_total[1]), 1)
+        self.assertAlmostEqual(fast_total[0], 350, delta=1)
+
+    def test_release_clears_remainder(self):
+        motion = MouseMotion(speed_px_s=100)
+        motion.set_x(0.5)
+        self.assertEqual(motion.step(0.015), (0, 0))
+        motion.set_x(0.0)
+        self.assertEqual(motion.step(0.001), (0, 0))
+        self.assertEqual(motion.remainder_x, 0.0)
+
+    def test_config_speed_sensitivity_invert_and_acceleration(self):
+        config = {'calibration': {'mouse_speed': 2.0, 'sensitivity': 0.5, 'invert': True,
+                                  'mouse_motion': {'max_speed_px_s': 1000, 'acceleration': 1.0,
+                                                   'acceleration_time_s': 1.0}}}
+        motion = MouseMotion.from_config(config)
+        self.assertEqual(motion.speed_px_s, 1000)
+        motion.set_y(1.0)
+        dx, dy = motion.step(0.01)
+        self.assertEqual(dx, 0)
+        self.assertEqual(dy, -10)
+        for _ in range(200):
+            motion.step(0.01)
+        self.assertEqual(motion.step(0.01), (0, -20))
+
+class TestScrollMotion(unittest.TestCase):
+
+    def test_slow_scroll_accumulates_fractional_steps(self):
+        scroll = ScrollMotion(speed_steps_s=20)
+        steps = []
+        for _ in range(1000):
+            scroll.push(0.0, 0.25)
+            steps.append(scroll.step(0.001))
+        # 20 steps/s * 0.25 = 5 steps over one second, one scroll call each
+        self.assertEqual(sum(dy for _, dy in steps), 5)
+        self.assertEqual(scroll.scrolls, 5)
+
+    def test_fast_scroll_batches_steps(self):
+        scroll = ScrollMotion(speed_steps_s=200)
+        scroll.push(-1.0, 0.0)
+        self.assertEqual(scroll.step(0.05), (-10, 0))
+        self.assertEqual(scroll.scrolls, 1)
+
+    def test_opposite_pushes_cancel_and_release_clears_remainder(self):
+        scroll = ScrollMotion(speed_steps_s=20)
+        scroll.push(0.0, 0.5)
+        scroll.push(0.0, -0.5)
+        self.assertEqual(scroll.step(0.1), (0, 0))
+        scroll.push(0.0, 0.5)
+        scroll.step(0.05)
+        self.assertGreater(scroll.remainder_y, 0.0)
+        self.assertEqual(scroll.step(0.05), (0, 0))
+        self.assertEqual(scroll.remainder_y, 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# test_output_state.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from output_state import OutputState
+
+class TestOutputState(unittest.TestCase):
+
+    def test_only_transitions_are_emitted(self):
+        output = OutputState()
+        self.assertFalse(output.release('kb', 'left'))
+        self.assertTrue(output.press('kb', 'right'))
+        self.assertFalse(output.press('kb', 'right'))
+        self.assertTrue(output.is_held('right'))
+        self.assertTrue(output.release('kb', 'right'))
+        self.assertFalse(output.release('kb', 'right'))
+        self.assertEqual(output.suppressed, 3)
+
+    def test_take_held_releases_in_reverse_order(self):
+        output = OutputState()
+        output.press('kb', 'cmd')
+        output.press('kb', 'alt')
+        output.press('mouse', 'left')
+        self.assertEqual(output.take_held(), [('mouse', 'left'), ('kb', 'alt'), ('kb', 'cmd')])
+        self.assertEqual(output.held, {})
+
+if __name__ == '__main__':
+    unittest.main()
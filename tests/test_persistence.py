@@ -0,0 +1,120 @@
+# test_persistence.py
+
+import sys
+import os
+import json
+import stat
+import tempfile
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from persistence import WriteBehind, write_atomic
+
+class TestWriteAtomic(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'config.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replaces_file_and_keeps_mode(self):
+        write_atomic(self.path, '{"a": 1}')
+        os.chmod(self.path, 0o600)
+        write_atomic(self.path, '{"a": 2}')
+        with open(self.path) as file:
+            self.assertEqual(json.load(file), {'a': 2})
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(os.listdir(self.directory.name), ['config.json'])
+
+    def test_failed_write_leaves_original(self):
+        write_atomic(self.path, 'original')
+        with self.assertRaises(OSError):
+            write_atomic(os.path.join(self.directory.name, 'missing', 'config.json'), 'new')
+        with self.assertRaises(TypeError):
+            write_atomic(self.path, None)
+        with open(self.path) as file:
+            self.assertEqual(file.read(), 'original')
+        self.assertEqual(os.listdir(self.directory.name), ['config.json'])
+
+class TestWriteBehind(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'config.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, path=None):
+        with open(path or self.path) as file:
+            return json.load(file)
+
+    def test_saves_are_coalesced(self):
+        writer = WriteBehind(delay_s=60.0)
+        for index in range(5):
+            writer.save(self.path, {'current_profile_index': index})
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(writer.flush(timeout=5.0))
+        self.assertEqual(self.read(), {'current_profile_index': 4})
+        stats = writer.stats()
+        self.assertEqual((stats['saves'], stats['writes'], stats['coalesced']), (5, 1, 4))
+        writer.close()
+
+    def test_flush_is_a_barrier_per_path(self):
+        writer = WriteBehind(delay_s=0.0)
+        layout_path = os.path.join(self.directory.name, 'layout.json')
+        writer.save(self.path, {'a': 1})
+        writer.save(layout_path, {'b': 2})
+        self.assertTrue(writer.flush(timeout=5.0))
+        self.assertEqual(self.read(), {'a': 1})
+        self.assertEqual(self.read(layout_path), {'b': 2})
+        self.assertTrue(writer.flush(timeout=0))
+        writer.close()
+
+    def test_close_writes_pending_saves(self):
+        writer = WriteBehind(delay_s=60.0)
+        writer.save(self.path, {'a': 1})
+        self.assertTrue(writer.close(timeout=5.0))
+        self.assertEqual(self.read(), {'a': 1})
+        self.assertIsNone(writer.thread)
+
+    def test_failures_are_counted_and_do_not_stop_the_writer(self):
+        writer = WriteBehind(delay_s=0.0)
+        with self.assertLogs(level='ERROR'):
+            writer.save(self.path, {'not serializable': object()})
+            self.assertTrue(writer.flush(timeout=5.0))
+        writer.save(self.path, {'a': 1})
+        self.assertTrue(writer.flush(timeout=5.0))
+        self.assertEqual(self.read(), {'a': 1})
+        self.assertEqual(writer.stats()['failures'], 1)
+        writer.close()
+
+    def test_document_changed_during_serialization_is_retried(self):
+        document = {'current_profile_index': 0}
+        calls = []
+
+        def serialize(value):
+            calls.append(value)
+            if len(calls) == 1:
+                document['current_profile'] = 'Gaming'
+                raise RuntimeError("dictionary changed size during iteration")
+            return json.dumps(value)
+
+        writer = WriteBehind(delay_s=0.0, serialize=serialize)
+        writer.save(self.path, document)
+        self.assertTrue(writer.flush(timeout=5.0))
+        self.assertEqual(self.read(), {'current_profile_index': 0, 'current_profile': 'Gaming'})
+        stats = writer.stats()
+        self.assertEqual((stats['writes'], stats['failures'], stats['retries']), (1, 0, 1))
+        writer.close()
+
+    def test_rejects_negative_delay(self):
+        with self.assertRaises(ValueError):
+            WriteBehind(delay_s=-1)
+
+if __name__ == '__main__':
+    unittest.main()
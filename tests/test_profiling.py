@@ -0,0 +1,57 @@
+# test_profiling.py
+
+import sys
+import os
+import pstats
+import tempfile
+import unittest
+from time import sleep
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from profiling import ProfileSession, format_size
+
+def allocate_blocks(blocks):
+    for _ in range(200):
+        blocks.append(bytearray(1024))
+
+class TestProfileSession(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'profile')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_writes_stats_and_allocation_report(self):
+        blocks = []
+        session = ProfileSession(self.output, snapshot_interval_s=0.05, top=5).start()
+        allocate_blocks(blocks)
+        sleep(0.12)
+        allocate_blocks(blocks)
+        prof_path, report_path = session.stop()
+
+        stats = pstats.Stats(prof_path)
+        self.assertTrue(any(function[2] == 'allocate_blocks' for function in stats.stats))
+        with open(report_path) as file:
+            report = file.read()
+        self.assertIn('== Functions by cumulative time ==', report)
+        self.assertIn('== Allocation growth since start', report)
+        growth = report.split('== Allocation growth since start')[1].split('\n')[1]
+        self.assertIn('test_profiling.py', growth)
+        self.assertGreaterEqual(report.count('== Allocations '), 2)
+        self.assertEqual(len(session.intervals), report.count('== Allocations '))
+
+    def test_rejects_bad_interval(self):
+        with self.assertRaises(ValueError):
+            ProfileSession(self.output, snapshot_interval_s=0)
+
+    def test_format_size(self):
+        self.assertEqual(format_size(512), '+512 B')
+        self.assertEqual(format_size(-2048), '-2.0 KiB')
+        self.assertEqual(format_size(3 * 1024 * 1024), '+3.0 MiB')
+
+if __name__ == '__main__':
+    unittest.main()
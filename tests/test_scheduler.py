@@ -0,0 +1,49 @@
+# test_scheduler.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scheduler import TickScheduler
+
+MS = 1_000_000
+
+class TestTickScheduler(unittest.TestCase):
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TickScheduler(0)
+
+    def test_ticks_on_deadlines_without_drift(self):
+        scheduler = TickScheduler(250)
+        scheduler.start(0)
+        self.assertAlmostEqual(scheduler.poll(0), 0.004)
+        self.assertEqual(scheduler.poll(3 * MS), 0.0)
+        self.assertEqual(scheduler.timeout_ms(3 * MS), 1)
+        # Waking up late does not push the following deadlines back.
+        self.assertAlmostEqual(scheduler.poll(5 * MS), 0.005)
+        self.assertEqual(scheduler.next_deadline, 8 * MS)
+        self.assertAlmostEqual(scheduler.poll(8 * MS), 0.003)
+        self.assertEqual(scheduler.ticks, 3)
+        self.assertEqual(scheduler.missed, 0)
+
+    def test_late_wakeup_skips_instead_of_bursting(self):
+        scheduler = TickScheduler(1000)
+        scheduler.start(0)
+        scheduler.poll(0)
+        self.assertAlmostEqual(scheduler.poll(10 * MS + 1), 0.010000001)
+        self.assertEqual(scheduler.poll(10 * MS + 2), 0.0)
+        self.assertEqual(scheduler.missed, 9)
+        self.assertEqual(scheduler.next_deadline, 11 * MS)
+
+    def test_timeout_when_due(self):
+        scheduler = TickScheduler(500)
+        scheduler.start(100)
+        self.assertEqual(scheduler.timeout_ms(100), 0)
+        self.assertEqual(scheduler.timeout_ms(200), 0)
+
+if __name__ == '__main__':
+    unittest.main()
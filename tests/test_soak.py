@@ -0,0 +1,69 @@
+# test_soak.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from soak import SoakMonitor, current_rss_bytes, linear_slope
+
+class TestLinearSlope(unittest.TestCase):
+
+    def test_slope_of_a_line(self):
+        self.assertAlmostEqual(linear_slope([0, 1, 2, 3], [1, 3, 5, 7]), 2.0)
+
+    def test_flat_or_too_short(self):
+        self.assertEqual(linear_slope([0, 1, 2], [4, 4, 4]), 0.0)
+        self.assertEqual(linear_slope([1], [5]), 0.0)
+        self.assertEqual(linear_slope([2, 2], [1, 5]), 0.0)
+
+class TestSoakMonitor(unittest.TestCase):
+
+    def run_monitor(self, monitor, step, intervals=20):
+        monitor.begin(0.0)
+        for i in range(1, intervals + 1):
+            step(i)
+            monitor.record(1000, 1000 * 1000, float(i))
+        return monitor.finish()
+
+    def test_stable_run_passes(self):
+        report = self.run_monitor(SoakMonitor(20.0, max_memory_growth_mb=0.5), lambda i: None)
+        self.assertTrue(report['passed'], report['failures'])
+        self.assertEqual(len(report['samples']), 20)
+        self.assertEqual(report['samples'][0]['ns_per_event'], 1000.0)
+        self.assertEqual(report['time_per_event_growth'], 0.0)
+
+    def test_leak_fails_and_is_located(self):
+        leaked = []
+        report = self.run_monitor(SoakMonitor(20.0, max_memory_growth_mb=0.5),
+                                  lambda i: leaked.append(bytearray(100 * 1024)))
+        self.assertFalse(report['passed'])
+        self.assertIn('traced memory', report['failures'][0])
+        self.assertGreater(report['traced_growth_bytes'], 1024 * 1024)
+        self.assertIn('test_soak.py', report['top_allocation_growth'][0]['location'])
+
+    def test_slowdown_fails(self):
+        monitor = SoakMonitor(20.0)
+        monitor.begin(0.0)
+        for i in range(1, 21):
+            monitor.record(1000, 1000 * 1000 * i, float(i))
+        report = monitor.finish()
+        self.assertFalse(report['passed'])
+        self.assertGreater(report['time_per_event_growth'], 0.5)
+
+    def test_samples_only_once_per_interval(self):
+        monitor = SoakMonitor(10.0, sample_interval_s=1.0)
+        monitor.begin(0.0)
+        for i in range(100):
+            monitor.record(10, 100, i * 0.1)
+        report = monitor.finish()
+        self.assertEqual(len(report['samples']), 9)
+        self.assertEqual(report['samples'][0]['events'], 110)
+
+    def test_rss_is_positive(self):
+        self.assertGreater(current_rss_bytes(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
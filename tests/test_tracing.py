@@ -0,0 +1,76 @@
+# test_tracing.py
+
+import sys
+import os
+import unittest
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tracing import BUCKET_COUNT, INJECT, MAX_VALUE, STAGES, Histogram, StageTracer, bucket_index, bucket_range
+
+class TestBuckets(unittest.TestCase):
+
+    def test_every_value_falls_inside_its_bucket(self):
+        values = list(range(0, 5000)) + [2 ** bits + offset for bits in range(13, 36) for offset in (-1, 0, 1)]
+        for value in values:
+            low, width = bucket_range(bucket_index(value))
+            self.assertTrue(low <= value < low + width, value)
+            self.assertLessEqual(width, max(1, value / 32))
+
+    def test_buckets_are_contiguous(self):
+        expected = 0
+        for index in range(BUCKET_COUNT):
+            low, width = bucket_range(index)
+            self.assertEqual(low, expected)
+            expected = low + width
+        self.assertEqual(bucket_index(MAX_VALUE), BUCKET_COUNT - 1)
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles_within_resolution(self):
+        histogram = Histogram()
+        for value in range(1000, 101000, 100):
+            histogram.record(value)
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.min, 1000)
+        self.assertEqual(histogram.max, 100900)
+        for q, exact in ((50, 50900), (90, 90900), (99, 99900)):
+            self.assertAlmostEqual(histogram.value_at_percentile(q), exact, delta=exact * 0.03)
+        self.assertEqual(histogram.value_at_percentile(100), 100900)
+
+    def test_out_of_range_values_are_clamped(self):
+        histogram = Histogram()
+        histogram.record(-5)
+        histogram.record(MAX_VALUE * 4)
+        self.assertEqual(histogram.min, 0)
+        self.assertEqual(histogram.max, MAX_VALUE)
+        self.assertEqual(len(histogram.counts), BUCKET_COUNT)
+
+    def test_summary_and_reset(self):
+        histogram = Histogram()
+        for value in (2000, 4000, 6000):
+            histogram.record(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['max'], 6.0)
+        self.assertEqual(summary['mean'], 4.0)
+        histogram.reset()
+        self.assertEqual(histogram.summary()['count'], 0)
+        self.assertEqual(histogram.value_at_percentile(50), 0)
+
+class TestStageTracer(unittest.TestCase):
+
+    def test_records_per_stage_and_formats(self):
+        tracer = StageTracer()
+        tracer.record(INJECT, 1500)
+        summary = tracer.summary()
+        self.assertEqual(list(summary), list(STAGES))
+        self.assertEqual(summary[INJECT]['count'], 1)
+        self.assertEqual(summary['pump']['count'], 0)
+        self.assertIn('inject', tracer.format())
+        tracer.reset()
+        self.assertEqual(tracer.summary()[INJECT]['count'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
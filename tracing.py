@@ -0,0 +1,161 @@
+"""
+Per-stage latency tracing for the input loop.
+
+Every traced loop iteration stamps the events with `perf_counter_ns` as they are ingested
+and records how long each stage took:
+
+    pump: fetching the events, from the moment the source stopped waiting for input.
+    handle: `handle_controller_events` - coalescing, normalization and calibration.
+    dispatch: action lookup and the actions themselves, discrete and continuous.
+    inject: performing one output command on the backend (pynput).
+
+Durations go into fixed-memory HDR-style histograms: log-linear buckets with 32-64
+sub-buckets per power of two, so every value from 1 ns to about a minute is kept with
+about 3% resolution in the same 1024 counters, however many samples are recorded.
+
+When tracing is off the loop never calls in here.
+"""
+from time import perf_counter
+
+PUMP = 'pump'
+HANDLE = 'handle'
+DISPATCH = 'dispatch'
+INJECT = 'inject'
+STAGES = (PUMP, HANDLE, DISPATCH, INJECT)
+
+SUB_BUCKET_BITS = 6
+MAX_VALUE_BITS = 36  # ~68.7 s in nanoseconds; longer values land in the last bucket.
+HALF_SUB_BUCKET_BITS = SUB_BUCKET_BITS - 1
+BUCKET_COUNT = ((MAX_VALUE_BITS - SUB_BUCKET_BITS) << HALF_SUB_BUCKET_BITS) + (1 << SUB_BUCKET_BITS)
+MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+def bucket_index(value):
+    """
+    Bucket of a non-negative integer value.
+    """
+    bits = value.bit_length()
+    if bits <= SUB_BUCKET_BITS:
+        return value
+    shift = bits - SUB_BUCKET_BITS
+    return (shift << HALF_SUB_BUCKET_BITS) + (value >> shift)
+
+def bucket_range(index):
+    """
+    Returns:
+        tuple: (lowest value, width) of the values counted in bucket `index`.
+    """
+    if index < 1 << SUB_BUCKET_BITS:
+        return index, 1
+    shift = (index >> HALF_SUB_BUCKET_BITS) - 1
+    return (index - (shift << HALF_SUB_BUCKET_BITS)) << shift, 1 << shift
+
+class Histogram:
+    """
+    Attributes:
+        counts (list): Samples per bucket, BUCKET_COUNT entries.
+        count (int): Samples recorded.
+        total (int): Sum of the samples, for the mean.
+        min, max (int): Exact extremes of the samples.
+    """
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.reset()
+
+    def reset(self):
+        counts = self.counts
+        for i in range(BUCKET_COUNT):
+            counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value):
+        if value < 0:
+            value = 0
+        elif value > MAX_VALUE:
+            value = MAX_VALUE
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        if shift <= 0:
+            self.counts[value] += 1
+        else:
+            self.counts[(shift << HALF_SUB_BUCKET_BITS) + (value >> shift)] += 1
+        count = self.count
+        if not count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count = count + 1
+        self.total += value
+
+    def value_at_percentile(self, q):
+        """
+        Value at percentile `q` in [0, 100] (nearest rank), as the middle of its bucket.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                low, width = bucket_range(index)
+                return max(self.min, min(self.max, low + width // 2))
+        return self.max
+
+    def summary(self):
+        """
+        Returns:
+            dict: count plus p50/p90/p99/p99.9/max/mean in microseconds.
+        """
+        if not self.count:
+            return {'count': 0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'p99.9': 0.0, 'max': 0.0, 'mean': 0.0}
+        return {
+            'count': self.count,
+            'p50': round(self.value_at_percentile(50) / 1000.0, 2),
+            'p90': round(self.value_at_percentile(90) / 1000.0, 2),
+            'p99': round(self.value_at_percentile(99) / 1000.0, 2),
+            'p99.9': round(self.value_at_percentile(99.9) / 1000.0, 2),
+            'max': round(self.max / 1000.0, 2),
+            'mean': round(self.total / self.count / 1000.0, 2)
+        }
+
+class StageTracer:
+    """
+    One histogram per stage. Each stage is recorded from a single thread (inject from the
+    injector thread, the rest from the input loop), so recording takes no lock.
+
+    Attributes:
+        histograms (dict): Stage name -> Histogram.
+        started (float): `perf_counter` time of the last reset.
+    """
+    __slots__ = ('histograms', 'started')
+
+    def __init__(self, stages=STAGES):
+        self.histograms = {stage: Histogram() for stage in stages}
+        self.started = perf_counter()
+
+    def record(self, stage, duration_ns):
+        self.histograms[stage].record(duration_ns)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.started = perf_counter()
+
+    def summary(self):
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def format(self):
+        """
+        Returns:
+            str: The histograms as a table in microseconds, for the log or the terminal.
+        """
+        lines = [f"Stage latency over {perf_counter() - self.started:.1f} s (us):",
+                 f"{'stage':<10}{'count':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}{'mean':>10}"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<10}{stats['count']:>10}" + ''.join(
+                f"{stats[key]:>10.2f}" for key in ('p50', 'p90', 'p99', 'p99.9', 'max', 'mean')))
+        return "\n".join(lines)